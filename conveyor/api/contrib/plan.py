@@ -15,14 +15,17 @@
 #    under the License.
 
 
+import webob
 from webob import exc
 
 from oslo_log import log as logging
+from oslo_utils import strutils
 
 from conveyor.api import extensions
 from conveyor.api.wsgi import wsgi
 from conveyor.clone import api
 from conveyor.common import plan_status as p_status
+from conveyor.common import template_format
 from conveyor.db import api as db_api
 from conveyor.plan import api as plan_api
 
@@ -30,6 +33,9 @@ from conveyor.i18n import _
 
 LOG = logging.getLogger(__name__)
 
+TEMPLATE_CONTENT_TYPES = {'json': 'application/json',
+                          'yaml': 'application/x-yaml'}
+
 
 class PlansActionController(wsgi.Controller):
 
@@ -55,10 +61,36 @@ class PlansActionController(wsgi.Controller):
                     'state': plan_status,
                 }
             raise exc.HTTPBadRequest(explanation=msg)
+        params = body.get('download_template') or {}
+        if strutils.bool_from_string(params.get('stream', False)):
+            return self._stream_template(req, context, id,
+                                         params.get('format', 'json'))
         content = self.clone_api.download_template(context, id)
         LOG.debug('the content is %s' % content)
         return content
 
+    def _stream_template(self, req, context, plan_id, fmt):
+        """Write the template of the plan out as it is serialized.
+
+        The template is read here rather than returned by conveyor-clone, so
+        it is neither copied over rpc nor serialized into one body, and is
+        gzip compressed when the client accepts it.
+        """
+        if fmt not in TEMPLATE_CONTENT_TYPES:
+            msg = _("Unsupported template format %s.") % fmt
+            raise exc.HTTPBadRequest(explanation=msg)
+        template = db_api.plan_template_get(context, plan_id)
+        gzip = 'gzip' in req.headers.get('Accept-Encoding', '')
+        resp = webob.Response(
+            app_iter=template_format.iter_dump(template.get('template', {}),
+                                               fmt, gzip=gzip),
+            content_type=TEMPLATE_CONTENT_TYPES[fmt])
+        if gzip:
+            resp.content_encoding = 'gzip'
+        resp.headers['Content-Disposition'] = \
+            'attachment; filename="%s.%s"' % (plan_id, fmt)
+        return resp
+
     @wsgi.response(202)
     @wsgi.action('os-reset_state')
     def _reset_state(self, req, id, body):
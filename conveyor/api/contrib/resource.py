@@ -18,10 +18,12 @@ from webob import exc
 
 
 from oslo_log import log as logging
+from oslo_utils import strutils
 
 from conveyor.api.wsgi import wsgi
 
 from conveyor.api import extensions
+from conveyor import exception
 from conveyor.resource import api as resource_api
 
 from conveyor.i18n import _
@@ -112,6 +114,12 @@ class ResourceActionController(wsgi.Controller):
         search_opt = params.get('search_opt', None)
         try:
             context = req.environ['conveyor.context']
+            # build the topo in the background and return the job at once,
+            # the client polls it with show-resources_topo_job
+            if strutils.bool_from_string(params.get('async', False)):
+                job = self._resource_api.start_resources_topo_job(
+                    context, plan_id, az_map, search_opt=search_opt)
+                return {'plan_id': plan_id, 'job': job}
             topo = self._resource_api.build_resources_topo(
                 context, plan_id, az_map, search_opt=search_opt)
             return {'plan_id': plan_id, 'topo': topo}
@@ -119,6 +127,27 @@ class ResourceActionController(wsgi.Controller):
             LOG.error(unicode(e))
             raise exc.HTTPInternalServerError(explanation=unicode(e))
 
+    @wsgi.response(202)
+    @wsgi.action("show-resources_topo_job")
+    def show_resources_topo_job(self, req, id, body):
+        if not self.is_valid_body(body, 'show-resources_topo_job'):
+            msg = _("Show resources topo job request body has not key "
+                    "'show-resources_topo_job'")
+            raise exc.HTTPBadRequest(explanation=msg)
+        job_id = body['show-resources_topo_job'].get('job_id')
+        if not job_id:
+            msg = _("The body should contain parameter 'job_id'.")
+            raise exc.HTTPBadRequest(explanation=msg)
+        try:
+            context = req.environ['conveyor.context']
+            job = self._resource_api.get_resources_topo_job(context, job_id)
+            return {'job': job}
+        except exception.NotFound as e:
+            raise exc.HTTPNotFound(explanation=unicode(e))
+        except Exception as e:
+            LOG.error(unicode(e))
+            raise exc.HTTPInternalServerError(explanation=unicode(e))
+
     @wsgi.response(202)
     @wsgi.action('delete-cloned_resource')
     def _delete_cloned_resource(self, req, id, body):
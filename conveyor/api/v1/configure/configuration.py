@@ -19,9 +19,9 @@ from webob import exc
 
 from oslo_config import cfg
 from oslo_log import log as logging
-from oslo_utils import timeutils
 
 from conveyor.api.wsgi import wsgi
+from conveyor.common import vgw_registry
 from conveyor.db import api as db_api
 from conveyor import utils
 
@@ -44,9 +44,8 @@ class ConfigurationController(wsgi.Controller):
 
     def delete(self, req, id):
         """Delete resource."""
-        config_vaule = CONF.vgw_info
-        config_value_str = '{' + config_vaule + '}'
-        config_value_dict = eval(config_value_str)
+        vgw_registry.get_registry().remove(id)
+        config_value_dict = vgw_registry.parse_vgw_info(CONF.vgw_info)
         utils.remove_vgw_info(id, 'vgw_info', config_value_dict)
         LOG.debug('Config vgw info: %s', CONF.vgw_info)
 
@@ -70,6 +69,7 @@ class ConfigurationController(wsgi.Controller):
         # 1. add config vaule according key to system
         newConfig = None
         saveFileConfig = None
+        config_changed = False
         filepath = config.get("config_file", CONF.config_path)
         config_body = config.get("config_info")
 
@@ -83,6 +83,13 @@ class ConfigurationController(wsgi.Controller):
             for configs in config_body:
                 group = configs.pop('group', 'DEFAULT')
                 for key, value in configs.items():
+                    # vgw agents register and heartbeat with their vgw_info,
+                    # kept by the vgw registry instead of the config file
+                    if 'DEFAULT' == group and 'vgw_info' == key and \
+                            isinstance(value, dict):
+                        self._register_vgws(value)
+                        continue
+
                     if 'DEFAULT' == group:
                         config_value = getattr(CONF, key, None)
                     else:
@@ -133,10 +140,12 @@ class ConfigurationController(wsgi.Controller):
 
                     # 2 add config value to config file
                     self.config_ctl.set(group, key, saveFileConfig)
+                    config_changed = True
 
             # write new info to config file
-            fh = open(filepath, 'w')
-            self.config_ctl.write(fh)
+            if config_changed:
+                fh = open(filepath, 'w')
+                self.config_ctl.write(fh)
 
         except Exception as e:
                 LOG.error("Add config info error: %s", e)
@@ -150,6 +159,17 @@ class ConfigurationController(wsgi.Controller):
         """Update a configure."""
         pass
 
+    def _register_vgws(self, vgw_info):
+        '''vgw_info is {az: {vgw_id: vgw_ip or {'ip': vgw_ip, ...}}}'''
+        registry = vgw_registry.get_registry()
+        for az, vgws in vgw_info.items():
+            if not isinstance(vgws, dict):
+                LOG.error("Register vgw of %(az)s error: %(vgws)s is not "
+                          "dict", {'az': az, 'vgws': vgws})
+                continue
+            for vgw_id, info in vgws.items():
+                registry.heartbeat(az, vgw_id, info)
+
     @utils.synchronized('conveyor-config', external=True)
     def _regist_new_config(self, config_vaule, add_value):
 
@@ -171,8 +191,6 @@ class ConfigurationController(wsgi.Controller):
             if isinstance(v, dict):
                 for kk, vv in v.items():
                     config_az_value[kk] = vv
-                    # add update time
-                    utils.vgw_update_time[kk] = timeutils.utcnow()
                 config_value_dict[k] = config_az_value
             else:
                 config_value_dict[k] = v
@@ -184,8 +202,7 @@ class ConfigurationController(wsgi.Controller):
         else:
             config_value_str = ""
 
-        LOG.debug('Add config info end, update time list: %s',
-                  utils.vgw_update_time)
+        LOG.debug('Add config info end: %s', config_value_str)
 
         return config_value_str
 
@@ -25,9 +25,9 @@ from xml.dom import minidom
 from xml.parsers import expat
 
 from oslo_log import log as logging
-from oslo_serialization import jsonutils
 from oslo_utils import excutils
 
+from conveyor.common import serializer
 from conveyor import exception
 from conveyor import i18n
 from conveyor.i18n import _, _LE, _LI
@@ -291,7 +291,7 @@ class JSONDeserializer(TextDeserializer):
 
     def _from_json(self, datastring):
         try:
-            return jsonutils.loads(datastring)
+            return serializer.loads(datastring)
         except ValueError:
             msg = _("cannot understand JSON")
             raise exception.MalformedRequestBody(reason=msg)
@@ -415,7 +415,7 @@ class JSONDictSerializer(DictSerializer):
     """Default JSON request body serialization."""
 
     def default(self, data):
-        return jsonutils.dumps(data)
+        return serializer.dumps(data)
 
 
 class XMLDictSerializer(DictSerializer):
@@ -623,8 +623,8 @@ class ResponseObject(object):
 
         # We can't use update because that would be the wrong
         # precedence
-        for mtype, serializer in meth_serializers.items():
-            self.serializers.setdefault(mtype, serializer)
+        for mtype, meth_serializer in meth_serializers.items():
+            self.serializers.setdefault(mtype, meth_serializer)
 
     def get_serializer(self, content_type, default_serializers=None):
         """Returns the serializer for the wrapped object.
@@ -707,7 +707,7 @@ def action_peek_json(body):
     """Determine action to invoke."""
 
     try:
-        decoded = jsonutils.loads(body)
+        decoded = serializer.loads(body)
     except ValueError:
         msg = _("cannot understand JSON")
         raise exception.MalformedRequestBody(reason=msg)
@@ -0,0 +1,83 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import contextlib
+import time
+
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+
+class CutoverTimeline(object):
+    """Steps run to switch the ports of the servers of a migrated plan.
+
+    Every step is recorded with the time it started and ended, so the time
+    each server was cut off can be measured, and stored with the plan in
+    its cutover_timeline.
+    """
+
+    def __init__(self, plan_id):
+        self.plan_id = plan_id
+        # [(server_key, step, start, end)]
+        self.steps = []
+
+    @contextlib.contextmanager
+    def step(self, server_key, step):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.steps.append((server_key, step, start, time.time()))
+
+    def downtime(self):
+        """Return {server_key: seconds from its first to its last step}."""
+        spans = {}
+        for server_key, step, start, end in self.steps:
+            first, last = spans.get(server_key, (start, end))
+            spans[server_key] = (min(first, start), max(last, end))
+        return dict((k, last - first) for k, (first, last) in spans.items())
+
+    def to_dict(self):
+        """Return the steps and downtime of every server, to be stored.
+
+        {server_key: {'downtime': seconds,
+                      'steps': [{'step': step, 'offset': seconds,
+                                 'seconds': seconds}]}}
+        where the offset of a step is from the first step of its server.
+        """
+        downtime = self.downtime()
+        servers = dict((server_key, {'downtime': round(seconds, 3),
+                                     'steps': []})
+                       for server_key, seconds in downtime.items())
+        firsts = {}
+        for server_key, step, start, end in sorted(self.steps,
+                                                   key=lambda s: s[2]):
+            first = firsts.setdefault(server_key, start)
+            servers[server_key]['steps'].append(
+                {'step': step, 'offset': round(start - first, 3),
+                 'seconds': round(end - start, 3)})
+        return servers
+
+    def log(self):
+        for server_key, step, start, end in sorted(self.steps,
+                                                   key=lambda s: s[2]):
+            LOG.debug('Plan %(plan)s cutover of %(server)s: %(step)s took '
+                      '%(time).3fs',
+                      {'plan': self.plan_id, 'server': server_key,
+                       'step': step, 'time': end - start})
+        for server_key, seconds in sorted(self.downtime().items()):
+            LOG.info('Plan %(plan)s cutover of %(server)s took %(time).3fs',
+                     {'plan': self.plan_id, 'server': server_key,
+                      'time': seconds})
@@ -17,10 +17,12 @@
 
 from eventlet import greenthread
 import functools
+import sys
 import time
 
 from oslo_config import cfg
 from oslo_log import log as logging
+import six
 
 from conveyor.clone.resources import common
 from conveyor.conveyoragentclient.v1 import client as birdiegatewayclient
@@ -56,14 +58,35 @@ class BaseDriver(object):
 
     def _add_extra_properties(self, context, resource_map,
                               sys_clone, copy_data, undo_mgr):
+        # servers are prepared concurrently, each waits for its own port
+        # and agent while the others do the same
+        servers = [value for value in resource_map.values()
+                   if value.type == 'OS::Nova::Server']
+        server_undo_mgrs = [utils.UndoManager() for server in servers]
+
+        def _add_extra_properties_for_server(item):
+            server, server_undo_mgr = item
+            try:
+                self.add_extra_properties_for_server(
+                    context, server, resource_map, sys_clone, copy_data,
+                    server_undo_mgr)
+            except Exception:
+                return sys.exc_info()
+
+        errors = utils.concurrent_map(_add_extra_properties_for_server,
+                                      zip(servers, server_undo_mgrs),
+                                      CONF.clone_driver_workers)
+        # the undo steps of every server are registered once they all
+        # finished, so a failure rolls back the servers still running too
+        for server_undo_mgr in server_undo_mgrs:
+            for undo_func in server_undo_mgr.undo_stack:
+                undo_mgr.undo_with(undo_func)
+        for exc_info in errors:
+            if exc_info:
+                six.reraise(*exc_info)
         for key, value in resource_map.items():
             resource_type = value.type
-            if resource_type == 'OS::Nova::Server':
-                self.add_extra_properties_for_server(context, value,
-                                                     resource_map,
-                                                     sys_clone, copy_data,
-                                                     undo_mgr)
-            elif resource_type == 'OS::Cinder::Volume':
+            if resource_type == 'OS::Cinder::Volume':
                 self.add_extra_properties_for_volume(context, key,
                                                      value, resource_map,
                                                      sys_clone, copy_data,
@@ -295,54 +318,74 @@ class BaseDriver(object):
                                       attempts=attempts)
 
     def _wait_for_volume_status(self, context, volume_id, server_id, status):
-        volume = self.volume_api.get(context, volume_id)
-        volume_status = volume['status']
+        self._wait_for_volumes_status(context,
+                                      [(volume_id, server_id, status)])
+
+    def _wait_for_volumes_status(self, context, waits):
+        """Wait until every volume of waits reaches its status.
+
+        waits is a list of (volume_id, server_id, status). The first failure
+        is raised once all the volumes are done.
+        """
+        failures = self._await_volumes_status(context, waits)
+        if failures:
+            raise failures[0][1]
+
+    def _await_volumes_status(self, context, waits):
+        """Poll volumes together until each one reaches its status.
+
+        All the pending volumes are queried in one round every
+        check_interval, so waiting for many volumes takes as long as the
+        slowest of them. Returns a list of (wait, exception) for the volumes
+        which went to error or timed out.
+        """
+        def _poll(wait):
+            try:
+                return self._volume_reached_status(context, *wait)
+            except Exception as e:
+                return e
+
+        pending = list(waits)
+        failures = []
         start = int(time.time())
-        v_shareable = volume['shareable']
-        volume_attachments = volume['attachments']
-        attach_flag = False
-        end_flag = False
-        for vol_att in volume_attachments:
-            if vol_att.get('server_id') == server_id:
-                attach_flag = True
-        if status == 'in-use' and attach_flag:
-            end_flag = True
-        elif status == 'available' and not attach_flag:
-            end_flag = True
-        if v_shareable == 'false':
-            while volume_status != status:
-                time.sleep(CONF.check_interval)
-                volume = self.volume_api.get(context, volume_id)
-                volume_status = volume['status']
-                if volume_status == 'error':
-                    raise exception.VolumeErrorException(id=volume_id)
-                if int(time.time()) - start >= CONF.check_timeout:
+        while True:
+            states = utils.concurrent_map(_poll, pending,
+                                          CONF.clone_driver_workers)
+            still_pending = []
+            for wait, state in zip(pending, states):
+                if isinstance(state, Exception):
+                    failures.append((wait, state))
+                elif not state:
+                    still_pending.append(wait)
+            pending = still_pending
+            if not pending:
+                return failures
+            if int(time.time()) - start >= CONF.check_timeout:
+                for volume_id, server_id, status in pending:
                     message = ('Volume %s failed to reach %s status'
                                '(server %s)'
                                'within the required time (%s s).' %
                                (volume_id, status, server_id,
                                 CONF.check_timeout))
-                    raise exception.TimeoutException(msg=message)
-        else:
-            while not end_flag:
-                attach_flag = False
-                time.sleep(CONF.check_interval)
-                volume = self.volume_api.get(context, volume_id)
-                volume_attachments = volume['attachments']
-                for vol_att in volume_attachments:
-                    if vol_att.get('server_id') == server_id:
-                        attach_flag = True
-                if status == 'in-use' and attach_flag:
-                    end_flag = True
-                elif status == 'available' and not attach_flag:
-                    end_flag = True
-                if int(time.time()) - start >= CONF.check_timeout:
-                    message = ('Volume %s failed to reach %s status'
-                               '(server %s)'
-                               'within the required time (%s s).' %
-                               (volume_id, status, server_id,
-                                CONF.check_timeout))
-                    raise exception.TimeoutException(msg=message)
+                    failures.append(((volume_id, server_id, status),
+                                     exception.TimeoutException(msg=message)))
+                return failures
+            time.sleep(CONF.check_interval)
+
+    def _volume_reached_status(self, context, volume_id, server_id, status):
+        volume = self.volume_api.get(context, volume_id)
+        if volume['shareable'] == 'false':
+            if volume['status'] == 'error' and status != 'error':
+                raise exception.VolumeErrorException(id=volume_id)
+            return volume['status'] == status
+        # a shareable volume keeps its status, only its attachments change
+        attach_flag = False
+        for vol_att in volume['attachments']:
+            if vol_att.get('server_id') == server_id:
+                attach_flag = True
+        if status == 'in-use':
+            return attach_flag
+        return status == 'available' and not attach_flag
 
     def _check_connect_sucess(self, ip_address, times_for_check=3, interval=1):
         '''check ip can ping or not'''
@@ -374,22 +417,28 @@ class BaseDriver(object):
             gw_ip,
             str(CONF.v2vgateway_api_listen_port)
         )
-        disks = set(client.vservices.get_disk_name().get('dev_name'))
-
-        self.compute_api.attach_volume(context,
-                                       gw_id,
-                                       volume_id,
-                                       None)
-        LOG.debug('attach volume %s to gw host %s', volume_id, gw_id)
-        undo_mgr.undo_with(functools.partial(self._detach_volume,
-                                             context,
-                                             gw_id,
-                                             volume_id))
-        self._wait_for_volume_status(context, volume_id, gw_id,
-                                     'in-use')
-        n_disks = set(client.vservices.get_disk_name().get('dev_name'))
 
-        diff_disk = n_disks - disks
+        # servers are prepared concurrently, the new disk of the gw host
+        # is only found if one volume is attached to it at a time
+        @utils.synchronized(gw_id)
+        def _attach_to_gw():
+            disks = set(client.vservices.get_disk_name().get('dev_name'))
+
+            self.compute_api.attach_volume(context,
+                                           gw_id,
+                                           volume_id,
+                                           None)
+            LOG.debug('attach volume %s to gw host %s', volume_id, gw_id)
+            undo_mgr.undo_with(functools.partial(self._detach_volume,
+                                                 context,
+                                                 gw_id,
+                                                 volume_id))
+            self._wait_for_volume_status(context, volume_id, gw_id,
+                                         'in-use')
+            n_disks = set(client.vservices.get_disk_name().get('dev_name'))
+            return n_disks - disks
+
+        diff_disk = _attach_to_gw()
         LOG.debug('begin get info for volume,the vgw ip %s' % gw_ip)
         client = birdiegatewayclient.get_birdiegateway_client(
             gw_ip, str(CONF.v2vgateway_api_listen_port))
@@ -414,14 +463,20 @@ class BaseDriver(object):
         raise NotImplementedError()
 
     def _handle_resources_after_clone(self, context, resources):
+        servers = [res for res in resources.values()
+                   if res['type'] == 'OS::Nova::Server']
+        if servers:
+            self.handle_servers_after_clone(context, servers, resources)
         for key, res in resources.items():
-            if res['type'] == 'OS::Nova::Server':
-                self.handle_server_after_clone(context, res, resources)
-            elif res['type'] == 'OS::Heat::Stack':
+            if res['type'] == 'OS::Heat::Stack':
                 self.handle_stack_after_clone(context, res, resources)
             elif res['type'] == 'OS::Cinder::Volume':
                 self.handle_volume_after_clone(context, res, key, resources)
 
+    def handle_servers_after_clone(self, context, servers, resources):
+        for res in servers:
+            self.handle_server_after_clone(context, res, resources)
+
     def handle_server_after_clone(self, context, resource, resources):
         raise NotImplementedError()
 
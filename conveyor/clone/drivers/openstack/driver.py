@@ -53,38 +53,63 @@ class OpenstackDriver(driver.BaseDriver):
             raise exception.ExportTemplateFailed(id=plan_id, msg=str(e))
 
     def _set_resources_state(self, context, resource_map):
+        states = []
         for key, value in resource_map.items():
             resource_type = value.type
-            resource_id = value.id
-            if resource_type == 'OS::Nova::Server':
-                self.compute_api.reset_state(context, resource_id, 'cloning')
-            elif resource_type == 'OS::Cinder::Volume':
-                self.volume_api.reset_state(context, resource_id, 'cloning')
+            if resource_type in ('OS::Nova::Server', 'OS::Cinder::Volume'):
+                states.append((resource_type, value.id, 'cloning'))
             elif resource_type == 'OS::Heat::Stack':
-                self._set_resources_state_for_stack(context, value)
+                states.extend(self._get_stack_resources_state(
+                    value.properties.get('template'), 'cloning'))
+        self._reset_states(context, states)
 
-    def _set_resources_state_for_stack(self, context, resource):
-        template_str = resource.properties.get('template')
-        template = json.loads(template_str)
+    def _get_stack_resources_state(self, template_str, state=None):
+        """List (type, id, state) of the servers and volumes of a stack.
+
+        Without state, the one recorded in the extra properties of every
+        resource when the plan was exported is used.
+        """
+        states = []
 
-        def _set_state(template):
+        def _get_state(template):
             temp_res = template.get('resources')
             for key, value in temp_res.items():
                 res_type = value.get('type')
+                extra_properties = value.get('extra_properties', {})
                 if res_type == 'OS::Cinder::Volume':
-                    vid = value.get('extra_properties', {}).get('id')
-                    if vid:
-                        self.volume_api.reset_state(context, vid, 'cloning')
+                    res_state = state or extra_properties.get('status')
                 elif res_type == 'OS::Nova::Server':
-                    sid = value.get('extra_properties', {}).get('id')
-                    if sid:
-                        self.compute_api.reset_state(context, sid, 'cloning')
+                    res_state = state or extra_properties.get('vm_state')
                 elif res_type and res_type.startswith('file://'):
                     son_template = value.get('content')
                     son_template = json.loads(son_template)
-                    _set_state(son_template)
+                    _get_state(son_template)
+                    continue
+                else:
+                    continue
+                if extra_properties.get('id'):
+                    states.append((res_type, extra_properties['id'],
+                                   res_state))
+
+        _get_state(json.loads(template_str))
+        return states
+
+    def _reset_states(self, context, states, ignore_errors=False):
+        """Reset the (type, id, state) of servers and volumes at once."""
+        def _reset(res_state):
+            res_type, res_id, state = res_state
+            try:
+                if res_type == 'OS::Nova::Server':
+                    self.compute_api.reset_state(context, res_id, state)
+                else:
+                    self.volume_api.reset_state(context, res_id, state)
+            except Exception as e:
+                if not ignore_errors:
+                    raise
+                LOG.warn(_LW('Reset resource state error, Error=%(e)s'),
+                         {'e': e})
 
-        _set_state(template)
+        utils.concurrent_map(_reset, states, CONF.clone_driver_workers)
 
     def add_extra_properties_for_server(self, context, resource, resource_map,
                                         sys_clone, copy_data,
@@ -212,6 +237,7 @@ class OpenstackDriver(driver.BaseDriver):
                         gw_urls = gw_url.split(':')
                         client = birdiegatewayclient.get_birdiegateway_client(
                             gw_urls[0], gw_urls[1])
+                    disks = []
                     for block_device in block_device_mapping:
                         device_name = block_device.get('device_name')
                         volume_name = block_device.get('volume_id').get(
@@ -233,25 +259,23 @@ class OpenstackDriver(driver.BaseDriver):
                         # need to check the vm disk name
                         if not client:
                             continue
-                        src_dev_format = client.vservices. \
-                            get_disk_format(device_name).get('disk_format')
-                        src_mount_point = client. \
-                            vservices.get_disk_mount_point(device_name). \
-                            get('mount_point')
-                        volume_resource.extra_properties['guest_format'] = \
-                            src_dev_format
-                        volume_resource.extra_properties['mount_point'] = \
-                            src_mount_point
-                        volume_resource.extra_properties['gw_url'] = gw_url
-                        volume_resource.extra_properties['is_deacidized'] = \
-                            True
-                        sys_dev_name = client. \
-                            vservices.get_disk_name(volume_resource.id). \
-                            get('dev_name')
-                        if not sys_dev_name:
-                            sys_dev_name = device_name
-                        volume_resource.extra_properties['sys_dev_name'] = \
-                            sys_dev_name
+                        disks.append((device_name, volume_resource))
+                    if disks:
+                        # one agent request for all the disks of the server
+                        disks_info = client.vservices.get_disks_info(
+                            [(disk_name, disk_resource.id)
+                             for disk_name, disk_resource in disks])
+                        for device_name, volume_resource in disks:
+                            disk_info = disks_info.get(device_name, {})
+                            v_extra_prop = volume_resource.extra_properties
+                            v_extra_prop['guest_format'] = \
+                                disk_info.get('disk_format')
+                            v_extra_prop['mount_point'] = \
+                                disk_info.get('mount_point')
+                            v_extra_prop['gw_url'] = gw_url
+                            v_extra_prop['is_deacidized'] = True
+                            v_extra_prop['sys_dev_name'] = \
+                                disk_info.get('dev_name') or device_name
 
     def _handle_sv_for_svm(self, context, vol_res,
                            gw_id, gw_ip, undo_mgr):
@@ -415,58 +439,49 @@ class OpenstackDriver(driver.BaseDriver):
         self._handle_resources_after_clone(context, resources)
 
     def _reset_resources_state(self, context, resources):
+        states = []
         for key, value in resources.items():
             try:
                 resource_type = value.get('type')
-                resource_id = value.get('extra_properties', {}).get('id')
+                extra_properties = value.get('extra_properties', {})
+                resource_id = extra_properties.get('id')
                 if resource_type == 'OS::Nova::Server':
-                    vm_state = value.get('extra_properties', {}) \
-                        .get('vm_state')
-                    self.compute_api.reset_state(context, resource_id,
-                                                 vm_state)
+                    states.append((resource_type, resource_id,
+                                   extra_properties.get('vm_state')))
                 elif resource_type == 'OS::Cinder::Volume':
-                    volume_state = value.get('extra_properties', {}) \
-                        .get('status')
-                    self.volume_api.reset_state(context, resource_id,
-                                                volume_state)
+                    states.append((resource_type, resource_id,
+                                   extra_properties.get('status')))
                 elif resource_type == 'OS::Heat::Stack':
-                    self._reset_resources_state_for_stack(context, value)
+                    states.extend(self._get_stack_resources_state(
+                        value.get('properties', {}).get('template')))
             except Exception as e:
                 LOG.warn(_LW('Reset resource state error, Error=%(e)s'),
                          {'e': e})
-
-    def _reset_resources_state_for_stack(self, context, stack_res):
-        template_str = stack_res.get('properties', {}).get('template')
-        template = json.loads(template_str)
-
-        def _reset_state(template):
-            temp_res = template.get('resources')
-            for key, value in temp_res.items():
-                res_type = value.get('type')
-                if res_type == 'OS::Cinder::Volume':
-                    vid = value.get('extra_properties', {}).get('id')
-                    v_state = value.get('extra_properties', {}).get('status')
-                    if vid:
-                        self.volume_api.reset_state(context, vid, v_state)
-                elif res_type == 'OS::Nova::Server':
-                    sid = value.get('extra_properties', {}).get('id')
-                    s_state = value.get('extra_properties', {}).get('vm_state')
-                    if sid:
-                        self.compute_api.reset_state(context, sid, s_state)
-                elif res_type and res_type.startswith('file://'):
-                    son_template = value.get('content')
-                    son_template = json.loads(son_template)
-                    _reset_state(son_template)
-
-        _reset_state(template)
+        self._reset_states(context, states, ignore_errors=True)
 
     def handle_server_after_clone(self, context, resource, resources):
-        self._detach_server_temporary_port(context, resource)
-        extra_properties = resource.get('extra_properties', {})
-        vm_state = extra_properties.get('vm_state')
-        if vm_state == 'stopped':
-            self._handle_volume_for_svm_after_clone(context, resource,
-                                                    resources)
+        self.handle_servers_after_clone(context, [resource], resources)
+
+    def handle_servers_after_clone(self, context, servers, resources):
+        """Detach temporary ports and give back volumes held by vgws.
+
+        The volumes of stopped servers are grouped by the vgw they were
+        attached to, and each vgw moves its volumes back in one batch while
+        the other vgws do the same.
+        """
+        utils.concurrent_map(
+            functools.partial(self._detach_server_temporary_port, context),
+            servers, CONF.clone_driver_workers)
+        vgw_moves = {}
+        for server in servers:
+            extra_properties = server.get('extra_properties', {})
+            if extra_properties.get('vm_state') != 'stopped':
+                continue
+            for move in self._get_svm_volume_moves(server, resources):
+                vgw_moves.setdefault(move['vgw_id'], []).append(move)
+        utils.concurrent_map(
+            lambda item: self._move_volumes_from_vgw(context, *item),
+            list(vgw_moves.items()), CONF.clone_driver_workers)
 
     def handle_stack_after_clone(self, context, resource, resources):
         template_str = resource.get('properties', {}).get('template')
@@ -474,97 +489,143 @@ class OpenstackDriver(driver.BaseDriver):
         self._handle_volume_for_stack_after_clone(context, template)
 
     def _handle_volume_for_stack_after_clone(self, context, template):
-        try:
-            resources = template.get('resources')
-            for key, res in resources.items():
-                res_type = res.get('type')
-                if res_type == 'OS::Cinder::Volume':
-                    try:
-                        copy_data = res.get('extra_properties', {}). \
-                            get('copy_data')
-                        if not copy_data:
-                            continue
-                        attachments = res.get('extra_properties', {}) \
-                            .get('attachments')
-                        volume_id = res.get('extra_properties', {}) \
-                            .get('id')
-                        vgw_id = res.get('extra_properties').get('gw_id')
-                        self._detach_volume(context, vgw_id, volume_id)
-                        if attachments:
-                            for attachment in attachments:
-                                server_id = attachment.get('server_id')
-                                device = attachment.get('device')
-                                self.compute_api.attach_volume(context,
-                                                               server_id,
-                                                               volume_id,
-                                                               device)
-                    except Exception as e:
-                        LOG.error(_LE('Error from handle volume of stack after'
-                                      ' clone.'
-                                      'Error=%(e)s'), {'e': e})
-        except Exception as e:
-            LOG.warn('detach the volume %s from vgw %s error,'
-                     'the volume not attached to vgw',
-                     volume_id, vgw_id)
+        def _handle_volume(res):
+            try:
+                copy_data = res.get('extra_properties', {}). \
+                    get('copy_data')
+                if not copy_data:
+                    return
+                attachments = res.get('extra_properties', {}) \
+                    .get('attachments')
+                volume_id = res.get('extra_properties', {}) \
+                    .get('id')
+                vgw_id = res.get('extra_properties').get('gw_id')
+                self._detach_volume(context, vgw_id, volume_id)
+                if attachments:
+                    for attachment in attachments:
+                        server_id = attachment.get('server_id')
+                        device = attachment.get('device')
+                        self.compute_api.attach_volume(context,
+                                                       server_id,
+                                                       volume_id,
+                                                       device)
+            except Exception as e:
+                LOG.error(_LE('Error from handle volume of stack after'
+                              ' clone.'
+                              'Error=%(e)s'), {'e': e})
+
+        volumes = [res for res in template.get('resources', {}).values()
+                   if res.get('type') == 'OS::Cinder::Volume']
+        utils.concurrent_map(_handle_volume, volumes,
+                             CONF.clone_driver_workers)
 
     def _handle_volume_for_svm_after_clone(self, context,
                                            server_resource, resources):
+        moves = self._get_svm_volume_moves(server_resource, resources)
+        if moves:
+            self._move_volumes_from_vgw(context, moves[0]['vgw_id'], moves)
+
+    def _get_svm_volume_moves(self, server_resource, resources):
+        """List the volumes of a stopped server to move back from its vgw."""
         bdms = server_resource['properties'].get('block_device_mapping_v2', [])
         vgw_id = server_resource.get('extra_properties', {}).get('gw_id')
+        server_id = server_resource.get('extra_properties', {}).get('id')
+        moves = []
         for bdm in bdms:
             volume_key = bdm.get('volume_id', {}).get('get_resource')
             boot_index = bdm.get('boot_index')
-            device_name = bdm.get('device_name')
             volume_res = resources.get(volume_key)
+            if not volume_res:
+                continue
+            extra_properties = volume_res.get('extra_properties', {})
+            if not extra_properties.get('is_deacidized'):
+                continue
+            sys_clone = extra_properties.get('sys_clone')
+            copy_data = extra_properties.get('copy_data')
+            if (boot_index in ['0', 0] and not sys_clone) or not copy_data:
+                continue
+            moves.append({'volume_id': extra_properties.get('id'),
+                          'vgw_id': vgw_id,
+                          'vgw_url': extra_properties.get('gw_url'),
+                          'server_id': server_id,
+                          'device': bdm.get('device_name')})
+        return moves
+
+    def _move_volumes_from_vgw(self, context, vgw_id, moves):
+        """Detach volumes from a vgw and attach them back to their servers.
+
+        When the provider cloud can not detach volumes from an active
+        instance, the vgw is stopped and started once for all the volumes.
+        A volume failing a step is logged and left out of the next ones.
+        """
+        def _umount(move):
+            vgw_ip = move['vgw_url'].split(':')[0]
+            client = birdiegatewayclient.get_birdiegateway_client(
+                vgw_ip, str(CONF.v2vgateway_api_listen_port))
+            client.vservices._force_umount_disk("/opt/" + move['volume_id'])
+
+        def _detach(move):
+            self.compute_api.detach_volume(context, vgw_id,
+                                           move['volume_id'])
+
+        def _attach(move):
+            self.compute_api.attach_volume(context, move['server_id'],
+                                           move['volume_id'], move['device'])
+
+        try:
+            moves = self._apply_to_volumes(_umount, moves)
+            if not moves:
+                return
+            # if provider cloud can not detcah volume in active status
+            resouce_common = common.ResourceCommon()
+            if not CONF.is_active_detach_volume:
+                self.compute_api.stop_server(context, vgw_id)
+                resouce_common._await_instance_status(context, vgw_id,
+                                                      'SHUTOFF')
             try:
-                if volume_res.get('extra_properties', {}).get('is_deacidized'):
-                    volume_id = volume_res.get('extra_properties', {}) \
-                        .get('id')
-                    vgw_url = volume_res.get('extra_properties', {}) \
-                        .get('gw_url')
-                    sys_clone = volume_res.get('extra_properties', {}) \
-                        .get('sys_clone')
-                    copy_data = volume_res.get('extra_properties', {}). \
-                        get('copy_data')
-                    if (boot_index in ['0', 0] and not sys_clone) or \
-                            not copy_data:
-                        continue
-                    vgw_ip = vgw_url.split(':')[0]
-                    client = birdiegatewayclient.get_birdiegateway_client(
-                        vgw_ip, str(CONF.v2vgateway_api_listen_port))
-
-                    if boot_index not in ['0', 0] or sys_clone:
-                        client.vservices._force_umount_disk(
-                            "/opt/" + volume_id)
-
-                    # if provider cloud can not detcah volume in active status
-                    if not CONF.is_active_detach_volume:
-                        resouce_common = common.ResourceCommon()
-                        self.compute_api.stop_server(context, vgw_id)
-                        resouce_common._await_instance_status(context,
-                                                              vgw_id,
-                                                              'SHUTOFF')
-                    self.compute_api.detach_volume(context, vgw_id,
-                                                   volume_id)
-                    self._wait_for_volume_status(context, volume_id,
-                                                 vgw_id, 'available')
-                    server_id = server_resource.get('extra_properties', {}) \
-                        .get('id')
-                    self.compute_api.attach_volume(context, server_id,
-                                                   volume_id,
-                                                   device_name)
-                    self._wait_for_volume_status(context, volume_id,
-                                                 server_id, 'in-use')
-
-                    if not CONF.is_active_detach_volume:
-                        self.compute_api.start_server(context, vgw_id)
-                        resouce_common._await_instance_status(context,
-                                                              vgw_id,
-                                                              'ACTIVE')
+                moves = self._apply_to_volumes(_detach, moves)
+                moves = self._drop_failed_volumes(
+                    moves, self._await_volumes_status(
+                        context, [(move['volume_id'], vgw_id, 'available')
+                                  for move in moves]))
+                moves = self._apply_to_volumes(_attach, moves)
+                self._drop_failed_volumes(
+                    moves, self._await_volumes_status(
+                        context, [(move['volume_id'], move['server_id'],
+                                   'in-use') for move in moves]))
+            finally:
+                if not CONF.is_active_detach_volume:
+                    self.compute_api.start_server(context, vgw_id)
+                    resouce_common._await_instance_status(context, vgw_id,
+                                                          'ACTIVE')
+        except Exception as e:
+            LOG.error(_LE('Error from handle volume of vm after'
+                          ' clone.'
+                          'Error=%(e)s'), {'e': e})
+
+    def _apply_to_volumes(self, func, moves):
+        """Call func for every volume move, return the ones that passed."""
+        def _apply(move):
+            try:
+                func(move)
+                return True
             except Exception as e:
-                LOG.error(_LE('Error from handle volume of vm after'
-                              ' clone.'
-                              'Error=%(e)s'), {'e': e})
+                LOG.error(_LE('Error from handle volume %(volume)s of vm '
+                              'after clone. Error=%(e)s'),
+                          {'volume': move['volume_id'], 'e': e})
+                return False
+
+        results = utils.concurrent_map(_apply, moves,
+                                       CONF.clone_driver_workers)
+        return [move for move, ok in zip(moves, results) if ok]
+
+    def _drop_failed_volumes(self, moves, failures):
+        failed = set()
+        for wait, e in failures:
+            LOG.error(_LE('Error from handle volume %(volume)s of vm after '
+                          'clone. Error=%(e)s'), {'volume': wait[0], 'e': e})
+            failed.add(wait[0])
+        return [move for move in moves if move['volume_id'] not in failed]
 
     def _detach_server_temporary_port(self, context, server_res):
         # Read template file of this plan
@@ -0,0 +1,157 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import eventlet
+
+from oslo_log import log as logging
+
+from conveyor.common import loopingcall
+from conveyor.db import api as db_api
+from conveyor import exception
+
+LOG = logging.getLogger(__name__)
+
+CONVERTING = 'converting'
+ACTIVE = 'active'
+
+
+class PlanImageCache(object):
+    """Image lookups shared by all resources of one plan clone.
+
+    The image type configured for every az, glance images and hyper image
+    mappings are queried once per plan, and a native image is converted to
+    a hyper image once however many servers boot from it. Conversions are
+    recorded in the db for the plan, so they can be started ahead of the
+    resources needing them and picked up again by a later clone.
+    """
+
+    def __init__(self, glance_api, his_api, plan_id=None):
+        self.glance_api = glance_api
+        self.his_api = his_api
+        self.plan_id = plan_id
+        # {availability_zone: 'native' or 'hypercontainer'}
+        self._az_image_types = {}
+        # {image_id: image}
+        self._images = {}
+        # {original_image_id: hyper_image_id}
+        self._hyper_images = {}
+        # {original_image_id: hyper_image_id not active yet}
+        self._pending = {}
+        # {original_image_id: GreenThread waiting for the conversion}
+        self._converting = {}
+
+    def load(self, context):
+        """Load the conversions recorded for the plan."""
+        if not self.plan_id:
+            return
+        for conversion in db_api.plan_image_conversion_get(context,
+                                                           self.plan_id):
+            orig_id = conversion['original_image_id']
+            if conversion['status'] == ACTIVE:
+                self._hyper_images[orig_id] = conversion['hyper_image_id']
+            elif conversion['status'] == CONVERTING:
+                self._pending[orig_id] = conversion['hyper_image_id']
+
+    def get_az_image_type(self, context, availability_zone):
+        if availability_zone not in self._az_image_types:
+            config = db_api.conveyor_config_get(context, availability_zone)
+            self._az_image_types[availability_zone] = \
+                config[0]['config_value'] if config else None
+        return self._az_image_types[availability_zone]
+
+    def get_image(self, context, image_id):
+        if image_id not in self._images:
+            self._images[image_id] = self.glance_api.get(context, image_id)
+        return self._images[image_id]
+
+    def get_hyper_image(self, context, image_id):
+        if image_id not in self._hyper_images:
+            self._hyper_images[image_id] = \
+                self.his_api.get_hyper_image(context, image_id)
+        return self._hyper_images[image_id]
+
+    def is_converting(self, image_id):
+        return image_id in self._pending or image_id in self._converting
+
+    def start_conversion(self, context, image_id):
+        """Start converting image to hyper image without waiting for it."""
+        hyper_image_id = self._hyper_images.get(image_id) or \
+            self._pending.get(image_id)
+        if hyper_image_id:
+            return hyper_image_id
+        LOG.debug("Convert image %s to hyper image.", image_id)
+        hyper_image_id = self.his_api.convert_hyper_image(
+            context, original_image_id=image_id)
+        self._pending[image_id] = hyper_image_id
+        if self.plan_id:
+            db_api.plan_image_conversion_create(
+                context, {'plan_id': self.plan_id,
+                          'original_image_id': image_id,
+                          'hyper_image_id': hyper_image_id,
+                          'status': CONVERTING})
+        return hyper_image_id
+
+    def wait_for_hyper_images(self, context, hyper_image_ids):
+        """Wait until the conversions to hyper_image_ids are finished.
+
+        Ids which are not hyper images being converted are ignored.
+        """
+        pending = dict((hyper_image_id, image_id) for image_id, hyper_image_id
+                       in self._pending.items())
+        for hyper_image_id in hyper_image_ids:
+            image_id = pending.get(hyper_image_id)
+            if image_id:
+                self.convert_hyper_image(context, image_id)
+
+    def convert_hyper_image(self, context, image_id):
+        """Convert image to hyper image and wait until it is active.
+
+        A conversion already started for the image is reused, and callers
+        converting the same image at the same time wait for one result.
+        """
+        hyper_image_id = self._hyper_images.get(image_id)
+        if hyper_image_id:
+            return hyper_image_id
+        thread = self._converting.get(image_id)
+        if thread is None:
+            thread = eventlet.spawn(self._wait_for_conversion, context,
+                                    image_id)
+            self._converting[image_id] = thread
+        try:
+            hyper_image_id = thread.wait()
+        finally:
+            self._converting.pop(image_id, None)
+        self._hyper_images[image_id] = hyper_image_id
+        return hyper_image_id
+
+    def _wait_for_conversion(self, context, image_id):
+        hyper_image_id = self.start_conversion(context, image_id)
+
+        def _wait_for_active():
+            """Called at an interval until the hyper image is active."""
+            img = self.glance_api.get(context, hyper_image_id)
+            if img['status'] == 'active':
+                raise loopingcall.LoopingCallDone()
+            if img['status'] in ('killed', 'deleted'):
+                raise exception.ImageNotFound(image_id=hyper_image_id)
+
+        timer = loopingcall.FixedIntervalLoopingCall(_wait_for_active)
+        timer.start(interval=0.5).wait()
+        LOG.info("Hyper image %(hyper)s of image %(image)s is active.",
+                 {'hyper': hyper_image_id, 'image': image_id})
+        self._pending.pop(image_id, None)
+        if self.plan_id:
+            db_api.plan_image_conversion_update(context, self.plan_id,
+                                                image_id, {'status': ACTIVE})
+        return hyper_image_id
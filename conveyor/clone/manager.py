@@ -44,12 +44,13 @@ from conveyor import utils
 from conveyor import volume
 
 from conveyor.brick import base
+from conveyor.clone import cutover
+from conveyor.clone import image_cache
 from conveyor.common import loopingcall
 from conveyor.common import plan_status
 from conveyor.conveyorheat.api import api as heat
 from conveyor.db import api as db_api
 from conveyor.i18n import _LE
-from conveyor.i18n import _LI
 from conveyor.objects import plan as plan_cls
 from conveyor.plan import api as plan_api
 from conveyor.resource import api as res_api
@@ -69,7 +70,11 @@ clone_opts = [
     cfg.StrOpt('clone_driver',
                default='conveyor.clone.drivers.openstack.driver.'
                        'OpenstackDriver',
-               help='Driver to connect cloud')
+               help='Driver to connect cloud'),
+    cfg.IntOpt('cutover_workers',
+               default=4,
+               help='Number of servers whose ports are switched at the same '
+                    'time when a migrated plan is cut over')
 ]
 
 CONF = cfg.CONF
@@ -156,6 +161,8 @@ class CloneManager(manager.Manager):
 
         self._resource_tracker_dict = {}
         self._syncs_in_progress = {}
+        # {plan_id: image_cache.PlanImageCache} of running clones
+        self._image_caches = {}
         self.plan_api = plan_api.PlanAPI()
         self.res_api = res_api.ResourceAPI()
         clone_driver_class = importutils.import_class(CONF.clone_driver)
@@ -216,6 +223,8 @@ class CloneManager(manager.Manager):
         LOG.debug("After pop self define info, resources: %s", src_resources)
         clone_threads = []
         try:
+            physical_ids = self.heat_api.get_physical_ids(context,
+                                                          stack_info['id'])
             for key, r_resource in src_resources.items():
                 res_type = r_resource['type']
                 if res_type in no_action_res_type:
@@ -226,10 +235,7 @@ class CloneManager(manager.Manager):
                     continue
                 # 5.2 resource create successful, get resource ID,
                 # and add to resource
-                heat_resource = self.heat_api.get_resource(context,
-                                                           stack_info['id'],
-                                                           key)
-                r_resource['id'] = heat_resource.physical_resource_id
+                r_resource['id'] = physical_ids[key]
                 src_template['stack_id'] = stack_info['id']
                 # after step need update plan status
                 src_template['plan_id'] = plan_id
@@ -442,6 +448,20 @@ class CloneManager(manager.Manager):
     def clone(self, context, plan_id, az_map, clone_resources,
               clone_links, update_resources, replace_resources,
               sys_clone, data_copy):
+        cache = image_cache.PlanImageCache(self.glance_api, self.his_api,
+                                           plan_id=plan_id)
+        self._image_caches[plan_id] = cache
+        try:
+            cache.load(context)
+            self._clone(context, plan_id, az_map, clone_resources,
+                        clone_links, update_resources, replace_resources,
+                        sys_clone, data_copy)
+        finally:
+            self._image_caches.pop(plan_id, None)
+
+    def _clone(self, context, plan_id, az_map, clone_resources,
+               clone_links, update_resources, replace_resources,
+               sys_clone, data_copy):
         ori_res, ori_dep = self.res_api.build_resources(context,
                                                         clone_resources)
         update_res = ori_res
@@ -612,6 +632,7 @@ class CloneManager(manager.Manager):
         }
         LOG.debug("The template is  %s ", template)
         cl_res = copy.deepcopy(template_resource)
+        self._prepare_plan_images(context, plan_id, stack_reses, az_map)
         stack_id, src_template = self.start_template_clone(context, template)
 
         # save the az relation
@@ -1092,7 +1113,8 @@ class CloneManager(manager.Manager):
         cloned_res = copy.deepcopy(template_dict['resources'])
         self._change_stack_az(cloned_res, des)
         template_dict = self._get_template_contents(context,
-                                                    template_dict, des)
+                                                    template_dict, des,
+                                                    plan_id=plan_id)
         stack_in['properties']['template'] = json.dumps(template_dict)
         res = {stack_name: stack_in}
         heat_template = {
@@ -1108,6 +1130,7 @@ class CloneManager(manager.Manager):
         )
         stack = None
         try:
+            self._wait_for_template_images(context, plan_id, template_dict)
             stack = self.heat_api.create_stack(context, **stack_kwargs)
             db_api.plan_stack_create(context,
                                      {'stack_id': stack.get('stack').get('id'),
@@ -1306,7 +1329,8 @@ class CloneManager(manager.Manager):
             if plan.get('plan_status') == plan_status.ERROR:
                 raise exception.PlanCloneFailed(id=plan_id, msg='')
 
-    def _get_template_contents(self, context, template_dict, des):
+    def _get_template_contents(self, context, template_dict, des,
+                               plan_id=None):
         LOG.debug('the origin template is %s', template_dict)
         resources = template_dict.get('resources')
         for key, res in resources.items():
@@ -1316,7 +1340,7 @@ class CloneManager(manager.Manager):
                 res['properties']['availability_zone'] = des.get(src_az, None)
                 # change image if hypercontainer to native
                 self._change_image_id_for_res(context, template_dict, key,
-                                              is_stack=True)
+                                              is_stack=True, plan_id=plan_id)
             if 'extra_properties' in res:
                 res.pop('extra_properties')
             if 'id' in res:
@@ -1494,6 +1518,7 @@ class CloneManager(manager.Manager):
                             files=son_file_template
                             )
         try:
+            self._wait_for_template_images(context, plan_id, stack_template)
             stack = self.heat_api.create_stack(context, **stack_kwargs)
             db_api.plan_stack_create(context,
                                      {'stack_id': stack.get('stack').get('id'),
@@ -1764,49 +1789,114 @@ class CloneManager(manager.Manager):
                                   server_port_map, port_fp_map,
                                   unassociate_floationgip, resource_map,
                                   stack_id):
-        key_dst_heat_resource = {}
-
-        def _get_resource_id_by_key(key):
-            r = key_dst_heat_resource.get(key)
-            if not r:
-                r = self.heat_api.get_resource(context, stack_id, key)
-                key_dst_heat_resource[key] = r
-            return r.physical_resource_id
-
         # { 'server_0': ('server_0.id, [('port_0','port_0.id']) }
+        # everything the switch needs is resolved before the first port
+        # of any server is detached
+        dst_physical_ids = self.heat_api.get_physical_ids(context, stack_id)
+        port_params_map = {}
+        for server_id, port_list in server_port_map.values():
+            for port_key, port_id in port_list:
+                port_params_map[port_key] = self._get_port_params(
+                    resource_map, port_key)
+        timeline = cutover.CutoverTimeline(id)
+        failed = []
+
+        def _cutover(server_key):
+            if failed:
+                # no server is switched any more after a failure
+                LOG.warn('Skip switching server %s of plan %s.',
+                         server_key, id)
+                return False
+            try:
+                self._cutover_server(context, id, server_key,
+                                     server_port_map[server_key],
+                                     port_fp_map, unassociate_floationgip,
+                                     port_params_map, dst_physical_ids,
+                                     timeline)
+            except Exception:
+                failed.append(server_key)
+                return False
+            return True
 
-        for server_key in list(server_port_map):
-            server_id, port_list = server_port_map[server_key]
-            port_temp_map = {}
-
-            def _associate_fip(fp_id, port_key):
-                port_id = port_temp_map[port_key]
-                self.neutron_api.associate_floating_ip(context, fp_id, port_id)
-
-            def _delete_port(port_id):
-                self.neutron_api.delete_port(context, port_id)
-
-            def _detach_port(server_id, port_id):
-                self.compute_api.interface_detach(context, server_id, port_id)
+        results = utils.concurrent_map(_cutover, list(server_port_map),
+                                       CONF.cutover_workers)
+        timeline.log()
+        self._record_cutover_timeline(context, id, timeline)
+        if not all(results):
+            # the servers still being switched are done by now, so the
+            # plan stack is deleted once, after every server rolled back
+            self.plan_api.update_plan(
+                context, id, {'plan_status': plan_status.ERROR})
+            try:
+                self.heat_api.delete_stack(context, id)
+            except Exception:
+                pass
+            raise exception.PlanMigrateFailed(id=id)
 
-            def _create_attach_port(server_id, port_key, port_param):
-                try:
-                    port_id_new = self.neutron_api.create_port(
-                        context, {'port': port_params})
-                    port_temp_map[port_key] = port_id_new
-                except (neutronclient_exceptions.IpAddressInUseClient,
-                        neutronclient_exceptions.MacAddressInUseClient):
-                    port_id_new = port_temp_map[port_key]
-                self.compute_api.interface_attach(context, server_id,
-                                                  None, port_id_new)
-
-            undo_mgr = utils.UndoManager()
-            dst_server_id = _get_resource_id_by_key(server_key)
+    def _record_cutover_timeline(self, context, id, timeline):
+        try:
+            db_api.plan_update(context, id,
+                               {'cutover_timeline': timeline.to_dict()})
+        except Exception as e:
+            LOG.warning('Record cutover timeline of plan %(id)s error: '
+                        '%(e)s', {'id': id, 'e': e})
+
+    def _get_port_params(self, resource_map, port_key):
+        port_info = resource_map.get(port_key)
+        net_key = port_info.properties.get('network_id') \
+            .get('get_resource')
+        security_group_list = port_info.properties.get('security_groups')
+        security_group_ids = []
+        for security_group in security_group_list:
+            security_group_key = security_group.get('get_resource')
+            security_group_id = resource_map.get(security_group_key).id
+            security_group_ids.append(security_group_id)
+        port_params = {'network_id': resource_map.get(net_key).id,
+                       'security_groups': security_group_ids,
+                       'admin_state_up': True,
+                       'mac_address': port_info.properties.get('mac_address')
+                       }
+        for fix in port_info.properties.get('fixed_ips', []):
+            subnet_key = fix.get('subnet_id', {}).get('get_resource')
+            subnet_id = resource_map.get(subnet_key).id
+            fix_param = {'subnet_id': subnet_id,
+                         'ip_address': fix.get('ip_address')}
+            port_params.setdefault('fixed_ips', []).append(fix_param)
+        return port_params
+
+    def _cutover_server(self, context, id, server_key, server_ports,
+                        port_fp_map, unassociate_floationgip,
+                        port_params_map, dst_physical_ids, timeline):
+        """Move the ports and floating ips of a server to its clone."""
+        server_id, port_list = server_ports
+        port_temp_map = {}
+
+        def _associate_fip(fp_id, port_key):
+            port_id = port_temp_map[port_key]
+            self.neutron_api.associate_floating_ip(context, fp_id, port_id)
+
+        def _delete_port(port_id):
+            self.neutron_api.delete_port(context, port_id)
+
+        def _create_attach_port(server_id, port_key, port_params):
             try:
-                for port_key, port_id in port_list:
-                    # {'port_0':[('floatingip_0','floatingip_0.id', 'fix_ip')]
-                    fp_list = port_fp_map.get(port_key)
-                    port_temp_map[port_key] = port_id
+                port_id_new = self.neutron_api.create_port(
+                    context, {'port': port_params})
+                port_temp_map[port_key] = port_id_new
+            except (neutronclient_exceptions.IpAddressInUseClient,
+                    neutronclient_exceptions.MacAddressInUseClient):
+                port_id_new = port_temp_map[port_key]
+            self.compute_api.interface_attach(context, server_id,
+                                              None, port_id_new)
+
+        undo_mgr = utils.UndoManager()
+        dst_server_id = dst_physical_ids[server_key]
+        try:
+            for port_key, port_id in port_list:
+                # {'port_0':[('floatingip_0','floatingip_0.id', 'fix_ip')]
+                fp_list = port_fp_map.get(port_key)
+                port_temp_map[port_key] = port_id
+                with timeline.step(server_key, 'disassociate_floatingip'):
                     for (fp_key, fp_id, fix_ip) in fp_list:
                         # disassociate floating_ip
                         LOG.debug('Begin disassociate floating_ip %s' % fp_id)
@@ -1816,42 +1906,21 @@ class CloneManager(manager.Manager):
                             undo_mgr.undo_with(functools.partial(
                                 _associate_fip, fp_id, port_key))
 
-                    LOG.debug('Begin detach interface %s form server %s ' %
-                              (port_id, server_id))
-                    # Note interface_detach will delete the port.
+                LOG.debug('Begin detach interface %s form server %s ' %
+                          (port_id, server_id))
+                # Note interface_detach will delete the port.
+                with timeline.step(server_key, 'detach_port'):
                     self.compute_api.interface_detach(context, server_id,
                                                       port_id)
-                    port_info = resource_map.get(port_key)
-                    net_key = port_info.properties.get('network_id') \
-                        .get('get_resource')
-                    security_group_list = port_info.properties.get(
-                        'security_groups')
-                    security_group_ids = []
-                    for security_group in security_group_list:
-                        security_group_key = security_group.get('get_resource')
-                        security_group_id = resource_map.get(
-                            security_group_key).id
-                        security_group_ids.append(security_group_id)
-                    port_params = {'network_id': resource_map.get(net_key).id,
-                                   'security_groups': security_group_ids,
-                                   'admin_state_up': True,
-                                   'mac_address': port_info.properties.get(
-                                       'mac_address')
-                                   }
-                    for fix in port_info.properties.get('fixed_ips', []):
-                        subnet_key = fix.get('subnet_id', {}) \
-                            .get('get_resource')
-                        subnet_id = resource_map.get(subnet_key).id
-                        fix_param = {'subnet_id': subnet_id,
-                                     'ip_address': fix.get('ip_address')}
-                        port_params.setdefault('fixed_ips', []) \
-                            .append(fix_param)
-
-                    # interface_detach rolling back callback
-                    undo_mgr.undo_with(functools.partial(_create_attach_port,
-                                                         server_id, port_key,
-                                                         port_params))
-                    create_port_attempt = 150
+                port_params = port_params_map[port_key]
+
+                # interface_detach rolling back callback
+                undo_mgr.undo_with(functools.partial(_create_attach_port,
+                                                     server_id, port_key,
+                                                     port_params))
+                port_id_new = None
+                create_port_attempt = 150
+                with timeline.step(server_key, 'create_port'):
                     for i in range(create_port_attempt):
                         try:
                             LOG.debug('Begin create new port %s', port_params)
@@ -1867,10 +1936,10 @@ class CloneManager(manager.Manager):
                                 neutronclient_exceptions.MacAddressInUseClient
                                 ):
                             time.sleep(1)
-                            pass
-                    if not port_id_new:
-                        port_id_new = port_id
-                    dst_server_port_id = _get_resource_id_by_key(port_key)
+                if not port_id_new:
+                    port_id_new = port_id
+                dst_server_port_id = dst_physical_ids[port_key]
+                with timeline.step(server_key, 'attach_port'):
                     LOG.debug('begin detach interface %s from server %s'
                               % (dst_server_port_id, dst_server_id))
                     # no rolling back for dst server.
@@ -1881,31 +1950,24 @@ class CloneManager(manager.Manager):
                     # no rolling back for dst server.
                     self.compute_api.interface_attach(context, dst_server_id,
                                                       None, port_id_new)
-                    # no rolling back for dst server.
-                    if fp_list:
-                        LOG.debug('begin associate floating_ip %s to server %s'
-                                  % (fp_id, dst_server_id))
+                # no rolling back for dst server.
+                if fp_list:
+                    with timeline.step(server_key, 'associate_floatingip'):
+                        LOG.debug('begin associate floating_ip %s to server '
+                                  '%s' % (fp_id, dst_server_id))
                         self.neutron_api.associate_floating_ip(
                             context,
                             fp_id,
                             port_id_new,
                             fixed_address=fix_ip)
-                        undo_mgr.undo_with(functools.partial(
-                            self.heat_api.delete_stack, context, id))
-            except Exception as e:
-                LOG.exception("Failed migrate server_id %s due to %s,"
-                              "so rollback it.",
-                              server_id, str(e.msg))
-                LOG.error("START rollback for %s ......", server_id)
-                undo_mgr._rollback()
-                self.plan_api.update_plan(
-                    context, id, {'plan_status': plan_status.ERROR})
-                try:
-                    self.heat_api.delete_stack(context, id)
-                except Exception:
-                    pass
-                LOG.error("END rollback for %s ......", server_id)
-                raise exception.PlanMigrateFailed(id=id)
+        except Exception as e:
+            LOG.exception("Failed migrate server_id %s due to %s,"
+                          "so rollback it.",
+                          server_id, six.text_type(e))
+            LOG.error("START rollback for %s ......", server_id)
+            undo_mgr._rollback()
+            LOG.error("END rollback for %s ......", server_id)
+            raise
 
     def _clear(self, context, resource_map):
         for key, value in resource_map.items():
@@ -2081,7 +2143,7 @@ class CloneManager(manager.Manager):
                     self._change_image_id_for_res(
                         context,
                         volume_template['template'],
-                        k)
+                        k, plan_id=template.get('plan_id'))
                 else:
                     pass
         origin_template = copy.deepcopy(volume_template)
@@ -2106,9 +2168,12 @@ class CloneManager(manager.Manager):
                 LOG.error('Code clone error: %s', e)
                 raise
         # 5. modify input template
+        physical_ids = {}
+        if vol_res_name:
+            physical_ids = self.heat_api.get_physical_ids(context, stack_id,
+                                                          names=vol_res_name)
         for name in vol_res_name:
-            heat_resource = self.heat_api.get_resource(context, stack_id, name)
-            res_id = heat_resource.physical_resource_id
+            res_id = physical_ids[name]
             parameter.get(name)['default'] = res_id
             for r_n, res in stack_resources.items():
                 res_type = res.get('type')
@@ -2144,7 +2209,8 @@ class CloneManager(manager.Manager):
         # 1. define all volume related resources
         stack_template = template['template']
         stack_resources = stack_template.get('resources', {})
-        sys_volumes = self._system_volumes_to_clone(context, stack_template)
+        sys_volumes = self._system_volumes_to_clone(
+            context, stack_template, plan_id=template.get('plan_id'))
         if not sys_volumes:
             return template
 
@@ -2219,10 +2285,10 @@ class CloneManager(manager.Manager):
                 self._afther_resource_created_handler(context,
                                                       origin_template,
                                                       stack_id)
+                physical_ids = self.heat_api.get_physical_ids(context,
+                                                              stack_id)
                 for k, v in sys_volumes.items():
-                    heat_resource = self.heat_api.get_resource(context,
-                                                               stack_id, v)
-                    res_id = heat_resource.physical_resource_id
+                    res_id = physical_ids[v]
                     self.volume_api.set_volume_bootable(context, res_id, True)
             except Exception as e:
                 LOG.error('Live clone error: %s', e)
@@ -2232,11 +2298,12 @@ class CloneManager(manager.Manager):
         # parameters info after new template deployed,
         # resource id has generated,
         # then add this id in source template and deploy source template
+        physical_ids = {}
+        if vol_res_name:
+            physical_ids = self.heat_api.get_physical_ids(
+                context, stack_id, names=vol_res_name)
         for res_name in vol_res_name:
-            heat_resource = self.heat_api.get_resource(context,
-                                                       stack_id,
-                                                       res_name)
-            res_id = heat_resource.physical_resource_id
+            res_id = physical_ids[res_name]
             parameter.get(res_name)['default'] = res_id
 
         # 6. return modify
@@ -2251,6 +2318,9 @@ class CloneManager(manager.Manager):
         plan_id = template.get('plan_id')
         clone_threads = []
         try:
+            if not son_stack_id:
+                physical_ids = self.heat_api.get_physical_ids(context,
+                                                              stack_id)
             for key, r_resource in src_resources.items():
                 res_type = r_resource['type']
                 if res_type in no_action_res_type:
@@ -2267,10 +2337,7 @@ class CloneManager(manager.Manager):
                     r_resource['id'] = heat_resource.physical_resource_id
                     src_template['stack_id'] = son_stack_id
                 else:
-                    heat_resource = self.heat_api.get_resource(context,
-                                                               stack_id,
-                                                               key)
-                    r_resource['id'] = heat_resource.physical_resource_id
+                    r_resource['id'] = physical_ids[key]
                     src_template['stack_id'] = stack_id
                 # after step need update plan status
                 src_template['plan_id'] = plan_id
@@ -2315,7 +2382,8 @@ class CloneManager(manager.Manager):
             self.plan_api.update_plan(context, plan_id, values)
             raise
 
-    def _system_volumes_to_clone(self, context, stack_template):
+    def _system_volumes_to_clone(self, context, stack_template,
+                                 plan_id=None):
         '''list all vm and it need to clone sys volume:{'vmname':'volname'}'''
         resources = stack_template.get('resources', {})
         vm_sys_dict = {}
@@ -2339,7 +2407,8 @@ class CloneManager(manager.Manager):
 
                             self._change_image_id_for_res(context,
                                                           stack_template,
-                                                          vol_name)
+                                                          vol_name,
+                                                          plan_id=plan_id)
 
         return vm_sys_dict
 
@@ -2366,8 +2435,72 @@ class CloneManager(manager.Manager):
                                 volume_id.pop(k)
                                 volume_id['get_param'] = v
 
+    def _prepare_plan_images(self, context, plan_id, stack_reses, az_map):
+        """Start the hyper image conversions the nested stacks will need.
+
+        Native images booted in a hypercontainer az by the resources of
+        nested stacks are converted in the background while the plan stack
+        is created, the nested stacks only wait for them when they are
+        created. Resources of the plan stack convert their images through
+        HIS resources in the stack instead.
+        """
+        cache = self._get_image_cache(plan_id)
+
+        def _images_to_convert(tmpl, get_azs):
+            pams = tmpl.get('parameters', {})
+            for res in tmpl.get('resources', {}).values():
+                res_img = res.get('properties', {}).get('image')
+                if not isinstance(res_img, dict):
+                    continue
+                img_parm = pams.get(res_img.get('get_param'), {})
+                res_img_id = img_parm.get('default')
+                if not res_img_id:
+                    continue
+                src_az, des_az = get_azs(res)
+                src = cache.get_az_image_type(context, src_az)
+                des = cache.get_az_image_type(context, des_az)
+                if src == 'native' and des == 'hypercontainer':
+                    yield res_img_id
+
+        image_ids = set()
+        for stack_res in stack_reses:
+            stack_template = stack_res.properties.get('template')
+            if not stack_template:
+                continue
+
+            def _stack_res_azs(r):
+                src_az = r.get('properties', {}).get('availability_zone')
+                return src_az, az_map.get(src_az)
+
+            image_ids.update(_images_to_convert(json.loads(stack_template),
+                                                _stack_res_azs))
+        for image_id in image_ids:
+            if cache.get_hyper_image(context, image_id):
+                continue
+            try:
+                cache.start_conversion(context, image_id)
+            except Exception as e:
+                # converted when the resource is cloned instead
+                LOG.warn('Start converting image %(image)s failed: %(err)s',
+                         {'image': image_id, 'err': e})
+
+    def _get_image_cache(self, plan_id):
+        """Image cache of the running clone of plan, or a new one."""
+        cache = self._image_caches.get(plan_id)
+        if cache is None:
+            cache = image_cache.PlanImageCache(self.glance_api, self.his_api)
+        return cache
+
+    def _wait_for_template_images(self, context, plan_id, template):
+        """Wait for the hyper images the resources of template boot from."""
+        cache = self._get_image_cache(plan_id)
+        cache.wait_for_hyper_images(
+            context, [p.get('default') for p in
+                      template.get('parameters', {}).values()
+                      if isinstance(p, dict)])
+
     def _change_image_id_for_res(self, context, template, res_name,
-                                 is_stack=False):
+                                 is_stack=False, plan_id=None):
         pams = template.get('parameters', {})
         res = template.get('resources', {}).get(res_name, {})
         res_perporties = res.get('properties', {})
@@ -2377,40 +2510,50 @@ class CloneManager(manager.Manager):
         para_img_name = res_img.get('get_param', None)
         img_parms = pams.get(para_img_name, {})
         res_img_id = img_parms.get('default', None)
+        if not res_img_id:
+            return
         src_availability_zone = \
             res.get('extra_properties', {}).get('availability_zone', None)
         des_az = res_perporties.get('availability_zone', None)
-        src = \
-            db_api.conveyor_config_get(context, src_availability_zone)
-        des = db_api.conveyor_config_get(context, des_az)
-        if not src or not des or not res_img_id:
+        cache = self._get_image_cache(plan_id)
+        src = cache.get_az_image_type(context, src_availability_zone)
+        des = cache.get_az_image_type(context, des_az)
+        if not src or not des:
             return
-        if src[0]['config_value'] == 'hypercontainer' \
-                and des[0]['config_value'] == 'native':
-            img = self.glance_api.get(context, res_img_id)
+        if src == 'hypercontainer' and des == 'native':
+            img = cache.get_image(context, res_img_id)
             org_img = img.get('properties', {}).get('__original_image')
             if img.get('container_format') == 'hypercontainer' and org_img:
                 pams[para_img_name]['default'] = org_img
-        elif src[0]['config_value'] == 'native' \
-                and des[0]['config_value'] == 'hypercontainer':
-            hyper_image = self.his_api.get_hyper_image(context, res_img_id)
+        elif src == 'native' and des == 'hypercontainer':
+            hyper_image = cache.get_hyper_image(context, res_img_id)
             if hyper_image is not None:
                 pams[para_img_name]['default'] = hyper_image
             else:
-                if is_stack:
-                    convert_id = self.wait_convert_his_finish(context,
-                                                              res_img_id,
-                                                              res_name)
+                if is_stack or cache.is_converting(res_img_id):
+                    # the stack of the resource waits for the conversion
+                    # only when it is created
+                    convert_id = cache.start_conversion(context, res_img_id)
                     pams[para_img_name]['default'] = convert_id
-                    return
-                his_res_name = 'his_' + res_name[-1]
-                his_values = {
-                    'type': 'Huawei::FusionSphere::HIS',
-                    'properties': {
-                        'original_image_id': res_img_id,
-                        'name': 'hyper@' + res_img_id
+                    return convert_id
+                # servers sharing the image share one his resource
+                his_res_name = None
+                for res_k, res_v in template.get('resources', {}).items():
+                    if res_v.get('type') == 'Huawei::FusionSphere::HIS' and \
+                            res_v.get('properties', {}).get(
+                                'original_image_id') == res_img_id:
+                        his_res_name = res_k
+                        break
+                if not his_res_name:
+                    his_res_name = 'his_' + res_name[-1]
+                    his_values = {
+                        'type': 'Huawei::FusionSphere::HIS',
+                        'properties': {
+                            'original_image_id': res_img_id,
+                            'name': 'hyper@' + res_img_id
+                        }
                     }
-                }
+                    template['resources'][his_res_name] = his_values
                 for res_k in template.get('resources', {}).keys():
                     img_res = template.get('resources', {}). \
                         get(res_k).get('properties', {}).get('image', None)
@@ -2419,18 +2562,3 @@ class CloneManager(manager.Manager):
                         img_res.pop('get_param')
                         img_res['get_resource'] = his_res_name
                 pams.pop(para_img_name)
-                template['resources'][his_res_name] = his_values
-
-    def wait_convert_his_finish(self, context, orig_id, name):
-        def _wait_for_finish():
-            """Called at an interval until the resources are finished ."""
-            img = self.glance_api.get(context, img_id)
-            if img['status'] == "active":
-                LOG.info(_LI("image in active"))
-                raise loopingcall.LoopingCallDone()
-
-        img_id = self.his_api.convert_hyper_image(context,
-                                                  original_image_id=orig_id)
-        timer = loopingcall.FixedIntervalLoopingCall(_wait_for_finish)
-        timer.start(interval=0.5).wait()
-        return img_id
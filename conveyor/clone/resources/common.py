@@ -146,10 +146,11 @@ class ResourceCommon(object):
         for attempt in range(1, attempts + 1):
             # record all volume data transformer task state
             task_states = []
+            # one request per tick for the states of all the tasks
+            cls = conveyorclient.get_birdiegateway_client(host, port)
+            statuses = cls.vservices.get_data_trans_statuses(task_ids)
             for task_id in task_ids:
-                cls = conveyorclient.get_birdiegateway_client(host, port)
-                status = cls.vservices.get_data_trans_status(task_id)
-                task_status = status.get('body').get('task_state')
+                task_status = statuses.get(task_id).get('task_state')
                 # if one volume data transformer failed, this clone failed
                 if 'DATA_TRANS_FAILED' == task_status:
                     plan_state = state_map.get(task_status)
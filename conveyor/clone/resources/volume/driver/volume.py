@@ -17,28 +17,83 @@
 
 import time
 
+from eventlet import greenthread
 from oslo_config import cfg
 from oslo_log import log as logging
 
 from conveyor.clone.resources import common
+from conveyor.common import loopingcall
 from conveyor.common import plan_status
 from conveyor.conveyoragentclient.v1 import client as birdiegatewayclient
+from conveyor.db import api as db_api
 
 from conveyor import compute
 from conveyor import exception
 from conveyor import utils
 from conveyor import volume
 
+live_clone_opts = [
+    cfg.IntOpt('live_clone_precopy_passes',
+               default=0,
+               help='In live clone, maximum number of passes copying the '
+                    'data of the volumes of running servers while they run, '
+                    'through gateways able to copy incrementally. Each '
+                    'server is then stopped once for a last pass of all its '
+                    'volumes copying the data changed meanwhile. 0 copies '
+                    'the data in a single pass without stopping the '
+                    'servers.'),
+    cfg.IntOpt('live_clone_final_sync_seconds',
+               default=30,
+               help='Pre-copy ends once a pass takes less seconds than '
+                    'this, about the time the servers are stopped for the '
+                    'last pass'),
+    cfg.FloatOpt('live_clone_converge_ratio',
+                 default=0.8,
+                 help='Pre-copy ends once a pass takes more than this ratio '
+                      'of the previous one, as the data then changes too '
+                      'fast for more passes to shorten the last one'),
+    cfg.IntOpt('live_clone_quiesce_wait_seconds',
+               default=1800,
+               help='Seconds the first volume of a running server ready '
+                    'for its last pass waits for the other volumes of the '
+                    'server the plan copies, before the server is stopped '
+                    'without them'),
+]
 
 CONF = cfg.CONF
+CONF.register_opts(live_clone_opts)
+CONF.import_opt('clone_migrate_type', 'conveyor.common.config')
 LOG = logging.getLogger(__name__)
 
 
+class _QuiesceWindow(object):
+    """The stop of a running server for the last pass of its volumes."""
+
+    STOPPING = 'stopping'
+    STOPPED = 'stopped'
+    FAILED = 'failed'
+    STARTED = 'started'
+
+    def __init__(self, server_id, resource_names):
+        self.server_id = server_id
+        # volumes not ready for their last pass yet
+        self.waiting = set(resource_names)
+        # volumes ready for or in their last pass
+        self.copying = set()
+        self.deadline = None
+        # None until the server is being stopped
+        self.state = None
+        self.stopped_at = None
+
+
 class VolumeCloneDriver(object):
 
     def __init__(self):
         self.cinder_api = volume.API()
         self.compute_api = compute.API()
+        # {(plan_id, server_id): _QuiesceWindow}, the volumes of a server
+        # are cloned at the same time
+        self._quiesce_windows = {}
 
     def start_volume_clone(self, context, resource_name, template,
                            trans_data_wait_fun=None,
@@ -150,18 +205,36 @@ class VolumeCloneDriver(object):
 
         # 5. copy data
         try:
-            result = self._copy_volume_data(context, resource_name,
-                                            vgw_ip, vgw_id, template,
-                                            des_dev_name)
-
-            des_gw_ip = result.get('des_ip')
-            des_port = result.get('des_port')
-            task_ids = result.get('copy_tasks')
-            if trans_data_wait_fun:
-                trans_data_wait_fun(context, des_gw_ip,
-                                    des_port, task_ids,
-                                    plan_status.STATE_MAP,
-                                    plan_id)
+            keys = []
+            servers = self._running_source_servers(context, volume_res)
+            if servers:
+                keys = self._join_quiesce_windows(plan_id, resource_name,
+                                                  template, servers)
+                if not self._copies_incrementally(vgw_ip):
+                    LOG.warning('Gateway %(ip)s can not copy incrementally, '
+                                'copy volume %(name)s of running servers in '
+                                'a single pass',
+                                {'ip': vgw_ip, 'name': resource_name})
+                    self._leave_quiesce_windows(context, keys, resource_name)
+                    keys = []
+            if keys:
+                self._live_copy_volume_data(context, resource_name, vgw_ip,
+                                            vgw_id, template, des_dev_name,
+                                            keys, trans_data_wait_fun,
+                                            plan_id)
+            else:
+                result = self._copy_volume_data(context, resource_name,
+                                                vgw_ip, vgw_id, template,
+                                                des_dev_name)
+
+                des_gw_ip = result.get('des_ip')
+                des_port = result.get('des_port')
+                task_ids = result.get('copy_tasks')
+                if trans_data_wait_fun:
+                    trans_data_wait_fun(context, des_gw_ip,
+                                        des_port, task_ids,
+                                        plan_status.STATE_MAP,
+                                        plan_id)
         except Exception as e:
             LOG.error('Volume clone error: copy data failed:%(id)s,%(e)s',
                       {'id': volume_id, 'e': e})
@@ -357,8 +430,291 @@ class VolumeCloneDriver(object):
                                         volume_id, volume_wait_fun,
                                         agent_client)
 
+    def _running_source_servers(self, context, volume_res):
+        """Return the running servers the source volume is attached to.
+
+        In live clone with pre-copy, the data of their volume is copied
+        while they run, and they are stopped only for the last pass.
+        """
+        if CONF.clone_migrate_type != 'live' or \
+                CONF.live_clone_precopy_passes <= 0:
+            return []
+        ext_properties = volume_res.get('extra_properties') or {}
+        src_volume_id = ext_properties.get('id')
+        if not src_volume_id:
+            return []
+        src_volume = self.cinder_api.get(context, src_volume_id)
+        servers = []
+        for attachment in src_volume.get('attachments') or []:
+            server_id = attachment.get('server_id')
+            # the source volume is also attached to its gateway
+            if not server_id or server_id == ext_properties.get('gw_id'):
+                continue
+            server = self.compute_api.get_server(context, server_id)
+            if server.get('OS-EXT-STS:vm_state') == 'active':
+                servers.append(server)
+        return servers
+
+    def _copies_incrementally(self, des_gw_ip):
+        client = birdiegatewayclient.get_birdiegateway_client(
+            des_gw_ip, str(CONF.v2vgateway_api_listen_port))
+        return client.vservices.supports_incremental_clone()
+
+    def _live_copied_volumes(self, template, server):
+        """Return the volumes of a server the plan copies while it runs."""
+        attached = set(v.get('id') for v in
+                       server.get('os-extended-volumes:volumes_attached') or
+                       [])
+        names = []
+        for name, res in template.get('resources', {}).items():
+            ext_properties = res.get('extra_properties') or {}
+            if res.get('type') != 'OS::Cinder::Volume' or \
+                    ext_properties.get('id') not in attached or \
+                    not ext_properties.get('copy_data', True) or \
+                    name.startswith('stack'):
+                continue
+            # the same volumes start_volume_clone copies no data of
+            if self._check_volume_attach_instance(name, template):
+                continue
+            if not ext_properties.get('sys_clone', False) and \
+                    ext_properties.get('boot_index', 1) in ['0', 0]:
+                continue
+            names.append(name)
+        return names
+
+    @utils.synchronized('live-clone-quiesce')
+    def _join_quiesce_windows(self, plan_id, resource_name, template,
+                              servers):
+        """Join the stop windows of the servers of a volume.
+
+        :returns: the keys of the windows in self._quiesce_windows
+        """
+        keys = []
+        for server in servers:
+            key = (plan_id, server['id'])
+            window = self._quiesce_windows.get(key)
+            if window is None:
+                window = _QuiesceWindow(
+                    server['id'], self._live_copied_volumes(template, server))
+                self._quiesce_windows[key] = window
+            if window.state is None:
+                window.waiting.add(resource_name)
+            keys.append(key)
+        return keys
+
+    @utils.synchronized('live-clone-quiesce')
+    def _ready_for_final_pass(self, keys, resource_name):
+        """Mark a volume ready for its last pass.
+
+        A window whose servers were already started again, as its other
+        volumes did not wait for a late one, is replaced by a new one.
+        """
+        for key in keys:
+            window = self._quiesce_windows.get(key)
+            if window is None or window.state == _QuiesceWindow.STARTED:
+                window = _QuiesceWindow(
+                    key[1], window.waiting if window else [])
+                self._quiesce_windows[key] = window
+            window.waiting.discard(resource_name)
+            window.copying.add(resource_name)
+            if window.deadline is None:
+                window.deadline = \
+                    time.time() + CONF.live_clone_quiesce_wait_seconds
+
+    @utils.synchronized('live-clone-quiesce')
+    def _claim_quiesce_windows(self, keys):
+        """Return the windows to stop now, or None once all are stopped.
+
+        A window is stopped once all its volumes are ready, or once its
+        first ready volume waited live_clone_quiesce_wait_seconds.
+        """
+        windows = [self._quiesce_windows[key] for key in keys]
+        for window in windows:
+            if window.state == _QuiesceWindow.FAILED:
+                raise exception.V2vException(
+                    message='stop of server %s failed' % window.server_id)
+        if all(window.state == _QuiesceWindow.STOPPED for window in windows):
+            return None
+        claimed = [window for window in windows
+                   if window.state is None and
+                   (not window.waiting or time.time() >= window.deadline)]
+        for window in claimed:
+            window.state = _QuiesceWindow.STOPPING
+        return claimed
+
+    def _stop_quiesce_windows(self, context, keys, resource_name):
+        """Wait until the servers of all the windows of a volume stopped.
+
+        The last volume of a window ready for its last pass stops its
+        server, the others wait for it.
+        """
+        self._ready_for_final_pass(keys, resource_name)
+        resource_common = common.ResourceCommon()
+        while True:
+            claimed = self._claim_quiesce_windows(keys)
+            if claimed is None:
+                return
+            for window in claimed:
+                # the downtime starts with the stop request
+                window.stopped_at = time.time()
+                try:
+                    self.compute_api.stop_server(context, window.server_id)
+                    resource_common._await_instance_status(
+                        context, window.server_id, 'SHUTOFF')
+                except Exception:
+                    window.state = _QuiesceWindow.FAILED
+                    raise
+                window.state = _QuiesceWindow.STOPPED
+            if not claimed:
+                greenthread.sleep(
+                    CONF.data_transformer_state_retries_interval)
+
+    def _leave_quiesce_windows(self, context, keys, resource_name):
+        """Remove a volume from its windows, done or failed.
+
+        The last volume of a stopped window starts its server again.
+        """
+        @utils.synchronized('live-clone-quiesce')
+        def _leave():
+            to_start = []
+            for key in keys:
+                window = self._quiesce_windows.get(key)
+                if window is None:
+                    continue
+                window.waiting.discard(resource_name)
+                window.copying.discard(resource_name)
+                if window.copying:
+                    continue
+                if window.state in (_QuiesceWindow.STOPPED,
+                                    _QuiesceWindow.FAILED):
+                    to_start.append(window.server_id)
+                    window.state = _QuiesceWindow.STARTED
+                if not window.waiting and window.state in (
+                        None, _QuiesceWindow.STARTED):
+                    del self._quiesce_windows[key]
+            return to_start
+
+        resource_common = common.ResourceCommon()
+        for server_id in _leave():
+            try:
+                self.compute_api.start_server(context, server_id)
+                resource_common._await_instance_status(context, server_id,
+                                                       'ACTIVE')
+            except Exception as e:
+                LOG.error('Live clone restart server %(id)s error: %(e)s',
+                          {'id': server_id, 'e': e})
+
+    def _live_copy_volume_data(self, context, resource_name, des_gw_ip,
+                               vgw_id, template, dev_name, keys,
+                               trans_data_wait_fun=None, plan_id=None):
+        """Copy the data of a volume of running servers in phases.
+
+        The data is first copied while the servers run, pass after pass as
+        long as each pass is notably shorter than the previous one, that
+        is, as long as the data changes slower than it is copied. Each
+        server is then stopped once for the last pass of all its volumes
+        the plan copies, copying what changed meanwhile, so it is stopped
+        for a time depending on its change rate rather than on the size of
+        its volumes. The time of each phase is recorded in the
+        clone_phases of the plan.
+
+        :param keys: the stop windows of the servers, as joined by
+                     _join_quiesce_windows
+        """
+        phases = []
+        previous = None
+        try:
+            for i in range(CONF.live_clone_precopy_passes):
+                start = time.time()
+                result = self._copy_volume_data(context, resource_name,
+                                                des_gw_ip, vgw_id, template,
+                                                dev_name, incremental=i > 0)
+                if result.get('des_ip'):
+                    self._wait_for_copy_pass(result['des_ip'],
+                                             result['des_port'],
+                                             result['copy_tasks'])
+                seconds = time.time() - start
+                phase = {'phase': 'precopy', 'pass': i + 1,
+                         'seconds': round(seconds, 3)}
+                if previous:
+                    phase['duration_ratio'] = \
+                        round(float(seconds) / previous, 3)
+                phases.append(phase)
+                LOG.debug('Live clone %(name)s pre-copy: %(phase)s',
+                          {'name': resource_name, 'phase': phase})
+                if seconds <= CONF.live_clone_final_sync_seconds or \
+                        (previous and
+                         seconds > previous * CONF.live_clone_converge_ratio):
+                    break
+                previous = seconds
+
+            # copy the final delta while the servers are stopped
+            self._stop_quiesce_windows(context, keys, resource_name)
+            start = time.time()
+            result = self._copy_volume_data(context, resource_name,
+                                            des_gw_ip, vgw_id, template,
+                                            dev_name,
+                                            incremental=bool(phases))
+            if trans_data_wait_fun:
+                trans_data_wait_fun(context, result.get('des_ip'),
+                                    result.get('des_port'),
+                                    result.get('copy_tasks'),
+                                    plan_status.STATE_MAP, plan_id)
+            elif result.get('des_ip'):
+                self._wait_for_copy_pass(result['des_ip'],
+                                         result['des_port'],
+                                         result['copy_tasks'])
+            end = time.time()
+            stopped_at = min(self._quiesce_windows[key].stopped_at
+                             for key in keys)
+        finally:
+            self._leave_quiesce_windows(context, keys, resource_name)
+        phases.append({'phase': 'final', 'seconds': round(end - start, 3),
+                       'downtime': round(end - stopped_at, 3)})
+        LOG.debug('Live clone %(name)s phases: %(phases)s',
+                  {'name': resource_name, 'phases': phases})
+        self._record_clone_phases(context, plan_id, resource_name, phases)
+
+    def _wait_for_copy_pass(self, des_gw_ip, des_port, task_ids):
+        client = birdiegatewayclient.get_birdiegateway_client(des_gw_ip,
+                                                              des_port)
+
+        def _check_copy_tasks():
+            statuses = client.vservices.get_data_trans_statuses(task_ids)
+            states = [(statuses.get(task_id) or {}).get('task_state')
+                      for task_id in task_ids]
+            if 'DATA_TRANS_FAILED' in states:
+                raise exception.V2vException(
+                    message='pre-copy of tasks %s failed' % task_ids)
+            if 'DATA_TRANSFORMING' not in states:
+                raise loopingcall.LoopingCallDone()
+
+        timer = loopingcall.FixedIntervalLoopingCall(_check_copy_tasks)
+        timer.start(
+            interval=CONF.data_transformer_state_retries_interval).wait()
+
+    def _record_clone_phases(self, context, plan_id, resource_name, phases):
+        if not plan_id:
+            return
+
+        # the volumes of a plan are cloned at the same time
+        @utils.synchronized('clone-phases-' + plan_id)
+        def _record():
+            plan = db_api.plan_get(context, plan_id)
+            clone_phases = dict(plan.get('clone_phases') or {})
+            clone_phases[resource_name] = phases
+            db_api.plan_update(context, plan_id,
+                               {'clone_phases': clone_phases})
+
+        try:
+            _record()
+        except Exception as e:
+            LOG.warning('Record clone phases of plan %(id)s error: %(e)s',
+                        {'id': plan_id, 'e': e})
+
     def _copy_volume_data(self, context, resource_name,
-                          des_gw_ip, vgw_id, template, dev_name):
+                          des_gw_ip, vgw_id, template, dev_name,
+                          incremental=False):
 
         LOG.debug('Clone volume driver copy data start for %s', resource_name)
         resources = template.get('resources')
@@ -433,7 +789,8 @@ class VolumeCloneDriver(object):
                                         src_gw_url,
                                         des_gw_url,
                                         trans_protocol=data_trans_protocol,
-                                        trans_port=trans_port)
+                                        trans_port=trans_port,
+                                        incremental=incremental)
         task_id = clone_rsp.get('body').get('task_id')
         task_ids.append(task_id)
 
@@ -58,9 +58,11 @@ import argparse
 import os
 import six
 import sys
+import time
 
 from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_utils import importutils
 
 from conveyor import config
 from conveyor import context
@@ -242,9 +244,76 @@ class GetLogCommands(object):
             print(_('No fs_gateway entries in syslog!'))
 
 
+# modules imported by the services when they start
+_STARTUP_MODULES = [
+    'conveyor.clone.manager',
+    'conveyor.plan.manager',
+    'conveyor.resource.manager',
+    'conveyor.conveyorheat.engine.service',
+]
+
+
+class ProfileCommands(object):
+    """Profile the services."""
+
+    @args('--top', metavar='<number>',
+          help='Number of slowest modules to print(default: 20)')
+    @args('--all_plugins', action='store_true', default=False,
+          help='Load all the heat plugins, as if none was loaded lazily')
+    def startup(self, top=20, all_plugins=False):
+        """Print the time taken to import each module at start up.
+
+        The time of a module does not include the modules it imports.
+        """
+        timings = {}
+        nested = []
+        builtins = six.moves.builtins
+        original_import = builtins.__import__
+
+        def _timed_import(name, *args, **kwargs):
+            if name in sys.modules:
+                return original_import(name, *args, **kwargs)
+            nested.append(0.0)
+            start = time.time()
+            try:
+                return original_import(name, *args, **kwargs)
+            finally:
+                elapsed = time.time() - start
+                own = elapsed - nested.pop()
+                timings[name] = timings.get(name, 0.0) + own
+                if nested:
+                    nested[-1] += elapsed
+
+        phases = []
+        builtins.__import__ = _timed_import
+        try:
+            start = time.time()
+            for module_name in _STARTUP_MODULES:
+                importutils.import_module(module_name)
+            phases.append((_('Import services'), time.time() - start))
+
+            from conveyor.conveyorheat.engine import resources
+            start = time.time()
+            env = resources.global_env()
+            if all_plugins:
+                env.get_types()
+            phases.append((_('Load heat environment'), time.time() - start))
+        finally:
+            builtins.__import__ = original_import
+
+        slowest = sorted(six.iteritems(timings), key=lambda t: t[1],
+                         reverse=True)
+        for name, elapsed in slowest[:int(top)]:
+            print('%8.3fs  %s' % (elapsed, name))
+        print(_('%d modules imported') % len(timings))
+        for phase, elapsed in phases:
+            print('%8.3fs  %s' % (elapsed, phase))
+
+
 CATEGORIES = {
     'db': DbCommands,
     'logs': GetLogCommands,
+    'profile': ProfileCommands,
     'shell': ShellCommands,
 }
 
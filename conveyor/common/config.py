@@ -236,7 +236,16 @@ global_opts = [
                help='Interval, in seconds, between running periodic tasks'),
     cfg.IntOpt('heat_nested_depth',
                default=5,
-               help='conveyor support the number of heat nesting')
+               help='conveyor support the number of heat nesting'),
+    cfg.BoolOpt('stack_bulk_extract',
+                default=True,
+                help='Extract a stack from one nested resource list of '
+                     'heat, with one extract call per resource type, '
+                     'instead of walking nested stacks one by one'),
+    cfg.IntOpt('plan_stack_delete_workers',
+               default=4,
+               help='Number of stacks of a plan deleted at the same time, '
+                    'among those no other stack of the plan refers to')
 ]
 birdie_opts = [
     cfg.IntOpt('v2vgateway_api_listen_port',
@@ -248,6 +257,10 @@ birdie_opts = [
     cfg.IntOpt('check_interval',
                default=1,
                help='Host port for v2v gateway api'),
+    cfg.IntOpt('clone_driver_workers',
+               default=8,
+               help='Number of volumes and servers the clone driver resets, '
+                    'detaches or attaches at the same time'),
     ]
 
 keystone_auth_opts = [
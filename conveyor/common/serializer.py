@@ -0,0 +1,138 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""JSON serialization of db columns and api bodies.
+
+loads() uses the JSON library chosen by the json_backend option, an
+accelerated one when it is installed, and otherwise
+oslo_serialization.jsonutils, so large plan and template documents are
+not all decoded by the slower stdlib parser. dumps() always encodes with
+jsonutils: the accelerated encoders do not encode the same way, or are
+slower once given its default hook (see tools/benchmark_json.py).
+"""
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_serialization import jsonutils
+from oslo_utils import importutils
+
+serializer_opts = [
+    cfg.StrOpt('json_backend',
+               default='auto',
+               choices=['auto', 'ujson', 'simplejson', 'stdlib'],
+               help='JSON library used to serialize db columns and api '
+                    'bodies. auto picks the first installed of ujson and '
+                    'simplejson, and the standard library otherwise.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(serializer_opts)
+
+LOG = logging.getLogger(__name__)
+
+AUTO_BACKENDS = ('ujson', 'simplejson')
+
+
+class _Backend(object):
+    name = 'stdlib'
+
+    def dumps(self, value):
+        return jsonutils.dumps(value)
+
+    def loads(self, s):
+        return jsonutils.loads(s)
+
+
+class _UJsonBackend(_Backend):
+    """Decode with ujson.
+
+    Encoding stays with jsonutils, as ujson turns datetimes into
+    timestamps instead of strings and rounds floats. Before ujson 2.0
+    floats are also rounded when decoded unless precise_float is given;
+    later versions decode them exactly and do not accept it.
+    """
+    name = 'ujson'
+
+    def __init__(self, module):
+        self._module = module
+        try:
+            module.loads('0.1', precise_float=True)
+            self._kwargs = {'precise_float': True}
+        except TypeError:
+            self._kwargs = {}
+
+    def loads(self, s):
+        return self._module.loads(s, **self._kwargs)
+
+
+class _SimpleJsonBackend(_Backend):
+    """Decode with simplejson.
+
+    Encoding stays with jsonutils, which is faster than simplejson with
+    jsonutils.to_primitive as its default hook.
+    """
+    name = 'simplejson'
+
+    def __init__(self, module):
+        self._module = module
+
+    def loads(self, s):
+        return self._module.loads(s)
+
+
+_BACKEND_CLASSES = {'ujson': _UJsonBackend,
+                    'simplejson': _SimpleJsonBackend}
+
+_backend = None
+
+
+def _load_backend(name):
+    module = importutils.try_import(name)
+    if module is None:
+        return None
+    return _BACKEND_CLASSES[name](module)
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        name = CONF.json_backend
+        backend = None
+        if name == 'auto':
+            for candidate in AUTO_BACKENDS:
+                backend = _load_backend(candidate)
+                if backend:
+                    break
+        elif name != 'stdlib':
+            backend = _load_backend(name)
+            if backend is None:
+                LOG.warning("JSON backend %s is not installed, use the "
+                            "standard library.", name)
+        _backend = backend or _Backend()
+        LOG.debug("Use JSON backend %s.", _backend.name)
+    return _backend
+
+
+def reset_backend():
+    """Pick the backend again on next use, e.g. once the config changed."""
+    global _backend
+    _backend = None
+
+
+def dumps(value):
+    return get_backend().dumps(value)
+
+
+def loads(s):
+    return get_backend().loads(s)
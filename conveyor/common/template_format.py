@@ -13,8 +13,10 @@
 
 import json
 import yaml
+import zlib
 
 from oslo_config import cfg
+import six
 
 from conveyor import exception
 from conveyor.i18n import _
@@ -22,7 +24,10 @@ from conveyor.i18n import _
 template_opts = [
     cfg.IntOpt('max_template_size',
                default=524288,
-               help='Maximum raw byte size of any template.')
+               help='Maximum raw byte size of any template.'),
+    cfg.IntOpt('template_stream_chunk_size',
+               default=65536,
+               help='Byte size of the chunks a template is streamed in.'),
 ]
 CONF = cfg.CONF
 CONF.register_opts(template_opts)
@@ -86,3 +91,64 @@ def parse(tmpl_str):
             or 'heat_template_version' in tpl):
         raise ValueError(_("Template format version not found."))
     return tpl
+
+
+def _yaml_dump(data):
+    return yaml.dump(data, Dumper=yaml_dumper, default_flow_style=False)
+
+
+def _iter_yaml(tpl):
+    for key, value in six.iteritems(tpl):
+        if not isinstance(value, dict) or not value:
+            yield _yaml_dump({key: value})
+            continue
+        # dump a section item by item, the first one along with the
+        # section key, the others indented under it
+        for i, (name, item) in enumerate(six.iteritems(value)):
+            if i == 0:
+                yield _yaml_dump({key: {name: item}})
+            else:
+                yield ''.join('  ' + line for line in
+                              _yaml_dump({name: item}).splitlines(True))
+
+
+def _chunked(pieces, chunk_size):
+    buf = []
+    size = 0
+    for piece in pieces:
+        if isinstance(piece, six.text_type):
+            piece = piece.encode('utf-8')
+        buf.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield b''.join(buf)
+            buf = []
+            size = 0
+    if buf:
+        yield b''.join(buf)
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_dump(tpl, fmt='json', gzip=False, chunk_size=None):
+    """Serialize a template incrementally.
+
+    Return an iterator over byte chunks of the template dumped as JSON or
+    YAML, gzip compressed if asked, so a template of any size is written
+    out without building the whole document in memory.
+    """
+    if fmt == 'yaml':
+        pieces = _iter_yaml(tpl)
+    elif fmt == 'json':
+        pieces = json.JSONEncoder().iterencode(tpl)
+    else:
+        raise ValueError(_('Unsupported template format %s.') % fmt)
+    chunks = _chunked(pieces, chunk_size or CONF.template_stream_chunk_size)
+    return _gzipped(chunks) if gzip else chunks
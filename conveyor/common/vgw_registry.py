@@ -0,0 +1,259 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Registry of the v2v gateways data is copied through.
+
+Gateway agents register themselves, and then heartbeat, through the
+configuration api. The gateways are stored in the database with their
+availability zone, last heartbeat, copy load and free disk slots, and every
+service keeps them in memory, indexed by availability zone and load, so the
+least loaded healthy gateway of a zone is picked without scanning them.
+Gateways listed in the vgw_info option are also served, and are always
+considered healthy as they do not heartbeat.
+"""
+
+import ast
+import collections
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_utils import timeutils
+
+from conveyor import context
+from conveyor.db import api as db_api
+from conveyor import utils
+
+vgw_registry_opts = [
+    cfg.IntOpt('vgw_heartbeat_timeout',
+               default=20,
+               help='Seconds without heartbeat after which a registered vgw '
+                    'is not selected any more, until its next heartbeat'),
+    cfg.IntOpt('vgw_registry_sync_interval',
+               default=10,
+               help='Seconds after which a service reloads the vgw registry '
+                    'from the database, to see the heartbeats received by '
+                    'other services'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(vgw_registry_opts)
+CONF.import_opt('vgw_info', 'conveyor.common.config')
+
+LOG = logging.getLogger(__name__)
+
+
+def parse_vgw_info(vgw_info):
+    """Parse the vgw_info option into {az: {vgw_id: vgw_ip}}."""
+    if not vgw_info:
+        return {}
+    try:
+        return ast.literal_eval('{' + vgw_info + '}')
+    except (SyntaxError, ValueError) as e:
+        LOG.error('read the vgw info error: %s', e)
+        return {}
+
+
+class _Gateway(object):
+
+    def __init__(self, vgw_id, vgw_ip, availability_zone, copy_load=0,
+                 free_disk_slots=None, heartbeat_at=None):
+        self.vgw_id = vgw_id
+        self.vgw_ip = vgw_ip
+        self.availability_zone = availability_zone
+        self.copy_load = copy_load or 0
+        self.free_disk_slots = free_disk_slots
+        # None for the gateways of vgw_info, which do not heartbeat
+        self.heartbeat_at = heartbeat_at
+
+    @classmethod
+    def from_db(cls, vgw):
+        return cls(vgw['vgw_id'], vgw['vgw_ip'], vgw['availability_zone'],
+                   copy_load=vgw['copy_load'],
+                   free_disk_slots=vgw['free_disk_slots'],
+                   heartbeat_at=vgw['heartbeat_at'])
+
+    def is_healthy(self):
+        if self.free_disk_slots is not None and self.free_disk_slots <= 0:
+            return False
+        return self.heartbeat_at is None or not timeutils.is_older_than(
+            self.heartbeat_at, CONF.vgw_heartbeat_timeout)
+
+
+class _LoadBuckets(object):
+    """The healthy gateways of one zone, grouped by copy load.
+
+    The least loaded gateway is the first of the lowest non empty bucket.
+    As a selection moves a gateway one bucket up, finding it again is
+    constant time, and gateways of equal load are picked in turn.
+    """
+
+    def __init__(self):
+        # {copy_load: {vgw_id: None}}, in the order gateways joined
+        self._buckets = {}
+        self._loads = {}
+        self._min_load = 0
+
+    def __len__(self):
+        return len(self._loads)
+
+    def add(self, vgw_id, load):
+        self.discard(vgw_id)
+        self._buckets.setdefault(load, collections.OrderedDict())[vgw_id] = \
+            None
+        self._loads[vgw_id] = load
+        if len(self._loads) == 1 or load < self._min_load:
+            self._min_load = load
+
+    def discard(self, vgw_id):
+        load = self._loads.pop(vgw_id, None)
+        if load is not None:
+            bucket = self._buckets[load]
+            del bucket[vgw_id]
+            if not bucket:
+                del self._buckets[load]
+
+    def first(self):
+        if not self._loads:
+            return None
+        while self._min_load not in self._buckets:
+            self._min_load += 1
+        return next(iter(self._buckets[self._min_load]))
+
+
+class VgwRegistry(object):
+
+    def __init__(self):
+        # {vgw_id: _Gateway}
+        self._gateways = {}
+        # {availability_zone: _LoadBuckets}
+        self._by_az = collections.defaultdict(_LoadBuckets)
+        self._loaded_at = None
+
+    def _index(self, gateway):
+        buckets = self._by_az[gateway.availability_zone]
+        if gateway.is_healthy():
+            buckets.add(gateway.vgw_id, gateway.copy_load)
+        else:
+            buckets.discard(gateway.vgw_id)
+
+    def _load(self):
+        gateways = {}
+        for az, vgws in parse_vgw_info(CONF.vgw_info).items():
+            for vgw_id, vgw_ip in vgws.items():
+                gateway = _Gateway(vgw_id, vgw_ip, az)
+                previous = self._gateways.get(vgw_id)
+                if previous:
+                    # the load of static gateways is only known here
+                    gateway.copy_load = previous.copy_load
+                gateways[vgw_id] = gateway
+        for vgw in db_api.vgw_get_all(context.get_admin_context()):
+            gateways[vgw['vgw_id']] = _Gateway.from_db(vgw)
+
+        self._gateways = gateways
+        self._by_az = collections.defaultdict(_LoadBuckets)
+        for gateway in gateways.values():
+            self._index(gateway)
+        self._loaded_at = time.time()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or \
+                time.time() - self._loaded_at >= \
+                CONF.vgw_registry_sync_interval:
+            self._load()
+
+    @utils.synchronized('vgw-registry')
+    def refresh(self):
+        """Reload the registry and report the unhealthy gateways."""
+        self._load()
+        for gateway in self._gateways.values():
+            if not gateway.is_healthy():
+                LOG.debug('The vgw %s is not healthy: last heartbeat %s, '
+                          'free disk slots %s', gateway.vgw_id,
+                          gateway.heartbeat_at, gateway.free_disk_slots)
+
+    @utils.synchronized('vgw-registry')
+    def select(self, availability_zone):
+        """Pick the least loaded healthy gateway of a zone for a copy.
+
+        The copy is counted in the load and free disk slots this service
+        knows of the gateway, not in the database: nothing would take it
+        back when the copy finishes, so the counts are replaced by the
+        ones of the next heartbeat, or of the next reload of the registry.
+
+        :returns: (vgw_id, vgw_ip), or (None, None) if the zone has no
+                  healthy gateway
+        """
+        self._ensure_loaded()
+        buckets = self._by_az.get(availability_zone)
+        while buckets:
+            gateway = self._gateways[buckets.first()]
+            if not gateway.is_healthy():
+                buckets.discard(gateway.vgw_id)
+                continue
+            gateway.copy_load += 1
+            if gateway.free_disk_slots is not None:
+                gateway.free_disk_slots -= 1
+            self._index(gateway)
+            return gateway.vgw_id, gateway.vgw_ip
+        return None, None
+
+    @utils.synchronized('vgw-registry')
+    def heartbeat(self, availability_zone, vgw_id, info):
+        """Register a gateway, or record that it is still alive.
+
+        :param info: the ip of the gateway, or a dict with its ip and
+                     optionally its copy_load and free_disk_slots
+        """
+        if not isinstance(info, dict):
+            info = {'ip': info}
+        values = {'availability_zone': availability_zone,
+                  'heartbeat_at': timeutils.utcnow()}
+        if info.get('ip'):
+            values['vgw_ip'] = info['ip']
+        for key in ('copy_load', 'free_disk_slots'):
+            if info.get(key) is not None:
+                values[key] = int(info[key])
+        vgw = db_api.vgw_create_or_update(context.get_admin_context(),
+                                          vgw_id, values)
+
+        previous = self._gateways.get(vgw_id)
+        if previous:
+            self._by_az[previous.availability_zone].discard(vgw_id)
+        gateway = _Gateway.from_db(vgw)
+        self._gateways[vgw_id] = gateway
+        self._index(gateway)
+
+    @utils.synchronized('vgw-registry')
+    def remove(self, vgw_id):
+        db_api.vgw_delete(context.get_admin_context(), vgw_id)
+        gateway = self._gateways.pop(vgw_id, None)
+        if gateway:
+            self._by_az[gateway.availability_zone].discard(vgw_id)
+
+    @utils.synchronized('vgw-registry')
+    def get_vgw_ids(self):
+        """Return the ids of all the known gateways, healthy or not."""
+        self._ensure_loaded()
+        return set(self._gateways)
+
+
+_registry = None
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        _registry = VgwRegistry()
+    return _registry
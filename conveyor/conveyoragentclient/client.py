@@ -21,6 +21,7 @@ OpenStack Client interface. Handles the REST calls and responses.
 from __future__ import print_function
 
 import requests
+from requests import adapters
 
 from oslo_log import log as logging
 from oslo_utils import importutils as utils
@@ -61,7 +62,7 @@ class HTTPClient(object):
                  proxy_tenant_id=None, proxy_token=None, region_name=None,
                  service_name=None, retries=None,
                  http_log_debug=False, cacert=None,
-                 auth_system=None, auth_plugin=None):
+                 auth_system=None, auth_plugin=None, session=None):
         self.user = user
         self.password = password
         self.projectid = projectid
@@ -90,9 +91,26 @@ class HTTPClient(object):
 
         self.auth_system = auth_system
         self.auth_plugin = auth_plugin
+        # a requests.Session keeps connections to the gateway alive between
+        # calls, without it every call opens a new connection
+        self.session = session
+        self.request_count = 0
+        self.failure_count = 0
 
         self._logger = logging.getLogger(__name__)
 
+    def stats(self):
+        """Return request and connection counters of this client."""
+        connections = 0
+        if self.session:
+            for adapter in self.session.adapters.values():
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    connections += pools[key].num_connections
+        return {'requests': self.request_count,
+                'failures': self.failure_count,
+                'connections': connections}
+
     def http_log_req(self, args, kwargs):
         if not self.http_log_debug:
             return
@@ -137,11 +155,16 @@ class HTTPClient(object):
         if self.timeout:
             kwargs.setdefault('timeout', self.timeout)
         self.http_log_req((url, method,), kwargs)
-        resp = requests.request(
-            method,
-            url,
-            verify=self.verify_cert,
-            **kwargs)
+        self.request_count += 1
+        try:
+            resp = (self.session or requests).request(
+                method,
+                url,
+                verify=self.verify_cert,
+                **kwargs)
+        except requests.exceptions.RequestException:
+            self.failure_count += 1
+            raise
         self.http_log_resp(resp)
 
         if resp.text:
@@ -154,6 +177,7 @@ class HTTPClient(object):
             body = None
 
         if resp.status_code >= 400:
+            self.failure_count += 1
             raise exceptions.from_response(resp, body)
 
         return resp, body
@@ -247,7 +271,18 @@ def _construct_http_client(username=None, password=None, project_id=None,
                       http_log_debug=http_log_debug,
                       cacert=cacert,
                       auth_system=auth_system,
-                      auth_plugin=auth_plugin)
+                      auth_plugin=auth_plugin,
+                      session=session)
+
+
+def new_session(pool_size=10):
+    """Return a keep-alive session holding up to pool_size connections."""
+    session = requests.Session()
+    adapter = adapters.HTTPAdapter(pool_connections=1,
+                                   pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
 
 
 def get_client_class(version):
@@ -19,11 +19,16 @@ Volume interface (1.1 extension).
 
 from oslo_log import log as logging
 from oslo_utils import uuidutils
+import requests
 
 from conveyor.conveyoragentclient.common import base
+from conveyor.conveyoragentclient.common import exceptions
 
 LOG = logging.getLogger(__name__)
 
+# {(gateway url, batched call): whether the gateway supports the call}
+_batch_support = {}
+
 
 class VServiceManager(base.Manager):
     """
@@ -48,9 +53,15 @@ class VServiceManager(base.Manager):
 
     def clone_volume(self, src_dev_name, des_dev_name, src_dev_format,
                      src_mount_point, src_gw_url, des_gw_url,
-                     trans_protocol=None, trans_port=None):
+                     trans_protocol=None, trans_port=None,
+                     incremental=False):
+
+        '''Clone volume data
 
-        '''Clone volume data'''
+        With incremental, only the data changed since the previous clone
+        of the same volume is copied, by the gateways for which
+        supports_incremental_clone is true.
+        '''
 
         LOG.debug("Clone volume data start")
 
@@ -63,12 +74,24 @@ class VServiceManager(base.Manager):
                                  'trans_protocol': trans_protocol,
                                  'trans_port': trans_port}
                 }
+        if incremental:
+            body['clone_volume']['incremental'] = True
 
         rsp = self._clone_volume("/v2vGateWayServices", body)
         LOG.debug("Clone volume %(dev)s data end: %(rsp)s",
                   {'dev': src_dev_name, 'rsp': rsp})
         return rsp
 
+    def supports_incremental_clone(self):
+        '''Whether the gateway advertises the incremental clone of volumes
+
+        Gateways without the getCapabilities query do not.
+        '''
+        url = '/v2vGateWayServices/capabilities'
+        rsp = self._batch_call('getCapabilities', 'GET', url)
+        capabilities = (rsp or {}).get('capabilities') or []
+        return 'incremental_clone' in capabilities
+
     def mount_disk(self, dev_name, mount_point):
         '''Mount disk'''
 
@@ -108,10 +131,10 @@ class VServiceManager(base.Manager):
 
         return mount_point
 
-    def get_disk_name(self):
+    def get_disk_name(self, volume_id=None):
 
         LOG.debug("Query disk name start")
-        body = {'getDiskName': {'volume_id': None}}
+        body = {'getDiskName': {'volume_id': volume_id}}
 
         url = '/v2vGateWayServices/%s/action' % uuidutils.generate_uuid()
 
@@ -122,6 +145,38 @@ class VServiceManager(base.Manager):
 
         return dev_name
 
+    def get_disks_info(self, disks):
+        '''Query format, mount point and device name of several disks
+
+        disks is a list of (dev_name, volume_id). Returns {dev_name:
+        {'disk_format': ..., 'mount_point': ..., 'dev_name': ...}}. A
+        gateway without the getDisksInfo action is queried disk by disk.
+        '''
+
+        LOG.debug("Query info of disks: %s start", disks)
+        body = {'getDisksInfo': {'disks': [{'disk_name': dev_name,
+                                            'volume_id': volume_id}
+                                           for dev_name, volume_id in disks]}}
+        url = '/v2vGateWayServices/%s/action' % uuidutils.generate_uuid()
+        rsp = self._batch_call('getDisksInfo', 'POST', url, body=body)
+        if rsp is not None:
+            disks_info = dict((disk.get('disk_name'), disk)
+                              for disk in rsp.get('disks', []))
+            LOG.debug("Query info of disks end: %s", disks_info)
+            return disks_info
+
+        disks_info = {}
+        for dev_name, volume_id in disks:
+            disks_info[dev_name] = {
+                'disk_name': dev_name,
+                'disk_format':
+                    self.get_disk_format(dev_name).get('disk_format'),
+                'mount_point':
+                    self.get_disk_mount_point(dev_name).get('mount_point'),
+                'dev_name': self.get_disk_name(volume_id).get('dev_name')}
+        LOG.debug("Query info of disks end: %s", disks_info)
+        return disks_info
+
     def get_data_trans_status(self, task_id):
 
         LOG.debug("Query data transformer state start")
@@ -133,6 +188,37 @@ class VServiceManager(base.Manager):
 
         return rsp
 
+    def get_data_trans_statuses(self, task_ids):
+        '''Query the state of several data transformer tasks
+
+        Returns {task_id: {'task_state': ...}}, the body of
+        get_data_trans_status for every task. A gateway without the
+        multi-task query, or missing a task in its answer, is queried
+        task by task.
+        '''
+
+        LOG.debug("Query data transformer states of %s start", task_ids)
+        statuses = {}
+        url = '/v2vGateWayServices?task_ids=%s' % \
+            ','.join(str(task_id) for task_id in task_ids)
+        rsp = self._batch_call('getDataTransStatuses', 'GET', url)
+        if rsp is not None:
+            tasks = {}
+            if isinstance(rsp.get('body'), list):
+                tasks = dict((str(task.get('task_id')), task)
+                             for task in rsp['body'])
+            for task_id in task_ids:
+                if str(task_id) in tasks:
+                    statuses[task_id] = tasks[str(task_id)]
+        for task_id in task_ids:
+            if task_id not in statuses:
+                statuses[task_id] = \
+                    self.get_data_trans_status(task_id).get('body')
+
+        LOG.debug("Query data transformer states end: %s", statuses)
+
+        return statuses
+
     def force_mount_disk(self, dev_name, mount_point):
         '''Mount disk'''
 
@@ -155,3 +241,41 @@ class VServiceManager(base.Manager):
 
         url = '/v2vGateWayServices/%s/action' % uuidutils.generate_uuid()
         return self._post(url, body)
+
+    def _batch_call(self, name, method, url, body=None):
+        '''Send a call the gateway may lack, return None if it does
+
+        The first call to a gateway is not retried, older gateways reject
+        it and are not asked again. A gateway that can not be reached is
+        asked again on the next call.
+        '''
+        key = (self.url, name)
+        supported = _batch_support.get(key)
+        if supported is False:
+            return None
+        kwargs = {'body': body} if body is not None else {}
+        try:
+            if supported:
+                resp, rsp = self.client._cs_request(self.url + url, method,
+                                                    **kwargs)
+            else:
+                resp, rsp = self.client.request(
+                    self.url + url, method,
+                    proxies={'http': None, 'https': None}, **kwargs)
+        except exceptions.ClientException as e:
+            if supported:
+                raise
+            if 400 <= e.code < 500 or e.code == 501:
+                LOG.debug("Gateway %(url)s does not support %(name)s.",
+                          {'url': self.url, 'name': name})
+                _batch_support[key] = False
+            # otherwise the caller falls back for this call only
+            return None
+        except requests.exceptions.RequestException as e:
+            if supported:
+                raise
+            LOG.debug("Gateway %(url)s %(name)s error: %(e)s",
+                      {'url': self.url, 'name': name, 'e': e})
+            return None
+        _batch_support[key] = True
+        return rsp or {}
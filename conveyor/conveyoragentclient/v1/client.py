@@ -28,17 +28,51 @@ client_opts = [
     cfg.IntOpt('conveyoragent_retries',
                default=10,
                help='conveyor gateway service api time out '),
+    cfg.BoolOpt('conveyoragent_keep_alive',
+                default=True,
+                help='Keep one client per gateway, whose connections are '
+                     'reused by all the calls to that gateway'),
+    cfg.IntOpt('conveyoragent_pool_size',
+               default=10,
+               help='Maximum number of connections kept alive to one '
+                    'gateway'),
+    cfg.IntOpt('conveyoragent_connect_timeout',
+               default=30,
+               help='Timeout, in seconds, to connect to a gateway. '
+                    '0 uses conveyoragent_timeout'),
     ]
 CONF = cfg.CONF
 CONF.register_opts(client_opts)
 
+# {(protocol, host, port, version): Client}
+_clients = {}
+
 
 def get_birdiegateway_client(host, port, version='v1'):
+    """Return a client of the gateway at host:port.
+
+    With conveyoragent_keep_alive, the client of every gateway is kept and
+    its session reuses connections across calls, polls included.
+    """
+    if not CONF.conveyoragent_keep_alive:
+        return Client(host=host, port=port,
+                      birdie_gateway_version=version)
+
+    key = (CONF.gateway_protocol, host, str(port), version)
+    gw_client = _clients.get(key)
+    if gw_client is None:
+        session = client.new_session(CONF.conveyoragent_pool_size)
+        gw_client = Client(host=host, port=port,
+                           birdie_gateway_version=version,
+                           session=session)
+        _clients[key] = gw_client
+    return gw_client
 
-    client = Client(host=host, port=port,
-                    birdie_gateway_version=version)
 
-    return client
+def get_clients_stats():
+    """Return {(host, port): request and connection counters}."""
+    return dict(((key[1], key[2]), c.client.stats())
+                for key, c in _clients.items())
 
 
 class Client(object):
@@ -74,6 +108,8 @@ class Client(object):
 
         if not timeout:
             timeout = CONF.conveyoragent_timeout
+            if CONF.conveyoragent_connect_timeout:
+                timeout = (CONF.conveyoragent_connect_timeout, timeout)
         if not retries:
             retries = CONF.conveyoragent_retries
 
@@ -35,6 +35,7 @@ from conveyor.common import loopingcall
 from conveyor.common import plan_status
 from conveyor.db import api as db_api
 from conveyor.i18n import _
+from conveyor import utils as conveyor_utils
 
 LOG = logging.getLogger(__name__)
 
@@ -387,26 +388,145 @@ class API(object):
             LOG.info("clear table or resource deployed: %s.", state)
             raise loopingcall.LoopingCallDone()
 
+    def _get_stack_dependents(self, context, stack_ids):
+        """Return the later stacks of a plan that refer to each stack.
+
+        A stack refers to an earlier one when its template contains the
+        physical id of one of the resources of the earlier stack, e.g. a
+        server cloned into a network created by a previous clone.
+
+        :param stack_ids: the stacks of the plan in creation order
+        :returns: {stack_id: set of ids of the stacks referring to it}
+        """
+        def _strings(snippet, found):
+            if isinstance(snippet, six.string_types):
+                found.add(snippet)
+            elif isinstance(snippet, dict):
+                for value in snippet.values():
+                    _strings(value, found)
+            elif isinstance(snippet, (list, tuple)):
+                for value in snippet:
+                    _strings(value, found)
+            return found
+
+        physical_ids = {}
+        references = {}
+        for stack_id in stack_ids:
+            physical_ids[stack_id] = set(
+                db_api.resource_get_physical_ids_by_stack(
+                    context, stack_id).values()) - set([None])
+            stack = db_api.stack_get(context, stack_id, show_deleted=True,
+                                     eager_load=True)
+            template = stack.raw_template.template \
+                if stack and stack.raw_template else None
+            # without its template, assume a stack refers to all earlier
+            references[stack_id] = _strings(template, set()) \
+                if template is not None else None
+
+        dependents = dict((stack_id, set()) for stack_id in stack_ids)
+        for i, stack_id in enumerate(stack_ids):
+            for earlier in stack_ids[:i]:
+                if references[stack_id] is None or \
+                        physical_ids[earlier] & references[stack_id]:
+                    dependents[earlier].add(stack_id)
+        return dependents
+
+    def _delete_plan_stacks(self, context, stack_ids, delete_func,
+                            done_states, deleted_func):
+        """Delete the stacks of a plan, those independent concurrently.
+
+        A stack is deleted once the stacks referring to it are deleted, so
+        the stacks are deleted in reverse dependency order, and all the
+        stacks being deleted are waited for in one loop.
+
+        :param delete_func: called with a stack id to start deleting it,
+                            returns False if there is nothing to wait for
+        :param done_states: stack states in which its deletion is over
+        :param deleted_func: called with the id of every deleted stack
+        """
+        dependents = self._get_stack_dependents(context, stack_ids)
+        pending = list(stack_ids)
+        deleting = set()
+        deleted = set()
+
+        def _finished(stack_id):
+            deleted.add(stack_id)
+            deleted_func(stack_id)
+
+        def _start_ready():
+            ready = [stack_id for stack_id in pending
+                     if dependents[stack_id] <= deleted]
+            for stack_id in ready:
+                pending.remove(stack_id)
+            waits = conveyor_utils.concurrent_map(
+                delete_func, ready, CONF.plan_stack_delete_workers)
+            for stack_id, wait in zip(ready, waits):
+                if wait is False:
+                    _finished(stack_id)
+                else:
+                    deleting.add(stack_id)
+
+        def _is_done(stack_id):
+            try:
+                stack = self.get_stack(context, stack_id)
+            except exception.EntityNotFound:
+                stack = None
+            if stack is None:
+                return True
+            state = stack.stack_status
+            if state in done_states:
+                LOG.info("Stack %(id)s of plan deleted: %(state)s.",
+                         {'id': stack_id, 'state': state})
+                return True
+            return False
+
+        def _wait_for_stacks():
+            """Called at an interval until all the stacks are deleted."""
+            checking = list(deleting)
+            dones = conveyor_utils.concurrent_map(
+                _is_done, checking, CONF.plan_stack_delete_workers)
+            for stack_id, done in zip(checking, dones):
+                if done:
+                    deleting.discard(stack_id)
+                    _finished(stack_id)
+            while pending and not deleting:
+                _start_ready()
+            if any(dones):
+                _start_ready()
+            if not pending and not deleting:
+                raise loopingcall.LoopingCallDone()
+
+        _start_ready()
+        if pending or deleting:
+            timer = loopingcall.FixedIntervalLoopingCall(_wait_for_stacks)
+            timer.start(interval=0.5).wait()
+
+    def _get_plan_stack_ids(self, context, plan_id, read_deleted='no'):
+        stacks = db_api.plan_stack_get(context, plan_id,
+                                       read_deleted=read_deleted)
+        return [st['stack_id'] for st in sorted(stacks,
+                                                key=lambda st: st['id'])]
+
     def clear_resource(self, context, stack_id, plan_id, is_heat_stack=False):
         # need stackname not id
         # context._session = db_api.get_session()
         try:
-            stacks = db_api.plan_stack_get(context, plan_id)
             values = {'deleted': True, 'updated_at': timeutils.utcnow()}
-            for st in stacks[::-1]:
-                stack_identity = self._make_identity(context.project_id,
-                                                     '', st['stack_id'])
 
+            def _clear(st_id):
+                stack_identity = self._make_identity(context.project_id,
+                                                     '', st_id)
                 self.api.clear_resource(context, stack_identity)
-                loop_fun = functools.partial(self._wait_for_resource, context,
-                                             st['stack_id'])
-                timer = loopingcall.FixedIntervalLoopingCall(loop_fun)
-                timer.start(interval=0.5).wait()
-                db_api.plan_stack_update(context, plan_id, st['stack_id'],
-                                         values)
+
+            def _cleared(st_id):
+                db_api.plan_stack_update(context, plan_id, st_id, values)
                 plan_task_status = \
                     {'task_status': plan_status.RESOURCE_DELETING}
                 db_api.plan_update(context, plan_id, plan_task_status)
+
+            self._delete_plan_stacks(
+                context, self._get_plan_stack_ids(context, plan_id), _clear,
+                ["DELETE_RES_COMPLETE", "DELETE_FAILED"], _cleared)
         except Exception as e:
             LOG.error("clear resource fail %s", e)
             plan_task_status = \
@@ -419,33 +539,36 @@ class API(object):
 
     def clear_table(self, context, stack_id, plan_id, is_heat_stack=False):
         # need stackname not id
-        stacks = None
+        stack_ids = None
         try:
-            stacks = db_api.plan_stack_get(context, plan_id,
-                                           read_deleted='yes')
+            stack_ids = self._get_plan_stack_ids(context, plan_id,
+                                                 read_deleted='yes')
         except Exception as e:
             LOG.error(_('Query plan stack for plan (id)s failed: %(err)s'),
                       {'id': plan_id, 'err': e})
             raise
-        if stacks:
-            for st in stacks[::-1]:
+        if stack_ids:
+            def _clear(st_id):
                 stack_identity = self._make_identity(context.project_id,
-                                                     '', st['stack_id'])
+                                                     '', st_id)
                 # context._session = db_api.get_session()
                 try:
                     self.api.clear_table(context, stack_identity)
-                    loop_fun = functools.partial(self._wait_for_table, context,
-                                                 st['stack_id'])
-                    timer = loopingcall.FixedIntervalLoopingCall(loop_fun)
-                    timer.start(interval=0.5).wait()
                 except exception.EntityNotFound:
                     LOG.warn(_('Delete stack not found in db for plan %s'),
                              plan_id)
-                except Exception as e:
-                    LOG.error(_('Clear stack error for plan %(id)s: %(e)s'),
-                              {'id': plan_id, 'e': e})
-                    raise
-                self._delete_stack_in_db(context, plan_id, st['stack_id'])
+                    return False
+
+            try:
+                self._delete_plan_stacks(
+                    context, stack_ids, _clear,
+                    ["DELETE_COMPLETE", "DELETE_FAILED"],
+                    functools.partial(self._delete_stack_in_db, context,
+                                      plan_id))
+            except Exception as e:
+                LOG.error(_('Clear stack error for plan %(id)s: %(e)s'),
+                          {'id': plan_id, 'e': e})
+                raise
 
     def _delete_stack_in_db(self, context, plan_id, stack_id):
         try:
@@ -469,23 +592,29 @@ class API(object):
         # need stackname not id
         # context._session = db_api.get_session()
         try:
-            stacks = db_api.plan_stack_get(context, plan_id,
-                                           read_deleted='yes')
-            for st in stacks[::-1]:
-                stack_list = db_api.stack_get(context, st['stack_id'],
+            deleted_ids = set()
+
+            def _delete(st_id):
+                stack_list = db_api.stack_get(context, st_id,
                                               {'show_deleted': False,
                                                'eager_load': True})
                 if not stack_list:
-                    continue
+                    deleted_ids.add(st_id)
+                    return False
                 stack_identity = self._make_identity(context.project_id,
-                                                     '', st['stack_id'])
+                                                     '', st_id)
                 # context._session = db_api.get_session()
                 self.api.delete_stack(context, stack_identity)
-                loop_fun = functools.partial(self._wait_for_table, context,
-                                             st['stack_id'])
-                timer = loopingcall.FixedIntervalLoopingCall(loop_fun)
-                timer.start(interval=0.5).wait()
-                self._delete_stack_in_db(context, plan_id, st['stack_id'])
+
+            def _deleted(st_id):
+                if st_id not in deleted_ids:
+                    self._delete_stack_in_db(context, plan_id, st_id)
+
+            self._delete_plan_stacks(
+                context,
+                self._get_plan_stack_ids(context, plan_id,
+                                         read_deleted='yes'),
+                _delete, ["DELETE_COMPLETE", "DELETE_FAILED"], _deleted)
             # context._session = db_api.get_session()
             # db_api.plan_stack_delete_all(context, plan_id)
         except Exception as e:
@@ -534,6 +663,12 @@ class API(object):
                                                resource_name)
         return Resource(format_resource(res))
 
+    def get_physical_ids(self, context, stack_id, names=None):
+        stack_identity = self._make_identity(context.project_id,
+                                             '', stack_id)
+        return self.api.get_physical_ids(context, stack_identity,
+                                         names=names)
+
     def get_resource_type(self, context, resource_type):
         # context._session = db_api.get_session()
         return self.api.resource_schema(context, resource_type)
@@ -86,6 +86,11 @@ engine_opts = [
                 default=['/usr/lib64/heat', '/usr/lib/heat',
                          '/usr/local/lib/heat', '/usr/local/lib64/heat'],
                 help=_('List of directories to search for plug-ins.')),
+    cfg.BoolOpt('lazy_load_plugins',
+                default=True,
+                help=_('Import the resource, constraint and client plug-ins '
+                       'when they are first used, rather than all of them '
+                       'when the engine starts.')),
     cfg.StrOpt('environment_dir',
                default='/etc/heat/environment.d',
                help=_('The directory to search for environment files.')),
@@ -151,10 +156,21 @@ engine_opts = [
                default=240,
                help=_('Error wait time in seconds for stack action (ie. create'
                       ' or update).')),
+    cfg.FloatOpt('resource_check_interval',
+                 default=0.1,
+                 help=_('Seconds to wait before first checking whether a'
+                        ' resource action is complete. The interval doubles'
+                        ' after each check up to one second. Set to 0 to'
+                        ' check once a second from the start.')),
     cfg.IntOpt('engine_life_check_timeout',
                default=2,
                help=_('RPC timeout for the engine liveness check that is used'
                       ' for stack locking.')),
+    cfg.IntOpt('loaded_stack_cache_size',
+               default=64,
+               help=_('Number of parsed stack templates kept by the engine '
+                      'for read only requests. Set to 0 to disable the '
+                      'cache.')),
     cfg.BoolOpt('enable_cloud_watch_lite',
                 default=False,
                 help=_('Enable the legacy OS::Heat::CWLiteAlarm resource.')),
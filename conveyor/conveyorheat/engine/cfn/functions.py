@@ -230,6 +230,10 @@ class GetAtt(function.Function):
         return itertools.chain(super(GetAtt, self).dep_attrs(resource_name),
                                attrs)
 
+    def all_dep_attrs(self):
+        attrs = [(self._resource().name, function.resolve(self._attribute))]
+        return itertools.chain(super(GetAtt, self).all_dep_attrs(), attrs)
+
     def dependencies(self, path):
         return itertools.chain(super(GetAtt, self).dependencies(path),
                                [self._resource(path)])
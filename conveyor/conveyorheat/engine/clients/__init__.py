@@ -17,6 +17,7 @@ from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import importutils
 import six
+from stevedore import driver
 from stevedore import enabled
 
 from conveyor.conveyorheat.common import exception
@@ -34,6 +35,8 @@ cloud_opts = [
                help="Fully qualified class name to use as a client backend.")
 ]
 cfg.CONF.register_opts(cloud_opts)
+cfg.CONF.import_opt('lazy_load_plugins',
+                    'conveyor.conveyorheat.common.config')
 
 
 class OpenStackClients(object):
@@ -56,11 +59,11 @@ class OpenStackClients(object):
             self._client_plugins[name].invalidate()
 
     def client_plugin(self, name):
-        global _mgr
         if name in self._client_plugins:
             return self._client_plugins[name]
-        if _mgr and name in _mgr.names():
-            client_plugin = _mgr[name].plugin(self.context)
+        plugin = _get_plugin(name)
+        if plugin is not None:
+            client_plugin = plugin(self.context)
             self._client_plugins[name] = client_plugin
             return client_plugin
 
@@ -114,24 +117,57 @@ Clients = ClientBackend
 
 
 _mgr = None
+# {name: client plugin class, or None if not available}, when the client
+# plugins are loaded by name on first use
+_plugins = {}
+_lazy = False
+
+
+def _client_is_available(plugin):
+    if not hasattr(plugin, 'is_available'):
+        # if the client does not have a is_available() class method, then
+        # we assume it wants to be always available
+        return True
+    # let the client plugin decide if it wants to register or not
+    return plugin.is_available()
+
+
+def _get_plugin(name):
+    if _mgr:
+        return _mgr[name].plugin if name in _mgr.names() else None
+    if not _lazy:
+        return None
+    if name not in _plugins:
+        try:
+            mgr = driver.DriverManager(namespace='conveyorheat.clients',
+                                       name=name,
+                                       invoke_on_load=False)
+        except RuntimeError:
+            plugin = None
+        else:
+            plugin = mgr.driver
+            if not _client_is_available(plugin):
+                plugin = None
+        _plugins[name] = plugin
+    return _plugins[name]
 
 
 def has_client(name):
-    return _mgr and name in _mgr.names()
+    return _get_plugin(name) is not None
 
 
 def initialise():
     global _mgr
-    if _mgr:
+    global _lazy
+    if _mgr or _lazy:
+        return
+
+    if cfg.CONF.lazy_load_plugins:
+        _lazy = True
         return
 
     def client_is_available(client_plugin):
-        if not hasattr(client_plugin.plugin, 'is_available'):
-            # if the client does not have a is_available() class method, then
-            # we assume it wants to be always available
-            return True
-        # let the client plugin decide if it wants to register or not
-        return client_plugin.plugin.is_available()
+        return _client_is_available(client_plugin.plugin)
 
     _mgr = enabled.EnabledExtensionManager(
         namespace='conveyorheat.clients',
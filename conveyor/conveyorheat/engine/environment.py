@@ -252,6 +252,34 @@ class ResourceRegistry(object):
         self._registry = {'resources': {}}
         self.global_registry = global_registry
         self.environment = env
+        # bumped whenever the registry changes, so resolved resource types
+        # are only reused while neither this nor the global registry changed
+        self._version = 0
+        self._resolved = {}
+        self._resolved_version = None
+        # called with a resource type, or None for all of them, to register
+        # the plugins providing it when they are loaded on demand
+        self.plugin_loader = None
+
+    def _changed(self):
+        self._version += 1
+
+    def _current_version(self):
+        if self.global_registry is not None:
+            return self._version, self.global_registry._version
+        return self._version, None
+
+    def _get_resolved(self, key):
+        if self._resolved_version != self._current_version():
+            return None
+        return self._resolved.get(key)
+
+    def _set_resolved(self, key, info):
+        version = self._current_version()
+        if self._resolved_version != version:
+            self._resolved = {}
+            self._resolved_version = version
+        self._resolved[key] = info
 
     def load(self, json_snippet):
         self._load_registry([], json_snippet)
@@ -282,6 +310,7 @@ class ResourceRegistry(object):
                 registry[key] = {}
             registry = registry[key]
         registry[name] = item
+        self._changed()
 
     def _register_info(self, path, info):
         """Place the new info in the correct location in the registry.
@@ -313,6 +342,7 @@ class ResourceRegistry(object):
                     'item': name,
                     'path': descriptive_path})
                 registry.pop(name, None)
+            self._changed()
             return
 
         if name in registry and isinstance(registry[name], ResourceInfo):
@@ -340,6 +370,7 @@ class ResourceRegistry(object):
 
         info.user_resource = (self.global_registry is not None)
         registry[name] = info
+        self._changed()
 
     def log_resource_info(self, show_all=False, prefix=None):
         registry = self._registry
@@ -362,6 +393,7 @@ class ResourceRegistry(object):
             registry = registry[key]
         if info.path[-1] in registry:
             registry.pop(info.path[-1])
+            self._changed()
 
     def get_rsrc_restricted_actions(self, resource_name):
         """Returns a set of restricted actions.
@@ -436,6 +468,7 @@ class ResourceRegistry(object):
         if resource_name in ress:
             new_resources.update(ress[resource_name])
         self._registry['resources'] = new_resources
+        self._changed()
 
     def iterable_by(self, resource_type, resource_name=None):
         is_templ_type = resource_type.endswith(('.yaml', '.template'))
@@ -456,6 +489,9 @@ class ResourceRegistry(object):
                 yield impl[resource_type]
 
         # handle: "OS::Nova::Server" -> "Rackspace::Cloud::Server"
+        if (self.plugin_loader is not None and
+                resource_type not in self._registry):
+            self.plugin_loader(resource_type)
         impl = self._registry.get(resource_type)
         if impl:
             yield impl
@@ -489,6 +525,13 @@ class ResourceRegistry(object):
         # 4) as_dict() to write to the db
         #    - filter_by(is_user=True)
 
+        cache_key = None
+        if ignore is None and isinstance(resource_type, six.string_types):
+            cache_key = (resource_type, resource_name, registry_type)
+            match = self._get_resolved(cache_key)
+            if match is not None:
+                return match
+
         if self.global_registry is not None:
             giter = self.global_registry.iterable_by(resource_type,
                                                      resource_name)
@@ -518,6 +561,8 @@ class ResourceRegistry(object):
                     not isinstance(info, (TemplateResourceInfo,
                                           ClassResourceInfo))):
                     self._register_info([resource_type], info)
+                if match and cache_key is not None:
+                    self._set_resolved(cache_key, match)
                 return match
 
         raise exception.EntityNotFound(entity='Resource Type',
@@ -578,6 +623,9 @@ class ResourceRegistry(object):
                    six.text_type(support.SUPPORT_STATUSES))
             raise exception.Invalid(reason=msg)
 
+        if self.plugin_loader is not None:
+            self.plugin_loader(None)
+
         def is_resource(key):
             return isinstance(self._registry[key], (ClassResourceInfo,
                                                     TemplateResourceInfo))
@@ -674,6 +722,8 @@ class Environment(object):
         self._built_event_sinks = []
         self._update_event_sinks(env.get(env_fmt.EVENT_SINKS, []))
         self.constraints = {}
+        # called with a constraint name to register it on demand
+        self.constraint_loader = None
         self.stack_lifecycle_plugins = []
 
     def load(self, env_snippet):
@@ -729,6 +779,8 @@ class Environment(object):
                                                registry_type, ignore=ignore)
 
     def get_constraint(self, name):
+        if name not in self.constraints and self.constraint_loader:
+            self.constraint_loader(name)
         return self.constraints.get(name)
 
     def get_stack_lifecycle_plugins(self):
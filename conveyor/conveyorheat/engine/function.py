@@ -73,6 +73,14 @@ class Function(object):
         """
         return dep_attrs(self.args, resource_name)
 
+    def all_dep_attrs(self):
+        """Return resource, attribute name pairs of all referenced attributes.
+
+        Return an iterator over (resource_name, attribute) pairs of every
+        attribute that this function references, whatever the resource.
+        """
+        return all_dep_attrs(self.args)
+
     def __reduce__(self):
         """Return a representation of the function suitable for pickling.
 
@@ -203,3 +211,26 @@ def dep_attrs(snippet, resource_name):
         attrs = (dep_attrs(value, resource_name) for value in snippet)
         return itertools.chain.from_iterable(attrs)
     return []
+
+
+def all_dep_attrs(snippet):
+    """Iterator over (resource name, attribute) pairs in a template snippet.
+
+    The snippet should be already parsed to insert Function objects where
+    appropriate.
+
+    :returns: an iterator over the (resource_name, attribute) pairs of all
+    the attributes referenced in the template snippet.
+    """
+
+    if isinstance(snippet, Function):
+        return snippet.all_dep_attrs()
+
+    elif isinstance(snippet, collections.Mapping):
+        attrs = (all_dep_attrs(value) for value in snippet.items())
+        return itertools.chain.from_iterable(attrs)
+    elif (not isinstance(snippet, six.string_types) and
+          isinstance(snippet, collections.Iterable)):
+        attrs = (all_dep_attrs(value) for value in snippet)
+        return itertools.chain.from_iterable(attrs)
+    return []
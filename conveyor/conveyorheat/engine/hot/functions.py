@@ -146,6 +146,13 @@ class GetAttThenSelect(cfn_funcs.GetAtt):
         return itertools.chain(function.dep_attrs(self.args, resource_name),
                                attrs)
 
+    def all_dep_attrs(self):
+        path = function.resolve(self._path_components)
+        attr = function.resolve(self._attribute)
+        attrs = [(self._resource().name,
+                  tuple([attr] + path) if path else attr)]
+        return itertools.chain(function.all_dep_attrs(self.args), attrs)
+
 
 class GetAtt(GetAttThenSelect):
     """A function for resolving resource attributes.
@@ -215,6 +222,15 @@ class GetAttAllAttributes(GetAtt):
         return itertools.chain(function.dep_attrs(self.args,
                                                   resource_name), attrs)
 
+    def all_dep_attrs(self):
+        """Without attribute_name, every attribute of the resource."""
+        if self._attribute is not None:
+            return super(GetAttAllAttributes, self).all_dep_attrs()
+        res = self._resource()
+        attrs = ((res.name, attr) for attr in
+                 six.iterkeys(res.attributes_schema))
+        return itertools.chain(function.all_dep_attrs(self.args), attrs)
+
     def result(self):
         if self._attribute is None:
             r = self._resource()
@@ -11,13 +11,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import ast
 import collections
 import itertools
+import os
 import six
 import sys
 
 from oslo_config import cfg
 from oslo_log import log
+from oslo_utils import importutils
 
 from conveyor.conveyorheat.common import plugin_loader
 from conveyor.i18n import _LE
@@ -25,10 +28,106 @@ from conveyor.i18n import _LE
 LOG = log.getLogger(__name__)
 
 
+class PluginIndex(object):
+    """An index of the mapping keys provided by the modules of a package.
+
+    The mapping functions of every module are read from its source instead
+    of importing the module, so that a module is only imported once one of
+    the keys it provides is needed. Modules whose mapping can not be read
+    from the source are left unindexed, to be imported at once.
+    """
+
+    def __init__(self, package_name, names, eager_names=()):
+        """Index the modules of a package.
+
+        :param names: the mapping names, as passed to PluginMapping.
+        :param eager_names: mapping names a module is left unindexed for.
+        """
+        if isinstance(names, six.string_types):
+            names = [names]
+        self.names = ['%s_mapping' % name for name in names]
+        self.eager_names = ['%s_mapping' % name for name in eager_names]
+        # {key: [module_name]}
+        self.index = {}
+        self.unindexed = []
+        self._loaded = set()
+        self._build(sys.modules[package_name])
+
+    def _build(self, package):
+        for path in package.__path__:
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for file_name in sorted(files):
+                    if not file_name.endswith('.py'):
+                        continue
+                    file_path = os.path.join(root, file_name)
+                    rel_path = os.path.relpath(file_path, path)[:-len('.py')]
+                    components = rel_path.split(os.sep)
+                    if components[-1] == '__init__':
+                        components = components[:-1]
+                    if not components:
+                        continue
+                    module_name = '.'.join([package.__name__] + components)
+                    # Skips tests or setup packages like load_modules
+                    if ('.tests.' in module_name or
+                            module_name.endswith('.setup')):
+                        continue
+                    keys = self._read_keys(file_path)
+                    if keys is None:
+                        self.unindexed.append(module_name)
+                        continue
+                    for key in keys:
+                        self.index.setdefault(key, []).append(module_name)
+
+    def _read_keys(self, file_path):
+        """Return the keys of the module mapping, or None if unknown."""
+        try:
+            with open(file_path) as f:
+                tree = ast.parse(f.read(), file_path)
+        except (IOError, SyntaxError):
+            return None
+
+        functions = dict((node.name, node) for node in tree.body
+                         if isinstance(node, ast.FunctionDef))
+        if any(name in functions for name in self.eager_names):
+            return None
+        for mapping_name in self.names:
+            function = functions.get(mapping_name)
+            if function is None:
+                continue
+            keys = set()
+            for node in ast.walk(function):
+                if not isinstance(node, ast.Return):
+                    continue
+                if not isinstance(node.value, ast.Dict):
+                    return None
+                for key in node.value.keys:
+                    try:
+                        keys.add(ast.literal_eval(key))
+                    except ValueError:
+                        return None
+            return keys
+        return set()
+
+    def modules_for(self, key=None):
+        """Return the modules not loaded yet providing key, or all."""
+        if key is None:
+            module_names = itertools.chain.from_iterable(
+                six.itervalues(self.index))
+        else:
+            module_names = self.index.get(key, [])
+        new_modules = []
+        for module_name in module_names:
+            if module_name not in self._loaded:
+                self._loaded.add(module_name)
+                new_modules.append(module_name)
+        return new_modules
+
+
 class PluginManager(object):
     """A class for managing plugin modules."""
 
-    def __init__(self, *extra_packages):
+    def __init__(self, *extra_packages, **kwargs):
         """Initialise the Heat Engine plugin package, and any others.
 
         The heat.engine.plugins package is always created, if it does not
@@ -40,10 +139,17 @@ class PluginManager(object):
 
         will load all modules in the heat.engine.resources package as well as
         any user-supplied plugin modules.
+
+        If a PluginIndex of the extra packages is passed as index, only
+        their unindexed modules are loaded, the others are loaded by
+        load_indexed() when needed.
         """
+        self.index = kwargs.get('index')
+
         def packages():
-            for package_name in extra_packages:
-                yield sys.modules[package_name]
+            if self.index is None:
+                for package_name in extra_packages:
+                    yield sys.modules[package_name]
 
             cfg.CONF.import_opt('plugin_dirs',
                                 'conveyor.conveyorheat.common.config')
@@ -57,6 +163,28 @@ class PluginManager(object):
             return itertools.chain.from_iterable(pkg_modules)
 
         self.modules = list(modules())
+        if self.index is not None:
+            self.modules.extend(self._import_modules(self.index.unindexed))
+
+    @staticmethod
+    def _import_modules(module_names):
+        for module_name in module_names:
+            try:
+                yield importutils.import_module(module_name)
+            except ImportError:
+                LOG.error(_LE('Failed to import module %s'), module_name)
+                raise
+
+    def load_indexed(self, key=None):
+        """Load the indexed modules providing key, or all of them.
+
+        Only the modules not loaded before are returned.
+        """
+        if self.index is None:
+            return []
+        modules = list(self._import_modules(self.index.modules_for(key)))
+        self.modules.extend(modules)
+        return modules
 
     def map_to_modules(self, function):
         """Iterate over the results of calling a function on every module."""
@@ -51,6 +51,8 @@ cfg.CONF.import_opt('action_retry_limit',
                     'conveyor.conveyorheat.common.config')
 cfg.CONF.import_opt('observe_on_update',
                     'conveyor.conveyorheat.common.config')
+cfg.CONF.import_opt('resource_check_interval',
+                    'conveyor.conveyorheat.common.config')
 
 LOG = logging.getLogger(__name__)
 
@@ -765,10 +767,15 @@ class Resource(object):
 
         if callable(handler):
             handler_data = handler(*args)
-            yield
+            # ask to be checked again soon, as many actions finish quickly,
+            # backing off towards the scheduler's default step of a second
+            interval = cfg.CONF.resource_check_interval or None
+            yield interval
             if callable(check):
                 while not check(handler_data):
-                    yield
+                    if interval is not None:
+                        interval = min(interval * 2, 1)
+                    yield interval
 
     @scheduler.wrappertask
     def _do_action(self, action, pre_func=None, resource_data=None):
@@ -1838,7 +1845,7 @@ class Resource(object):
         if new_state != old_state:
             self._add_event(action, status, reason)
 
-        self.stack.reset_resource_attributes()
+        self.stack.reset_resource_attributes(self.name)
 
     @property
     def state(self):
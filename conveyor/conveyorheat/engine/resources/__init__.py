@@ -11,12 +11,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from oslo_config import cfg
+import six
+from stevedore import driver
 from stevedore import extension
 
 from conveyor.conveyorheat.engine import clients
 from conveyor.conveyorheat.engine import environment
 from conveyor.conveyorheat.engine import plugin_manager
 
+cfg.CONF.import_opt('lazy_load_plugins',
+                    'conveyor.conveyorheat.common.config')
+
 
 def _register_resources(env, type_pairs):
     for res_name, res_class in type_pairs:
@@ -46,6 +52,15 @@ def _get_mapping(namespace):
     return [[name, mgr[name].plugin] for name in mgr.names()]
 
 
+def _get_plugin(namespace, name):
+    try:
+        mgr = driver.DriverManager(namespace=namespace, name=name,
+                                   invoke_on_load=False)
+    except RuntimeError:
+        return None
+    return mgr.driver
+
+
 _environment = None
 
 
@@ -74,7 +89,16 @@ def _load_global_environment(env):
 
 
 def _load_global_resources(env):
-    _register_constraints(env, _get_mapping('conveyorheat.constraints'))
+    lazy = cfg.CONF.lazy_load_plugins
+    if lazy:
+        def load_constraint(name):
+            # unknown names are registered as None not to be looked up again
+            env.register_constraint(
+                name, _get_plugin('conveyorheat.constraints', name))
+
+        env.constraint_loader = load_constraint
+    else:
+        _register_constraints(env, _get_mapping('conveyorheat.constraints'))
     _register_stack_lifecycle_plugins(
         env,
         _get_mapping('conveyorheat.stack_lifecycle_plugins'))
@@ -82,19 +106,35 @@ def _load_global_resources(env):
         env,
         _get_mapping('conveyorheat.event_sinks'))
 
-    manager = plugin_manager.PluginManager(__name__)
     # Sometimes resources should not be available for registration in Heat due
     # to unsatisfied dependencies. We look first for the function
     # 'available_resource_mapping', which should return the filtered resources.
     # If it is not found, we look for the legacy 'resource_mapping'.
-    resource_mapping = plugin_manager.PluginMapping(['available_resource',
-                                                     'resource'])
+    resource_names = ['available_resource', 'resource']
+    resource_mapping = plugin_manager.PluginMapping(resource_names)
     constraint_mapping = plugin_manager.PluginMapping('constraint')
 
+    index = None
+    if lazy:
+        # the modules are imported when a resource type they provide is
+        # looked up for the first time
+        index = plugin_manager.PluginIndex(__name__, resource_names,
+                                           eager_names=['constraint'])
+    manager = plugin_manager.PluginManager(__name__, index=index)
+
     _register_resources(env, resource_mapping.load_all(manager))
 
     _register_constraints(env, constraint_mapping.load_all(manager))
 
+    if index is not None:
+        def load_resources(resource_type):
+            for module in manager.load_indexed(resource_type):
+                _register_resources(
+                    env,
+                    six.iteritems(resource_mapping.load_from_module(module)))
+
+        env.registry.plugin_loader = load_resources
+
 
 def list_opts():
     from conveyor.conveyorheat.engine.resources.aws.lb import loadbalancer
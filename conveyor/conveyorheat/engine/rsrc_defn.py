@@ -151,6 +151,11 @@ class ResourceDefinitionCore(object):
                                function.dep_attrs(self._metadata,
                                                   resource_name))
 
+    def all_dep_attrs(self):
+        """Iterate over (resource name, attribute) pairs this references."""
+        return itertools.chain(function.all_dep_attrs(self._properties),
+                               function.all_dep_attrs(self._metadata))
+
     def dependencies(self, stack):
         """Return the Resource objects in given stack on which this depends."""
         def path(section):
@@ -11,6 +11,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import numbers
 import sys
 import types
 
@@ -48,6 +49,12 @@ def task_description(task):
     return encodeutils.safe_decode(repr(task))
 
 
+def _is_future(hint):
+    """Return True if a wake-up hint is an event or thread to wait for."""
+    return callable(getattr(hint, 'ready', None)) and \
+        callable(getattr(hint, 'wait', None))
+
+
 class Timeout(BaseException):
     """Raised when task has exceeded its allotted (wallclock) running time.
 
@@ -149,6 +156,10 @@ class TaskRunner(object):
         self._runner = None
         self._done = False
         self._timeout = None
+        # wallclock time when the task wants to be stepped again
+        self._wake_time = None
+        # event or thread the task is waiting for before its next step
+        self._wake_future = None
         self.name = task_description(task)
 
     def __str__(self):
@@ -162,11 +173,61 @@ class TaskRunner(object):
             LOG.debug('%s sleeping' % six.text_type(self))
             eventlet.sleep(wait_time)
 
+    def _wait(self, wait_time):
+        """Sleep until the next step, for at most `wait_time` seconds.
+
+        A task yields either nothing, a number of seconds after which it
+        wants to be stepped again, or an event (or green thread) it is
+        waiting for. Without a hint the full `wait_time` is slept.
+        """
+        if wait_time is None:
+            return
+        future = self._wake_future
+        if future is not None and not future.ready():
+            if ENABLE_SLEEP:
+                LOG.debug('%s waiting' % six.text_type(self))
+                with eventlet.Timeout(wait_time, False):
+                    future.wait()
+            return
+        delay = self.wake_delay()
+        self._sleep(wait_time if delay is None else min(delay, wait_time))
+
+    def _set_wake_hint(self, hint):
+        self._wake_time = None
+        self._wake_future = None
+        if isinstance(hint, numbers.Real) and not isinstance(hint, bool):
+            self._wake_time = timeutils.wallclock() + max(hint, 0)
+        elif _is_future(hint):
+            self._wake_future = hint
+
+    def wake_delay(self):
+        """Return the seconds until the task wants to be stepped again.
+
+        Return None if the task gave no hint, or is waiting for an event that
+        has not happened yet.
+        """
+        if self._wake_future is not None:
+            return 0 if self._wake_future.ready() else None
+        if self._wake_time is not None:
+            return max(self._wake_time - timeutils.wallclock(), 0)
+        return None
+
+    def due(self):
+        """Return True if the task should be stepped now."""
+        if self.done():
+            return True
+        if self._timeout is not None and self._timeout.expired():
+            return True
+        if self._wake_future is not None:
+            return self._wake_future.ready()
+        return self._wake_time is None or self.wake_delay() == 0
+
     def __call__(self, wait_time=1, timeout=None):
         """Start and run the task to completion.
 
         The task will first sleep for zero seconds, then sleep for `wait_time`
-        seconds between steps. To avoid sleeping, pass `None` for `wait_time`.
+        seconds between steps, or less if the task yields an earlier wake-up
+        hint. To avoid sleeping, pass `None` for `wait_time`.
         """
         self.start(timeout=timeout)
         # ensure that zero second sleep is applied only if task
@@ -216,9 +277,10 @@ class TaskRunner(object):
                 LOG.debug('%s running' % six.text_type(self))
 
                 try:
-                    next(self._runner)
+                    self._set_wake_hint(next(self._runner))
                 except StopIteration:
                     self._done = True
+                    self._set_wake_hint(None)
                     LOG.debug('%s complete' % six.text_type(self))
 
         return self._done
@@ -226,11 +288,12 @@ class TaskRunner(object):
     def run_to_completion(self, wait_time=1):
         """Run the task to completion.
 
-        The task will sleep for `wait_time` seconds between steps. To avoid
-        sleeping, pass `None` for `wait_time`.
+        The task will sleep for `wait_time` seconds between steps, or less if
+        the task yields an earlier wake-up hint. To avoid sleeping, pass `None`
+        for `wait_time`.
         """
         while not self.step():
-            self._sleep(wait_time)
+            self._wait(wait_time)
 
     def cancel(self, grace_period=None):
         """Cancel the task and mark it as done."""
@@ -384,10 +447,10 @@ class DependencyTaskGroup(object):
                     if not r:
                         del self._graph[k]
 
-                yield
+                yield self._wake_hint()
 
                 for k, r in self._running():
-                    if r.step():
+                    if r.due() and r.step():
                         del self._graph[k]
             except Exception:
                 exc_info = sys.exc_info()
@@ -410,6 +473,20 @@ class DependencyTaskGroup(object):
             finally:
                 del raised_exceptions
 
+    def _wake_hint(self):
+        """Return the seconds until a subtask needs to be stepped.
+
+        Subtasks are stepped only once they are due, so the group asks to be
+        woken up for the earliest of them. Return None, i.e. no hint, if any
+        running subtask gave none.
+        """
+        if any(self._ready()):
+            return 0
+        delays = [r.wake_delay() for k, r in self._running()]
+        if not delays or None in delays:
+            return None
+        return min(delays)
+
     def cancel_all(self, grace_period=None):
         for r in six.itervalues(self._runners):
             r.cancel(grace_period=grace_period)
@@ -82,6 +82,8 @@ cfg.CONF.import_opt('enable_stack_adopt',
                     'conveyor.conveyorheat.common.config')
 cfg.CONF.import_opt('convergence_engine',
                     'conveyor.conveyorheat.common.config')
+cfg.CONF.import_opt('loaded_stack_cache_size',
+                    'conveyor.conveyorheat.common.config')
 
 # Time to wait for a stack to stop when cancelling running threads, before
 # giving up on being able to start a delete.
@@ -251,6 +253,55 @@ class ThreadGroupManager(object):
             event.send(message)
 
 
+class LoadedStackCache(object):
+    """LRU cache of the templates of stacks loaded for read only requests.
+
+    Every request gets a Stack of its own, bound to the request context,
+    but the template, files and environment parsed for the stored stack are
+    reused while it has the same template, updated time, traversal and
+    state. Stacks in progress are never cached. Resource definitions are
+    built for every Stack, as their functions are bound to it.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        # {stack_id: (key, template)}, least recently used first
+        self._templates = collections.OrderedDict()
+
+    @staticmethod
+    def _key(db_stack):
+        return (db_stack.raw_template_id, db_stack.updated_at,
+                db_stack.current_traversal, db_stack.action, db_stack.status)
+
+    def load(self, cnxt, db_stack, resolve_data=True):
+        if self.size <= 0 or db_stack.status == parser.Stack.IN_PROGRESS:
+            return parser.Stack.load(cnxt, stack=db_stack,
+                                     resolve_data=resolve_data)
+
+        key = self._key(db_stack)
+        cached = self._templates.pop(db_stack.id, None)
+        if cached is not None and cached[0] == key:
+            self.hits += 1
+            template = cached[1]
+        else:
+            self.misses += 1
+            template = templatem.Template.load(
+                cnxt, db_stack.raw_template_id, db_stack.raw_template)
+        self._templates[db_stack.id] = (key, template)
+        while len(self._templates) > self.size:
+            self._templates.popitem(last=False)
+        LOG.debug('Loaded stack cache hits %(hits)s, misses %(misses)s.',
+                  {'hits': self.hits, 'misses': self.misses})
+        return parser.Stack.load(cnxt, stack=db_stack,
+                                 resolve_data=resolve_data,
+                                 template=template)
+
+    def invalidate(self, stack_id):
+        self._templates.pop(stack_id, None)
+
+
 @profiler.trace_cls("rpc")
 class EngineListener(service.Service):
     """Listen on an AMQP queue named for the engine.
@@ -309,7 +360,8 @@ class EngineService(service.Service):
 
     def __init__(self, host, topic):
         super(EngineService, self).__init__()
-        resources.initialise()
+        # the global environment is initialised on first use by
+        # resources.global_env(), not every time an engine is built
         self.host = host
         self.topic = topic
         self.binary = 'conveyor-heat'
@@ -328,6 +380,8 @@ class EngineService(service.Service):
         self._rpc_server = None
         self.software_config = service_software_config.SoftwareConfigService()
         self.resource_enforcer = policy.ResourceEnforcer()
+        self.stack_cache = LoadedStackCache(
+            cfg.CONF.loaded_stack_cache_size)
 
         if cfg.CONF.trusts_delegated_roles:
             LOG.warning(_LW('The default value of "trusts_delegated_roles" '
@@ -523,8 +577,8 @@ class EngineService(service.Service):
         """
         if stack_identity is not None:
             db_stack = self._get_stack(cnxt, stack_identity, show_deleted=True)
-            stacks = [parser.Stack.load(cnxt, stack=db_stack,
-                                        resolve_data=resolve_outputs)]
+            stacks = [self.stack_cache.load(cnxt, db_stack,
+                                            resolve_data=resolve_outputs)]
         else:
             stacks = parser.Stack.load_all(cnxt, resolve_data=resolve_outputs)
 
@@ -952,6 +1006,7 @@ class EngineService(service.Service):
 
         # Get the database representation of the existing stack
         db_stack = self._get_stack(cnxt, stack_identity)
+        self.stack_cache.invalidate(db_stack.id)
         LOG.info(_LI('Updating stack %s'), db_stack.name)
         if cfg.CONF.reauthentication_auth_method == 'trusts':
             current_stack = parser.Stack.load(
@@ -1107,6 +1162,7 @@ class EngineService(service.Service):
         """
         # Get the database representation of the existing stack
         db_stack = self._get_stack(cnxt, stack_identity)
+        self.stack_cache.invalidate(db_stack.id)
 
         current_stack = parser.Stack.load(cnxt, stack=db_stack)
         if current_stack.state != (current_stack.UPDATE,
@@ -1321,6 +1377,7 @@ class EngineService(service.Service):
         """
 
         st = self._get_stack(cnxt, stack_identity)
+        self.stack_cache.invalidate(st.id)
         LOG.info(_LI('Deleting stack %s'), st.name)
         stack = parser.Stack.load(cnxt, stack=st)
         self.resource_enforcer.enforce_stack(stack)
@@ -1380,6 +1437,7 @@ class EngineService(service.Service):
         """
 
         st = self._get_stack(cnxt, stack_identity)
+        self.stack_cache.invalidate(st.id)
         LOG.info(_LI('Clearing stack table %s'), st.name)
         stack = parser.Stack.load(cnxt, stack=st)
         self.resource_enforcer.enforce_stack(stack)
@@ -1440,6 +1498,7 @@ class EngineService(service.Service):
         """
 
         st = self._get_stack(cnxt, stack_identity)
+        self.stack_cache.invalidate(st.id)
         LOG.info(_LI('Clearing stack resource %s'), st.name)
         stack = parser.Stack.load(cnxt, stack=st)
         self.resource_enforcer.enforce_stack(stack)
@@ -1515,6 +1574,7 @@ class EngineService(service.Service):
             raise exception.NotSupported(feature='Stack Abandon')
 
         st = self._get_stack(cnxt, stack_identity)
+        self.stack_cache.invalidate(st.id)
         stack = parser.Stack.load(cnxt, stack=st)
         lock = stack_lock.StackLock(cnxt, stack.id, self.engine_id)
         with lock.thread_lock():
@@ -1761,11 +1821,30 @@ class EngineService(service.Service):
         if resource.id is None:
             raise exception.ResourceNotAvailable(resource_name=resource_name)
 
+    @context.request_context
+    def get_physical_ids(self, cnxt, stack_identity, names=None):
+        """Return the physical resource ids of the stack resources.
+
+        The resources are read from the db without loading the stack.
+
+        :param cnxt: RPC context.
+        :param stack_identity: Name of the stack you want to look up.
+        :param names: names of the resources to return, all if None.
+        :returns: a dict of resource name to physical resource id.
+        """
+        if cfg.CONF.heat_stack_user_role in cnxt.roles:
+            # stack users are only allowed to see their own resources,
+            # which needs the whole stack loaded
+            raise exception.Forbidden()
+        s = self._get_stack(cnxt, stack_identity)
+        return resource_objects.Resource.get_physical_ids_by_stack(
+            cnxt, s.id, names=names)
+
     @context.request_context
     def describe_stack_resource(self, cnxt, stack_identity, resource_name,
                                 with_attr=None):
         s = self._get_stack(cnxt, stack_identity)
-        stack = parser.Stack.load(cnxt, stack=s)
+        stack = self.stack_cache.load(cnxt, s)
 
         if cfg.CONF.heat_stack_user_role in cnxt.roles:
             if not self._authorize_stack_user(cnxt, stack, resource_name):
@@ -1806,6 +1885,7 @@ class EngineService(service.Service):
                     r.metadata_update()
 
         s = self._get_stack(cnxt, stack_identity)
+        self.stack_cache.invalidate(s.id)
 
         # This is not "nice" converting to the stored context here,
         # but this happens because the keystone user associated with the
@@ -1858,6 +1938,7 @@ class EngineService(service.Service):
                                             self.engine_id)
 
         s = self._get_stack(cnxt, stack_identity)
+        self.stack_cache.invalidate(s.id)
         stack = parser.Stack.load(cnxt, stack=s)
         if resource_name not in stack:
             raise exception.ResourceNotFound(resource_name=resource_name,
@@ -1904,7 +1985,7 @@ class EngineService(service.Service):
     def describe_stack_resources(self, cnxt, stack_identity, resource_name):
         s = self._get_stack(cnxt, stack_identity)
 
-        stack = parser.Stack.load(cnxt, stack=s)
+        stack = self.stack_cache.load(cnxt, s)
 
         return [api.format_stack_resource(resource)
                 for name, resource in six.iteritems(stack)
@@ -1915,7 +1996,7 @@ class EngineService(service.Service):
                              nested_depth=0, with_detail=False,
                              filters=None):
         s = self._get_stack(cnxt, stack_identity, show_deleted=True)
-        stack = parser.Stack.load(cnxt, stack=s)
+        stack = self.stack_cache.load(cnxt, s)
         depth = min(nested_depth, cfg.CONF.max_nested_stack_depth)
         res_type = None
         if filters is not None:
@@ -1942,6 +2023,7 @@ class EngineService(service.Service):
             stack.suspend()
 
         s = self._get_stack(cnxt, stack_identity)
+        self.stack_cache.invalidate(s.id)
 
         stack = parser.Stack.load(cnxt, stack=s)
         self.resource_enforcer.enforce_stack(stack)
@@ -1956,6 +2038,7 @@ class EngineService(service.Service):
             stack.resume()
 
         s = self._get_stack(cnxt, stack_identity)
+        self.stack_cache.invalidate(s.id)
 
         stack = parser.Stack.load(cnxt, stack=s)
         self.resource_enforcer.enforce_stack(stack)
@@ -2029,6 +2112,7 @@ class EngineService(service.Service):
     def stack_check(self, cnxt, stack_identity):
         """Handle request to perform a check action on a stack."""
         s = self._get_stack(cnxt, stack_identity)
+        self.stack_cache.invalidate(s.id)
         stack = parser.Stack.load(cnxt, stack=s)
         LOG.info(_LI("Checking stack %s"), stack.name)
 
@@ -2042,6 +2126,7 @@ class EngineService(service.Service):
             stack.restore(snapshot)
 
         s = self._get_stack(cnxt, stack_identity)
+        self.stack_cache.invalidate(s.id)
         stack = parser.Stack.load(cnxt, stack=s)
         self.resource_enforcer.enforce_stack(stack)
         snapshot = snapshot_object.Snapshot.get_snapshot_by_stack(
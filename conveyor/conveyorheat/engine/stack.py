@@ -163,6 +163,8 @@ class Stack(collections.Mapping):
         self._parent_stack = None
         self._resources = None
         self._dependencies = None
+        # {resource_name: set of its attributes referenced in the stack}
+        self._dep_attrs = None
         self._access_allowed_handlers = {}
         self._db_resources = None
         self.adopt_stack_data = adopt_stack_data
@@ -313,6 +315,8 @@ class Stack(collections.Mapping):
 
     def _find_resources(self, filters=None):
         if self._resources is None:
+            # the references index was built from the previous resources
+            self._dep_attrs = None
             res_defns = self.t.resource_definitions(self)
 
             if not filters:
@@ -377,6 +381,22 @@ class Stack(collections.Mapping):
 
     def reset_dependencies(self):
         self._dependencies = None
+        self._dep_attrs = None
+
+    def dep_attrs(self, resource_name):
+        """Return the attributes of the specified resource that are referenced.
+
+        The references of all the resources and outputs of the stack are
+        indexed in one pass on the first call, and every resource is then
+        looked up in the index instead of walking the whole stack again.
+        """
+        return set(self._referenced_attrs().get(resource_name, ()))
+
+    def _referenced_attrs(self):
+        if self._dep_attrs is None:
+            self._dep_attrs = self._get_all_dep_attrs(
+                six.itervalues(self.resources), self.outputs)
+        return self._dep_attrs
 
     def root_stack_id(self):
         if not self.owner_id:
@@ -443,6 +463,25 @@ class Stack(collections.Mapping):
                                       for out in six.itervalues(outputs)))
         return set(itertools.chain.from_iterable(attr_lists))
 
+    @staticmethod
+    def _get_all_dep_attrs(resources, outputs):
+        """Index the referenced attributes of every resource.
+
+        Each resource definition and output is walked once.
+
+        :returns: a dict of {resource_name: set of referenced attributes}
+        """
+        attr_pairs = itertools.chain(
+            itertools.chain.from_iterable(res.t.all_dep_attrs()
+                                          for res in resources),
+            itertools.chain.from_iterable(
+                function.all_dep_attrs(out.get('Value', ''))
+                for out in six.itervalues(outputs)))
+        index = collections.defaultdict(set)
+        for resource_name, attr in attr_pairs:
+            index[resource_name].add(attr)
+        return index
+
     @staticmethod
     def _get_dependencies(resources, ignore_errors=True):
         """Return the dependency graph for a list of resources."""
@@ -466,8 +505,12 @@ class Stack(collections.Mapping):
     @classmethod
     def load(cls, context, stack_id=None, stack=None, show_deleted=True,
              use_stored_context=False, force_reload=False, cache_data=None,
-             resolve_data=True):
-        """Retrieve a Stack from the database."""
+             resolve_data=True, template=None):
+        """Retrieve a Stack from the database.
+
+        template is the Template of the stored stack when it is already
+        loaded, it is then not loaded again.
+        """
         if stack is None:
             stack = stack_object.Stack.get_by_id(
                 context,
@@ -483,7 +526,8 @@ class Stack(collections.Mapping):
 
         return cls._from_db(context, stack,
                             use_stored_context=use_stored_context,
-                            cache_data=cache_data, resolve_data=resolve_data)
+                            cache_data=cache_data, resolve_data=resolve_data,
+                            template=template)
 
     @classmethod
     def load_all(cls, context, limit=None, marker=None, sort_keys=None,
@@ -516,9 +560,10 @@ class Stack(collections.Mapping):
 
     @classmethod
     def _from_db(cls, context, stack, resolve_data=True,
-                 use_stored_context=False, cache_data=None):
-        template = tmpl.Template.load(
-            context, stack.raw_template_id, stack.raw_template)
+                 use_stored_context=False, cache_data=None, template=None):
+        if template is None:
+            template = tmpl.Template.load(
+                context, stack.raw_template_id, stack.raw_template)
         tags = None
         if stack.tags:
             tags = [t.tag for t in stack.tags]
@@ -671,6 +716,7 @@ class Stack(collections.Mapping):
         resource.t = definition
         resource.reparse()
         self.resources[resource.name] = resource
+        self._dep_attrs = None
         self.t.add_resource(definition)
         if self.t.id is not None:
             self.t.store(self.context)
@@ -680,6 +726,7 @@ class Stack(collections.Mapping):
     def remove_resource(self, resource_name):
         """Remove the resource with the specified name."""
         del self.resources[resource_name]
+        self._dep_attrs = None
         self.t.remove_resource(resource_name)
         if self.t.id is not None:
             self.t.store(self.context)
@@ -1461,6 +1508,7 @@ class Stack(collections.Mapping):
             self.t = newstack.t
             template_outputs = self.t[self.t.OUTPUTS]
             self.outputs = self.resolve_static_data(template_outputs)
+            self._dep_attrs = None
         finally:
             if should_rollback:
                 # Already handled in rollback task
@@ -2093,14 +2141,24 @@ class Stack(collections.Mapping):
             raise exception.StackValidationFailed(
                 message=encodeutils.safe_decode(six.text_type(ex)))
 
-    def reset_resource_attributes(self):
+    def reset_resource_attributes(self, resource_name=None):
         # nothing is cached if no resources exist
         if not self._resources:
             return
         # a change in some resource may have side-effects in the attributes
-        # of other resources, so ensure that attributes are re-calculated
-        for res in six.itervalues(self.resources):
-            res.attributes.reset_resolved_values()
+        # of other resources, so ensure that the attributes referenced in the
+        # stack are re-calculated. The stack does not resolve the others, so
+        # only the changed resource itself may have cached them.
+        try:
+            names = set(self._referenced_attrs())
+        except Exception:
+            names = set(self._resources)
+        if resource_name is not None:
+            names.add(resource_name)
+        for name in names:
+            res = self._resources.get(name)
+            if res is not None:
+                res.attributes.reset_resolved_values()
 
     def has_cache_data(self, resource_name):
         return (self.cache_data is not None and
@@ -330,10 +330,7 @@ class WorkerService(service.Service):
 
 
 def construct_input_data(rsrc, curr_stack):
-    attributes = curr_stack.get_dep_attrs(
-        six.itervalues(curr_stack.resources),
-        curr_stack.outputs,
-        rsrc.name)
+    attributes = curr_stack.dep_attrs(rsrc.name)
     resolved_attributes = {}
     for attr in attributes:
         try:
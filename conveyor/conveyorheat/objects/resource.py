@@ -151,6 +151,11 @@ class Resource(
         ]
         return dict(resources)
 
+    @classmethod
+    def get_physical_ids_by_stack(cls, context, stack_id, names=None):
+        return db_api.resource_get_physical_ids_by_stack(context, stack_id,
+                                                         names=names)
+
     @classmethod
     def get_by_name_and_stack(cls, context, resource_name, stack_id):
         resource_db = db_api.resource_get_by_name_and_stack(
@@ -145,6 +145,41 @@ def plan_availability_zone_mapper_delete(context, plan_id):
     return IMPL.plan_availability_zone_mapper_delete(context, plan_id)
 
 
+def plan_image_conversion_create(context, values):
+    return IMPL.plan_image_conversion_create(context, values)
+
+
+def plan_image_conversion_get(context, plan_id, original_image_id=None):
+    return IMPL.plan_image_conversion_get(context, plan_id,
+                                          original_image_id=original_image_id)
+
+
+def plan_image_conversion_update(context, plan_id, original_image_id,
+                                 values):
+    return IMPL.plan_image_conversion_update(context, plan_id,
+                                             original_image_id, values)
+
+
+def plan_image_conversion_delete(context, plan_id):
+    return IMPL.plan_image_conversion_delete(context, plan_id)
+
+
+def vgw_get_all(context):
+    return IMPL.vgw_get_all(context)
+
+
+def vgw_create_or_update(context, vgw_id, values):
+    return IMPL.vgw_create_or_update(context, vgw_id, values)
+
+
+def vgw_update(context, vgw_id, values):
+    return IMPL.vgw_update(context, vgw_id, values)
+
+
+def vgw_delete(context, vgw_id):
+    return IMPL.vgw_delete(context, vgw_id)
+
+
 def conveyor_config_create(context, values):
     return IMPL.conveyor_config_create(context, values)
 
@@ -245,6 +280,11 @@ def resource_get_all_by_stack(context, stack_id, key_id=False, filters=None):
     return IMPL.resource_get_all_by_stack(context, stack_id, key_id, filters)
 
 
+def resource_get_physical_ids_by_stack(context, stack_id, names=None):
+    return IMPL.resource_get_physical_ids_by_stack(context, stack_id,
+                                                   names=names)
+
+
 def resource_get_by_name_and_stack(context, resource_name, stack_id):
     return IMPL.resource_get_by_name_and_stack(context,
                                                resource_name, stack_id)
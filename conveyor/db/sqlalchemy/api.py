@@ -811,6 +811,112 @@ def plan_availability_zone_mapper_delete(context, plan_id):
             session.delete(rs)
 
 
+@require_context
+def plan_image_conversion_create(context, values):
+    conversion_ref = models.PlanImageConversion()
+    conversion_ref.update(values)
+    try:
+        conversion_ref.save()
+    except db_exc.DBDuplicateEntry as e:
+        raise conveyor_exception.PlanExists(id=values.get('plan_id'))
+    except db_exc.DBReferenceError as e:
+        raise conveyor_exception.IntegrityException(msg=str(e))
+    except db_exc.DBError as e:
+        LOG.exception('DB error:%s', e)
+        raise conveyor_exception.PlanCreateFailed()
+    return dict(conversion_ref)
+
+
+def _plan_image_conversion_get(context, plan_id, original_image_id=None,
+                               session=None):
+    query = model_query(context, models.PlanImageConversion,
+                        session=session).filter_by(plan_id=plan_id)
+    if original_image_id:
+        query = query.filter_by(original_image_id=original_image_id)
+    return query.all()
+
+
+@require_context
+def plan_image_conversion_get(context, plan_id, original_image_id=None):
+    return [dict(r) for r in
+            _plan_image_conversion_get(context, plan_id,
+                                       original_image_id=original_image_id)]
+
+
+@require_context
+def plan_image_conversion_update(context, plan_id, original_image_id,
+                                 values):
+    session = get_session()
+    with session.begin():
+        conversions = _plan_image_conversion_get(
+            context, plan_id, original_image_id=original_image_id,
+            session=session)
+        if not conversions:
+            raise conveyor_exception.PlanNotFoundInDb(id=plan_id)
+        for conversion_ref in conversions:
+            conversion_ref.update(values)
+            conversion_ref.save(session=session)
+    return dict(conversions[0])
+
+
+@require_context
+def plan_image_conversion_delete(context, plan_id):
+    session = get_session()
+    with session.begin():
+        conversions = _plan_image_conversion_get(context, plan_id,
+                                                 session=session)
+        for conversion_ref in conversions:
+            session.delete(conversion_ref)
+
+
+def _vgw_get(context, vgw_id, session=None):
+    return model_query(context, models.VirtualGateway,
+                       session=session).filter_by(vgw_id=vgw_id).first()
+
+
+@require_context
+def vgw_get_all(context):
+    return [dict(r) for r in model_query(context, models.VirtualGateway)]
+
+
+@require_context
+def vgw_create_or_update(context, vgw_id, values):
+    session = get_session()
+    try:
+        with session.begin():
+            vgw_ref = _vgw_get(context, vgw_id, session=session)
+            if not vgw_ref:
+                vgw_ref = models.VirtualGateway()
+                vgw_ref.vgw_id = vgw_id
+            vgw_ref.update(values)
+            vgw_ref.save(session=session)
+    except db_exc.DBDuplicateEntry:
+        # the first heartbeat of the gateway reached two services at once
+        return vgw_update(context, vgw_id, values)
+    return dict(vgw_ref)
+
+
+@require_context
+def vgw_update(context, vgw_id, values):
+    session = get_session()
+    with session.begin():
+        vgw_ref = _vgw_get(context, vgw_id, session=session)
+        if not vgw_ref:
+            raise conveyor_exception.VgwNotFound(vgw_id=vgw_id)
+        vgw_ref.update(values)
+        vgw_ref.save(session=session)
+    return dict(vgw_ref)
+
+
+@require_context
+def vgw_delete(context, vgw_id):
+    session = get_session()
+    with session.begin():
+        vgw_ref = _vgw_get(context, vgw_id, session=session)
+        if vgw_ref:
+            session.delete(vgw_ref)
+
+
 @require_context
 def plan_stack_create(context, values):
     stack_ref = models.PlanStack()
@@ -1194,6 +1300,15 @@ def resource_get_all_by_stack(context, stack_id, key_id=False, filters=None):
         return dict((res.name, res) for res in results)
 
 
+def resource_get_physical_ids_by_stack(context, stack_id, names=None):
+    query = model_query_heat(
+        context, models.Resource.name, models.Resource.physical_resource_id
+    ).filter_by(stack_id=stack_id)
+    if names is not None:
+        query = query.filter(models.Resource.name.in_(names))
+    return dict(query.all())
+
+
 def stack_get_by_name_and_owner_id(context, stack_name, owner_id):
     query = soft_delete_aware_query(
         context, models.Stack
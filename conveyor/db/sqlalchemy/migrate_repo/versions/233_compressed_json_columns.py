@@ -0,0 +1,65 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import zlib
+
+import sqlalchemy
+
+# The columns turned into CompressedJson. Their rows keep the JSON text
+# they hold and are compressed when they are next written.
+COLUMNS = (('plans', 'clone_resources'),
+           ('plan_template', 'template'),
+           ('raw_template', 'template'),
+           ('raw_template', 'files'),
+           ('resource', 'properties_data'))
+
+COMPRESSED_HEADER = b'\x01'
+
+
+def upgrade(migrate_engine):
+    # sqlite stores values of any type in any column, nothing to do
+    for table, column in COLUMNS:
+        if migrate_engine.name == 'mysql':
+            migrate_engine.execute('ALTER TABLE %s MODIFY %s LONGBLOB' %
+                                   (table, column))
+        elif migrate_engine.name == 'postgresql':
+            migrate_engine.execute(
+                "ALTER TABLE %(table)s ALTER COLUMN %(column)s TYPE bytea "
+                "USING convert_to(%(column)s, 'UTF8')" %
+                {'table': table, 'column': column})
+
+
+def downgrade(migrate_engine):
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+    for table_name, column in COLUMNS:
+        table = sqlalchemy.Table(table_name, meta, autoload=True)
+        rows = migrate_engine.execute(
+            sqlalchemy.select([table.c.id, table.c[column]]))
+        for row_id, value in rows.fetchall():
+            if value is None:
+                continue
+            value = bytes(value)
+            if value[:1] == COMPRESSED_HEADER:
+                migrate_engine.execute(
+                    table.update().where(table.c.id == row_id).values(
+                        {column: zlib.decompress(value[1:])}))
+
+        if migrate_engine.name == 'mysql':
+            migrate_engine.execute('ALTER TABLE %s MODIFY %s LONGTEXT' %
+                                   (table_name, column))
+        elif migrate_engine.name == 'postgresql':
+            migrate_engine.execute(
+                "ALTER TABLE %(table)s ALTER COLUMN %(column)s TYPE text "
+                "USING convert_from(%(column)s, 'UTF8')" %
+                {'table': table_name, 'column': column})
@@ -0,0 +1,58 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_log import log as logging
+from sqlalchemy import Column, DateTime
+from sqlalchemy import Index, Integer, MetaData, String, Table
+
+LOG = logging.getLogger(__name__)
+
+
+def upgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+    vgws = Table('virtual_gateways', meta,
+                 Column('created_at', DateTime(timezone=False)),
+                 Column('updated_at', DateTime(timezone=False)),
+                 Column('deleted_at', DateTime(timezone=False)),
+                 Column('id', Integer, primary_key=True, nullable=False),
+                 Column('vgw_id', String(length=36), nullable=False),
+                 Column('vgw_ip', String(length=255)),
+                 Column('availability_zone', String(length=255)),
+                 Column('copy_load', Integer),
+                 Column('free_disk_slots', Integer),
+                 Column('heartbeat_at', DateTime(timezone=False)),
+                 Column('deleted', Integer),
+                 Index('virtual_gateways_vgw_id_idx', 'vgw_id',
+                       unique=True),
+                 mysql_engine='InnoDB',
+                 mysql_charset='utf8')
+
+    try:
+        vgws.create()
+    except Exception:
+        meta.drop_all(tables=[vgws])
+        raise
+
+
+def downgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+
+    for table in ('virtual_gateways', ):
+        for prefix in ('', 'shadow_'):
+            table_name = prefix + table
+            if migrate_engine.has_table(table_name):
+                instance_extra = Table(table_name, meta, autoload=True)
+                instance_extra.drop()
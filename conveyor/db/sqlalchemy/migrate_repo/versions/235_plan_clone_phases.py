@@ -0,0 +1,34 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from sqlalchemy import Column, MetaData, Table, Text
+from sqlalchemy.dialects import mysql
+
+
+def upgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+    plans = Table('plans', meta, autoload=True)
+    if not hasattr(plans.c, 'clone_phases'):
+        plans.create_column(
+            Column('clone_phases',
+                   Text().with_variant(mysql.LONGTEXT(), 'mysql')))
+
+
+def downgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+    plans = Table('plans', meta, autoload=True)
+    if hasattr(plans.c, 'clone_phases'):
+        plans.drop_column('clone_phases')
@@ -176,8 +176,10 @@ class Plan(BASE, ConveyorBase):
     task_status = Column(String(length=255))
     plan_status = Column(String(length=255))
     plan_type = Column(String(length=255))
-    clone_resources = Column(types.Json)
+    clone_resources = Column(types.CompressedJson)
     stack_id = Column(String(length=36))
+    clone_phases = Column(types.Json)
+    cutover_timeline = Column(types.Json)
 
 
 class PlanTemplate(BASE, ConveyorBase):
@@ -186,7 +188,7 @@ class PlanTemplate(BASE, ConveyorBase):
     __tablename__ = 'plan_template'
     id = Column(Integer, primary_key=True)
     plan_id = Column(String(length=36), nullable=False)
-    template = Column(types.Json)
+    template = Column(types.CompressedJson)
 
 
 class PlanClonedResources(BASE, ConveyorBase):
@@ -209,6 +211,34 @@ class PlanAavailabilityZoneMapper(BASE, ConveyorBase):
     az_mapper = Column(types.Json)
 
 
+class PlanImageConversion(BASE, ConveyorBase):
+    """Represents a hyper image conversion started for a plan."""
+
+    __tablename__ = 'plan_image_conversions'
+    id = Column(Integer, primary_key=True)
+    plan_id = Column(String(length=36), nullable=False)
+    original_image_id = Column(String(length=36), nullable=False)
+    hyper_image_id = Column(String(length=36))
+    status = Column(String(length=255))
+
+
+class VirtualGateway(BASE, ConveyorBase):
+    """Represents a v2v gateway registered by its agent."""
+
+    __tablename__ = 'virtual_gateways'
+    __table_args__ = (
+        Index('virtual_gateways_vgw_id_idx', 'vgw_id', unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    vgw_id = Column(String(length=36), nullable=False)
+    vgw_ip = Column(String(length=255))
+    availability_zone = Column(String(length=255))
+    copy_load = Column(Integer, default=0)
+    free_disk_slots = Column(Integer)
+    heartbeat_at = Column(DateTime)
+
+
 class ConveyorConfig(BASE, ConveyorBase):
     """Represents an ConveyorConfig."""
 
@@ -284,8 +314,8 @@ class RawTemplate(BASE, CopyBase):
 
     __tablename__ = 'raw_template'
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
-    template = sqlalchemy.Column(types.Json)
-    files = sqlalchemy.Column(types.Json)
+    template = sqlalchemy.Column(types.CompressedJson)
+    files = sqlalchemy.Column(types.CompressedJson)
     environment = sqlalchemy.Column('environment', types.Json)
 
 
@@ -491,7 +521,8 @@ class Resource(BASE, CopyBase, StateAware):
     # time the create/update call was issued, not the time the DB entry is
     # created/modified. (bug #1193269)
     updated_at = sqlalchemy.Column(sqlalchemy.DateTime)
-    properties_data = sqlalchemy.Column('properties_data', types.Json)
+    properties_data = sqlalchemy.Column('properties_data',
+                                        types.CompressedJson)
     properties_data_encrypted = sqlalchemy.Column('properties_data_encrypted',
                                                   sqlalchemy.Boolean)
     engine_id = sqlalchemy.Column(sqlalchemy.String(36))
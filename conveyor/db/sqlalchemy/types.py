@@ -11,12 +11,22 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-from oslo_serialization import jsonutils
+import zlib
+
+import six
 from sqlalchemy.dialects import mysql
 from sqlalchemy import types
 
-dumps = jsonutils.dumps
-loads = jsonutils.loads
+from conveyor.common import serializer
+
+dumps = serializer.dumps
+loads = serializer.loads
+
+# First byte of the values CompressedJson stores compressed, JSON text never
+# starts with it.
+COMPRESSED_HEADER = b'\x01'
+# Values shorter than this are not worth compressing and are stored as is.
+COMPRESS_MIN_SIZE = 1024
 
 
 class LongText(types.TypeDecorator):
@@ -56,3 +66,35 @@ class List(types.TypeDecorator):
         if value is None:
             return None
         return loads(value)
+
+
+class CompressedJson(types.TypeDecorator):
+    """Json stored zlib compressed.
+
+    A value is written as COMPRESSED_HEADER followed by its compressed JSON,
+    or as plain JSON if short. Both are read back, as well as the rows the
+    column held as a Json, so existing rows are converted when rewritten.
+    """
+    impl = types.LargeBinary
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'mysql':
+            return dialect.type_descriptor(mysql.LONGBLOB())
+        else:
+            return self.impl
+
+    def process_bind_param(self, value, dialect):
+        data = dumps(value)
+        if isinstance(data, six.text_type):
+            data = data.encode('utf-8')
+        if len(data) < COMPRESS_MIN_SIZE:
+            return data
+        return COMPRESSED_HEADER + zlib.compress(data)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, six.binary_type) and \
+                value[:1] == COMPRESSED_HEADER:
+            value = zlib.decompress(value[1:])
+        return loads(value)
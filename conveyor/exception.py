@@ -383,6 +383,14 @@ class PlanFileOperationError(V2vException):
     message = _("Read or write plan file failed.")
 
 
+class ResourcesTopoJobNotFound(NotFound):
+    message = _("The resources topo job <%(job_id)s> could not be found.")
+
+
+class VgwNotFound(NotFound):
+    message = _("The vgw <%(vgw_id)s> could not be found.")
+
+
 class ResourceNotFound(NotFound):
     message = _("%(resource_type)s resource \
                 <%(resource_id)s> could not be found.")
@@ -32,7 +32,8 @@ class Plan(object):
     def __init__(self, plan_id, plan_type, project_id, user_id, stack_id=None,
                  created_at=None, updated_at=None, deleted_at=None,
                  deleted=None, plan_status=None,
-                 task_status=None, plan_name=None, clone_resources=None):
+                 task_status=None, plan_name=None, clone_resources=None,
+                 clone_phases=None, cutover_timeline=None):
 
         self.plan_id = plan_id
         self.plan_type = plan_type
@@ -49,6 +50,11 @@ class Plan(object):
         self.plan_status = plan_status or p_status.AVAILABLE
         self.task_status = task_status or ''
         self.clone_resources = clone_resources
+        # {resource_name: [phase]}, the timing of the phases of live clone
+        self.clone_phases = clone_phases
+        # {server_key: {'downtime': seconds, 'steps': [step]}}, the steps
+        # switching the ports of the servers to their clones
+        self.cutover_timeline = cutover_timeline
 
     def rebuild_dependencies(self, is_original=False):
 
@@ -129,7 +135,9 @@ class Plan(object):
                 'deleted': self.deleted,
                 'task_status': self.task_status,
                 'plan_status': self.plan_status,
-                'clone_resources': self.clone_resources
+                'clone_resources': self.clone_resources,
+                'clone_phases': self.clone_phases,
+                'cutover_timeline': self.cutover_timeline
                 }
 
         return plan
@@ -155,6 +163,8 @@ class Plan(object):
 
         for key in plan.keys():
             plan[key] = plan_dict[key]
+        plan['clone_phases'] = plan_dict.get('clone_phases')
+        plan['cutover_timeline'] = plan_dict.get('cutover_timeline')
         self = cls(**plan)
         return self
 
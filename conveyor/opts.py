@@ -15,8 +15,11 @@ import itertools
 from conveyor.clone import manager as clone_manager
 from conveyor.clone.resources import common as clone_resources_common
 from conveyor.clone.resources.instance import manager as cri_manager
+from conveyor.clone.resources.volume.driver import volume as crv_driver
 from conveyor.clone.resources.volume import manager as crv_manager
 from conveyor.common import config
+from conveyor.common import serializer
+from conveyor.common import vgw_registry
 from conveyor.compute import nova
 from conveyor.conveyoragentclient.v1 import client as conveyoragentclient
 from conveyor.conveyorcaa import api as conveyorcaa_api
@@ -24,6 +27,8 @@ from conveyor.conveyorheat.common import config as conveyorheat_config
 from conveyor.heat import heat
 from conveyor.image import glance
 from conveyor.network import neutron
+from conveyor.resource import inventory as resource_inventory
+from conveyor.resource import manager as resource_manager
 from conveyor.volume import cinder
 
 
@@ -34,6 +39,8 @@ def list_opts():
                 config.core_opts,
                 config.global_opts,
                 config.birdie_opts,
+                serializer.serializer_opts,
+                vgw_registry.vgw_registry_opts,
                 nova.nova_opts,
                 conveyoragentclient.client_opts,
                 conveyorheat_config.ces_client_opts,
@@ -42,6 +49,9 @@ def list_opts():
                 clone_resources_common.migrate_manager_opts,
                 cri_manager.migrate_manager_opts,
                 crv_manager.migrate_manager_opts,
+                crv_driver.live_clone_opts,
+                resource_manager.resource_opts,
+                resource_inventory.inventory_opts,
             )),
         ('keystone_authtoken',
             itertools.chain(
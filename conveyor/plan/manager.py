@@ -213,6 +213,13 @@ class PlanManager(manager.Manager):
             LOG.error('Delete plan %(id)s az map failed: %(err)s',
                       {'id': plan_id, 'err': e})
             raise
+
+        try:
+            db_api.plan_image_conversion_delete(context, plan_id)
+        except Exception as e:
+            LOG.error('Delete plan %(id)s image conversions failed: %(err)s',
+                      {'id': plan_id, 'err': e})
+            raise
         # delete plan info
         try:
             db_api.plan_delete(context, plan_id)
@@ -222,6 +229,7 @@ class PlanManager(manager.Manager):
             LOG.error('Delete plan %(id)s az map failed: %(err)s',
                       {'id': plan_id, 'err': e})
             raise
+        self.resource_api.invalidate_plan_topo(context, plan_id)
 
         LOG.info("Delete plan with id of %s succeed!", plan_id)
 
@@ -255,6 +263,13 @@ class PlanManager(manager.Manager):
             LOG.error('Delete plan %(id)s az map failed: %(err)s',
                       {'id': plan_id, 'err': e})
             raise
+
+        try:
+            db_api.plan_image_conversion_delete(context, plan_id)
+        except Exception as e:
+            LOG.error('Delete plan %(id)s image conversions failed: %(err)s',
+                      {'id': plan_id, 'err': e})
+            raise
         # delete plan info
         try:
             db_api.plan_delete(context, plan_id)
@@ -264,6 +279,7 @@ class PlanManager(manager.Manager):
             LOG.error('Delete plan %(id)s az map failed: %(err)s',
                       {'id': plan_id, 'err': e})
             raise
+        self.resource_api.invalidate_plan_topo(context, plan_id)
 
     def update_plan(self, context, plan_id, values):
 
@@ -50,6 +50,14 @@ class ResourceAPI(object):
                                                          az_map,
                                                          search_opt=search_opt)
 
+    def start_resources_topo_job(self, context, plan_id,
+                                 az_map, search_opt=None):
+        return self.resource_rpcapi.start_resources_topo_job(
+            context, plan_id, az_map, search_opt=search_opt)
+
+    def get_resources_topo_job(self, context, job_id):
+        return self.resource_rpcapi.get_resources_topo_job(context, job_id)
+
     def get_resource_detail(self, context, resource_type, resource_id):
         LOG.info("Get %s resource details with id of <%s>.",
                  resource_type, resource_id)
@@ -138,3 +146,10 @@ class ResourceAPI(object):
                       {'id': plan_id, 'err': unicode(e)})
             raise
         return rsp
+
+    def invalidate_plan_topo(self, context, plan_id):
+        try:
+            self.resource_rpcapi.invalidate_plan_topo(context, plan_id)
+        except Exception as e:
+            LOG.warning('Invalidate topo of plan %(id)s error: %(err)s',
+                        {'id': plan_id, 'err': unicode(e)})
@@ -18,6 +18,7 @@ import copy
 import json
 import yaml
 
+from oslo_config import cfg
 from oslo_log import log as logging
 
 from conveyor import exception
@@ -31,6 +32,7 @@ from conveyor.resource.driver.volumes import Volume
 from conveyor.resource.driver.volumes import VolumeType
 from conveyor.resource import resource as res
 
+CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
 
@@ -45,6 +47,26 @@ handle_resource_types = ['OS::Nova::Server', 'OS::Glance::Image',
                          'OS::Neutron::SecurityGroup',
                          'OS::Neutron::Pool', 'OS::Heat::Stack']
 
+# resource types extracted in batch by bulk stack extraction, in the order
+# the batches are extracted: (resource type, driver class, extract method)
+batch_extract_resource_types = [
+    ('OS::Nova::Flavor', InstanceResource, 'extract_flavors'),
+    ('OS::Nova::KeyPair', InstanceResource, 'extract_keypairs'),
+    ('OS::Cinder::VolumeType', VolumeType, 'extract_volume_types'),
+    ('OS::Neutron::SecurityGroup', SecGroup, 'extract_secgroups'),
+    ('OS::Neutron::Net', NetworkResource, 'extract_nets'),
+    ('OS::Neutron::Subnet', NetworkResource, 'extract_subnets'),
+    ('OS::Neutron::Router', NetworkResource, 'extract_routers'),
+    ('OS::Neutron::Port', NetworkResource, 'extract_ports'),
+    ('OS::Cinder::Volume', Volume, 'extract_volumes'),
+    ('OS::Nova::Server', InstanceResource, 'extract_instances'),
+    ('OS::Neutron::FloatingIP', NetworkResource, 'extract_floatingips'),
+]
+
+# resource types ignored when extracting resources of a stack
+skip_extract_resource_types = ['OS::Neutron::LoadBalancer',
+                               'OS::Neutron::Pool', 'OS::Heat::Stack']
+
 
 class StackResource(base.Resource):
 
@@ -113,8 +135,14 @@ class StackResource(base.Resource):
                                            resource_name,
                                            stack['stack_name'],
                                            resource_type)
-        sub_reses, dependencies_reses = self._extract_son_resources(
-            context, stack_id, resource_name)
+        son_reses = None
+        if CONF.stack_bulk_extract:
+            son_reses = self._extract_son_resources_bulk(context, stack_id,
+                                                         resource_name)
+        if son_reses is None:
+            son_reses = self._extract_son_resources(context, stack_id,
+                                                    resource_name)
+        sub_reses, dependencies_reses = son_reses
         for resource in sub_reses:
             stack_dep.add_dependency(resource.id, resource.name,
                                      resource.properties.get('name', ''),
@@ -373,6 +401,109 @@ class StackResource(base.Resource):
         self._collected_resources = new_resources
         return sub_reses, dependencies_reses
 
+    def _extract_son_resources_bulk(self, context, stack_id, stack_name):
+        """Extract resources of a stack and of its nested stacks at once.
+
+        The nested resource list is queried from heat once, physical ids
+        are grouped by type and every group is extracted by one batched
+        extract call. Returns None if the resources of the nested list can
+        not be attributed to their stacks.
+        """
+        kwargs = {'nested_depth': CONF.heat_nested_depth}
+        all_res_list = self.heat_api.resources_list(context, stack_id,
+                                                    **kwargs)
+        stack_reses_map = {}
+        for sub_res in all_res_list or []:
+            owner_id = self._get_owner_stack_id(sub_res)
+            if not owner_id:
+                LOG.debug('Owner stack of resource %s is unknown, extract '
+                          'stack %s one by one.', sub_res.resource_name,
+                          stack_id)
+                return None
+            stack_reses_map.setdefault(owner_id, []).append(sub_res)
+
+        # walk into nested template resources only, other nested stacks
+        # (eg, resource group) are extracted from their templates
+        sub_res_list = []
+
+        def _walk(owner_id):
+            for sub_res in stack_reses_map.get(owner_id, []):
+                if self.is_file_type(sub_res.resource_type):
+                    _walk(sub_res.physical_resource_id)
+                else:
+                    sub_res_list.append((sub_res, owner_id))
+        _walk(stack_id)
+
+        sub_res_ids = [r.physical_resource_id for r, o in sub_res_list]
+        type_ids_map = {}
+        for sub_res, owner_id in sub_res_list:
+            if sub_res.physical_resource_id:
+                type_ids_map.setdefault(sub_res.resource_type, []).append(
+                    sub_res.physical_resource_id)
+
+        origin_resource_ids = set(self._collected_resources.keys())
+        new_resources = self._collected_resources
+        new_dependencies = self._collected_dependencies
+        for res_type, driver_cls, method in batch_extract_resource_types:
+            res_ids = type_ids_map.get(res_type)
+            if not res_ids:
+                continue
+            driver = driver_cls(context,
+                                collected_resources=new_resources,
+                                collected_dependencies=new_dependencies)
+            getattr(driver, method)(res_ids, stack_name, sub_res_ids)
+            new_resources = driver.get_collected_resources()
+            new_dependencies = driver.get_collected_dependencies()
+
+        batch_types = [t[0] for t in batch_extract_resource_types]
+        templates = {}
+        sub_reses = []
+        for sub_res, owner_id in sub_res_list:
+            res_type = sub_res.resource_type
+            physical_resource_id = sub_res.physical_resource_id
+            res_info = None
+            if res_type in skip_extract_resource_types:
+                continue
+            elif res_type in batch_types:
+                res_info = new_resources.get(physical_resource_id)
+            elif res_type == 'OS::Glance::Image':
+                ir = InstanceResource(context,
+                                      collected_resources=new_resources,
+                                      collected_dependencies=new_dependencies)
+                res_info = ir.extract_image(physical_resource_id,
+                                            stack_name, sub_res_ids)
+                new_resources = ir.get_collected_resources()
+                new_dependencies = ir.get_collected_dependencies()
+            else:
+                if owner_id not in templates:
+                    templates[owner_id] = self.heat_api.get_template(
+                        context, owner_id)
+                hr = HeatResource(context,
+                                  collected_resources=new_resources,
+                                  collected_dependencies=new_dependencies)
+                res_info = hr.extract_resource(templates[owner_id],
+                                               sub_res.resource_name,
+                                               res_type,
+                                               physical_resource_id,
+                                               stack_name, sub_res_ids)
+                new_resources = hr.get_collected_resources()
+                new_dependencies = hr.get_collected_dependencies()
+            if res_info is not None:
+                sub_reses.append(res_info)
+
+        dependencies_reses = [v for k, v in new_resources.items()
+                              if k not in origin_resource_ids]
+        self._collected_dependencies = new_dependencies
+        self._collected_resources = new_resources
+        return sub_reses, dependencies_reses
+
+    def _get_owner_stack_id(self, stack_res):
+        """Get id of the stack a resource of nested resource list is in."""
+        for link in getattr(stack_res, 'links', None) or []:
+            if link.get('rel') == 'stack':
+                return link.get('href', '').rstrip('/').split('/')[-1]
+        return None
+
     def _list_sub_resources(self, context, stack_id):
         return self.heat_api.resources_list(context, stack_id)
 
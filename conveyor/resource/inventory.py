@@ -0,0 +1,188 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_utils import timeutils
+
+from conveyor.common import loopingcall
+from conveyor import utils
+
+inventory_opts = [
+    cfg.ListOpt('resource_inventory_types',
+                default=['OS::Nova::Server', 'OS::Cinder::Volume'],
+                help='Resource types whose listings are served from a local '
+                     'index of the resources of each project, refreshed in '
+                     'the background. Set to an empty list to always list '
+                     'resources from the services.'),
+    cfg.IntOpt('resource_inventory_sync_interval',
+               default=60,
+               help='Interval in seconds between two refreshes of the '
+                    'resource inventory index'),
+    cfg.IntOpt('resource_inventory_idle_timeout',
+               default=3600,
+               help='Seconds after which the index of a project and type '
+                    'that has not been listed any more is dropped'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(inventory_opts)
+
+LOG = logging.getLogger(__name__)
+
+# Search options that can be answered from the index.
+INDEXED_FILTERS = ('availability_zone', 'status')
+
+# Types that can be refreshed with only the resources changed since the
+# previous refresh, and the status of the resources deleted meanwhile.
+CHANGES_SINCE_TYPES = {'OS::Nova::Server': 'DELETED'}
+
+
+class _InventoryEntry(object):
+    """The indexed resources of one type of one project."""
+
+    def __init__(self, context, res_type):
+        self.context = context
+        self.res_type = res_type
+        # {resource_id: resource}, in the order they were first listed
+        self.items = collections.OrderedDict()
+        # {availability_zone: [resource]}, rebuilt after every change
+        self._by_az = None
+        self.changes_since = None
+        self.last_used = time.time()
+
+    def replace(self, resources):
+        self.items = collections.OrderedDict((r['id'], r) for r in resources)
+        self._by_az = None
+
+    def update(self, resources, deleted_status):
+        for res in resources:
+            if res.get('status') == deleted_status:
+                self.items.pop(res['id'], None)
+            else:
+                self.items[res['id']] = res
+        if resources:
+            self._by_az = None
+
+    def select(self, availability_zone=None):
+        if availability_zone is None:
+            return list(self.items.values())
+        if self._by_az is None:
+            by_az = collections.defaultdict(list)
+            for res in self.items.values():
+                by_az[res.get('availability_zone')].append(res)
+            self._by_az = by_az
+        return self._by_az.get(availability_zone, [])
+
+
+class InventoryIndex(object):
+    """Local index of project resources backing resource listings.
+
+    Every project and type is listed from the service on its first request,
+    then refreshed in the background every resource_inventory_sync_interval
+    seconds with the context of its latest request, fetching only the
+    changes since the previous refresh where the service supports it.
+    Listings are filtered by az and status and paginated from the index.
+
+    :param list_func: callable(context, res_type, search_opts) listing the
+                      resources of a type from its service
+    """
+
+    def __init__(self, list_func):
+        self._list_func = list_func
+        # {(project_id, res_type): _InventoryEntry}
+        self._entries = {}
+        self._timer = None
+
+    def supports(self, res_type, search_opts):
+        return res_type in CONF.resource_inventory_types and \
+            all(k in INDEXED_FILTERS for k in search_opts or {})
+
+    def list(self, context, res_type, search_opts=None, marker=None,
+             limit=None):
+        """List indexed resources.
+
+        Return None if marker is not an indexed resource, so the caller can
+        let the service handle it.
+        """
+        search_opts = search_opts or {}
+        key = (context.project_id, res_type)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = _InventoryEntry(context, res_type)
+            self._sync(entry)
+            self._entries[key] = entry
+            self._start()
+        entry.context = context
+        entry.last_used = time.time()
+
+        resources = entry.select(search_opts.get('availability_zone'))
+        if 'status' in search_opts:
+            status = search_opts['status'].lower()
+            resources = [r for r in resources
+                         if (r.get('status') or '').lower() == status]
+        if marker:
+            ids = [r['id'] for r in resources]
+            if marker not in ids:
+                return None
+            resources = resources[ids.index(marker) + 1:]
+        if limit is not None:
+            resources = resources[:int(limit)]
+        return resources
+
+    def refresh(self):
+        """Refresh all the indexes, dropping the idle or failing ones."""
+        now = time.time()
+        entries = []
+        for key, entry in list(self._entries.items()):
+            if now - entry.last_used > CONF.resource_inventory_idle_timeout:
+                LOG.debug("Drop idle resource index of %s.", key)
+                del self._entries[key]
+            else:
+                entries.append((key, entry))
+
+        def _refresh(key_entry):
+            key, entry = key_entry
+            try:
+                self._sync(entry)
+            except Exception as e:
+                # most likely the token of the context expired, the next
+                # request lists the resources again with its own context
+                LOG.warning("Refresh resource index of %(key)s failed, "
+                            "drop it: %(err)s", {'key': key, 'err': e})
+                self._entries.pop(key, None)
+
+        utils.concurrent_map(_refresh, entries, CONF.resource_list_workers)
+
+    def _sync(self, entry):
+        started = timeutils.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+        deleted_status = CHANGES_SINCE_TYPES.get(entry.res_type)
+        if entry.changes_since and deleted_status:
+            changes = self._list_func(
+                entry.context, entry.res_type,
+                {'changes-since': entry.changes_since})
+            entry.update(changes or [], deleted_status)
+        else:
+            entry.replace(self._list_func(entry.context, entry.res_type,
+                                          {}) or [])
+        entry.changes_since = started
+
+    def _start(self):
+        if self._timer is None:
+            self._timer = loopingcall.FixedIntervalLoopingCall(self.refresh)
+            interval = CONF.resource_inventory_sync_interval
+            self._timer.start(interval=interval, initial_delay=interval)
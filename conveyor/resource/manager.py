@@ -15,15 +15,19 @@
 #    under the License.
 
 import copy
+import hashlib
 import json
 import numbers
 import six
+import time
 
+import eventlet
 from oslo_config import cfg
 from oslo_log import log as logging
 import oslo_messaging as messaging
 from oslo_utils import uuidutils
 
+from conveyor.common import vgw_registry
 from conveyor import compute
 from conveyor.conveyorheat.api import api as heat
 from conveyor.db import api as db_api
@@ -39,10 +43,32 @@ from conveyor.resource.driver.networks import NetworkResource
 from conveyor.resource.driver.secgroup import SecGroup
 from conveyor.resource.driver.stacks import StackResource
 from conveyor.resource.driver import volumes
+from conveyor.resource import inventory
 from conveyor.resource import resource
+from conveyor import utils
 from conveyor import volume
 
+resource_opts = [
+    cfg.IntOpt('resource_list_workers',
+               default=8,
+               help='Maximum number of concurrent listings issued while '
+                    'expanding the clone objects of a plan'),
+    cfg.IntOpt('resources_topo_cache_time',
+               default=600,
+               help='Seconds the topology built for a plan is returned '
+                    'again while neither the plan nor its cloned resources '
+                    'change, so changes of the resources listed for it '
+                    'show after at most as long. Finished topology jobs '
+                    'are kept as long.'),
+    cfg.IntOpt('resources_topo_cache_size',
+               default=128,
+               help='Maximum number of plan topologies, and of indexes of '
+                    'the cloned resources of a plan, kept in memory. The '
+                    'least recently used are dropped first.'),
+]
+
 CONF = cfg.CONF
+CONF.register_opts(resource_opts)
 
 LOG = logging.getLogger(__name__)
 
@@ -54,11 +80,15 @@ PROJECT_CLONE_RESOURCES_TYPE = ("OS::Nova::Server",
 
 AZ_CLONE_RESOURCES_TYPE = ("OS::Nova::Server",)
 
+TOPO_JOB_BUILDING = 'building'
+TOPO_JOB_FINISHED = 'finished'
+TOPO_JOB_ERROR = 'error'
+
 
 class ResourceManager(manager.Manager):
     """Get detail resource."""
 
-    target = messaging.Target(version='1.18')
+    target = messaging.Target(version='1.20')
 
     # How long to wait in seconds before re-issuing a shutdown
     # signal to a instance during power off.  The overall
@@ -74,6 +104,20 @@ class ResourceManager(manager.Manager):
         self.heat_api = heat.API()
         self.original_heat_api = original_heat.API()
         self.db_api = db_api
+        # {(plan_id, src_az, des_az): (key, topo)}
+        self._topo_cache = utils.LRUCache(
+            lambda: CONF.resources_topo_cache_size)
+        # {(plan_id, des_az): (key, {resource_id: set(dependency_ids)})}
+        self._cloned_index_cache = utils.LRUCache(
+            lambda: CONF.resources_topo_cache_size)
+        # {(plan_id, az_map items): (plan version, built time, topo)}
+        self._topo_results = utils.LRUCache(
+            lambda: CONF.resources_topo_cache_size)
+        # {job_id: job}
+        self._topo_jobs = {}
+        # {((plan_id, az_map items), plan version): job_id}
+        self._topo_building = {}
+        self._inventory = inventory.InventoryIndex(self._list_resources)
 
         super(ResourceManager, self).__init__(service_name=
                                               "conveyor-resource",
@@ -133,6 +177,18 @@ class ResourceManager(manager.Manager):
             LOG.error("The resource type is empty.")
             raise exception.ResourceTypeNotFound()
 
+        if self._inventory.supports(res_type, search_opts):
+            res = self._inventory.list(context, res_type,
+                                       search_opts=search_opts,
+                                       marker=marker, limit=limit)
+            if res is not None:
+                return res
+
+        return self._list_resources(context, res_type, search_opts,
+                                    marker=marker, limit=limit)
+
+    def _list_resources(self, context, res_type, search_opts, marker=None,
+                        limit=None):
         if res_type == "OS::Nova::Server":
             res = self.nova_api.get_all_servers(context,
                                                 search_opts=search_opts,
@@ -183,6 +239,109 @@ class ResourceManager(manager.Manager):
     def build_resources_topo(self, context, plan_id,
                              availability_zone_map,
                              search_opts=None):
+        result_key, version = self._get_topo_version(context, plan_id,
+                                                     availability_zone_map)
+        topo = self._get_cached_topo(result_key, version)
+        if topo is None:
+            topo = self._compute_resources_topo(context, plan_id,
+                                                availability_zone_map)
+            self._cache_topo(result_key, version, topo)
+        return topo
+
+    def start_resources_topo_job(self, context, plan_id,
+                                 availability_zone_map, search_opts=None):
+        """Build the topology of a plan in the background.
+
+        Return the job at once, the resources of the plan are listed by
+        the job. It is already finished, with the topo, if the plan did not
+        change since its topology was last built, and a job building the
+        same topology is shared by all its requests.
+        """
+        self._prune_topo_jobs()
+        result_key, version = self._get_topo_version(context, plan_id,
+                                                     availability_zone_map)
+        job_id = self._topo_building.get((result_key, version))
+        if job_id:
+            return self._topo_job_view(self._topo_jobs[job_id])
+
+        job = {'id': '%s@%s' % (uuidutils.generate_uuid(), self.host),
+               'plan_id': plan_id,
+               'status': TOPO_JOB_BUILDING,
+               'updated_at': time.time()}
+        self._topo_jobs[job['id']] = job
+        topo = self._get_cached_topo(result_key, version)
+        if topo is not None:
+            job.update(status=TOPO_JOB_FINISHED, topo=topo)
+            return self._topo_job_view(job)
+
+        self._topo_building[(result_key, version)] = job['id']
+        eventlet.spawn_n(self._run_topo_job, context, job, result_key,
+                         version, availability_zone_map)
+        return self._topo_job_view(job)
+
+    def get_resources_topo_job(self, context, job_id):
+        job = self._topo_jobs.get(job_id)
+        if job is None:
+            raise exception.ResourcesTopoJobNotFound(job_id=job_id)
+        return self._topo_job_view(job)
+
+    def _run_topo_job(self, context, job, result_key, version,
+                      availability_zone_map):
+        try:
+            topo = self._compute_resources_topo(context, job['plan_id'],
+                                                availability_zone_map)
+            self._cache_topo(result_key, version, topo)
+            job.update(status=TOPO_JOB_FINISHED, topo=topo)
+        except Exception as e:
+            LOG.exception("Build topo of plan %s failed.", job['plan_id'])
+            job.update(status=TOPO_JOB_ERROR, error=unicode(e))
+        finally:
+            job['updated_at'] = time.time()
+            self._topo_building.pop((result_key, version), None)
+
+    def _topo_job_view(self, job):
+        return dict((k, v) for k, v in job.items() if k != 'updated_at')
+
+    def _prune_topo_jobs(self):
+        expired = time.time() - CONF.resources_topo_cache_time
+        for job_id, job in list(self._topo_jobs.items()):
+            if job['status'] != TOPO_JOB_BUILDING and \
+                    job['updated_at'] < expired:
+                del self._topo_jobs[job_id]
+
+    def _get_topo_version(self, context, plan_id, availability_zone_map):
+        """Return the key of the topo of a plan and the plan version.
+
+        The version only holds the rows of the plan and of the resources it
+        cloned, so it is checked without asking any service. The topology
+        follows the clone objects and the resources cloned at once, and the
+        live state of the listed resources after resources_topo_cache_time.
+        """
+        plan_info = db_api.plan_get(context, plan_id)
+        cloned_resources = db_api.plan_cloned_resource_get(context, plan_id)
+        result_key = (plan_id,
+                      tuple(sorted((availability_zone_map or {}).items())))
+        version = (plan_info.get('updated_at'),
+                   json.dumps(plan_info.get('clone_resources'),
+                              sort_keys=True),
+                   tuple((r.get('id'), r.get('updated_at'))
+                         for r in cloned_resources))
+        return result_key, version
+
+    def _get_cached_topo(self, result_key, version):
+        cached = self._topo_results.get(result_key)
+        if cached and cached[0] == version and \
+                time.time() - cached[1] < CONF.resources_topo_cache_time:
+            LOG.debug("Reuse cached topo of plan %s.", result_key[0])
+            return copy.deepcopy(cached[2])
+        return None
+
+    def _cache_topo(self, result_key, version, topo):
+        self._topo_results[result_key] = (version, time.time(),
+                                          copy.deepcopy(topo))
+
+    def _compute_resources_topo(self, context, plan_id,
+                                availability_zone_map):
         # 1. query clone obj from plan
         plan_info = db_api.plan_get(context, plan_id)
         clone_objs = plan_info.get('clone_resources', [])
@@ -202,51 +361,82 @@ class ResourceManager(manager.Manager):
         original_resources, original_dep = \
             self._build_reources_topo(context, resources)
         self._add_stack_resources_to_original_resources(original_resources)
-        # 4. query already cloned resources
+        # 4. calculate increment resources of every az pair, and
+        # 5. the non-az resources increment at last
         topo_result = []
-        for src_az, des_az in availability_zone_map.items():
-            az_original_resources = \
-                self._get_resources_by_az(original_resources,
-                                          original_dep,
-                                          src_az)
-
-            az_cloned_resources = \
-                db_api.plan_cloned_resource_get(context, plan_id,
-                                                availability_zone=des_az)
-            az_cloned_deps = []
-            for az_cloned_resource in az_cloned_resources:
-                az_cloned_dep = az_cloned_resource.get('dependencies', [])
-                # cloning include the same resources,
-                # only dependencies different in two clones,
-                # so save same resources in two times(eg,
-                # save [{vm0, dependencies[vo1]}] in first clone,
-                # save [{vm0, dependencies[vo2]}] in second clone.
-                # as result, add info to az_cloned_deps must combine
-                # the same resources info like as
-                # [{vm0, dependencies[vo1,vo2]}]
-                self._combine_resources(az_cloned_deps, az_cloned_dep)
-            # 5. calculate increment resources
-            az_topo_result = self._calculate_increment_resources(
-                                            az_original_resources,
-                                            az_cloned_deps)
+        az_pairs = list(availability_zone_map.items())
+        az_pairs.append(('non-az', 'non-az'))
+        az_partitions = self._partition_resources_by_az(
+            original_resources, original_dep,
+            [src_az for src_az, des_az in az_pairs])
+        for src_az, des_az in az_pairs:
+            az_original_resources = az_partitions[src_az]
+            az_topo_result = self._get_az_topo_result(context, plan_id,
+                                                      src_az, des_az,
+                                                      az_original_resources)
             self._add_topo_items(topo_result, az_topo_result)
-        # 6. calculate non-az resources increment
-        non_az_original_reses = \
-            self._get_resources_by_az(original_resources,
-                                      original_dep, 'non-az')
-        non_az_cloned_resources = \
-            db_api.plan_cloned_resource_get(context, plan_id,
-                                            availability_zone='non-az')
-        non_az_cloned_deps = []
-        for non_az_cloned_resource in non_az_cloned_resources:
-            non_az_cloned_dep = non_az_cloned_resource.get('dependencies', [])
-            self._combine_resources(non_az_cloned_deps, non_az_cloned_dep)
-        non_az_topo_result = self._calculate_increment_resources(
-                                        non_az_original_reses,
-                                        non_az_cloned_deps)
-        self._add_topo_items(topo_result, non_az_topo_result)
         return topo_result
 
+    def _get_az_topo_result(self, context, plan_id, src_az, des_az,
+                            az_original_resources):
+        """Return the increment topo of one az pair of the plan.
+
+        The last result of every (plan, source az, destination az) is
+        cached, it is reused until the cloned resources of the plan in the
+        destination az or the original resources of the source az change.
+        """
+        cloned_index, cloned_key = \
+            self._get_cloned_resources_index(context, plan_id, des_az)
+        original_key = self._resources_index_key(az_original_resources)
+        cache_key = (plan_id, src_az, des_az)
+        cached = self._topo_cache.get(cache_key)
+        if cached and cached[0] == (cloned_key, original_key):
+            LOG.debug("Reuse cached topo of plan %s (%s -> %s).",
+                      plan_id, src_az, des_az)
+            return copy.deepcopy(cached[1])
+        az_topo_result = self._calculate_increment_resources(
+            az_original_resources, cloned_index)
+        self._topo_cache[cache_key] = ((cloned_key, original_key),
+                                       copy.deepcopy(az_topo_result))
+        return az_topo_result
+
+    def _get_cloned_resources_index(self, context, plan_id,
+                                    availability_zone):
+        """Index cloned resources of the plan in a destination az.
+
+        cloning include the same resources, only dependencies different
+        in two clones, so the same resource is saved several times(eg,
+        save [{vm0, dependencies[vo1]}] in first clone, save [{vm0,
+        dependencies[vo2]}] in second clone). The index combines them as
+        {vm0: set([vo1, vo2])}.
+
+        :returns: the index and the key of the PlanClonedResources rows
+                  it is built from.
+        """
+        cloned_resources = db_api.plan_cloned_resource_get(
+            context, plan_id, availability_zone=availability_zone)
+        cloned_key = tuple((r.get('id'), r.get('updated_at'))
+                           for r in cloned_resources)
+        cache_key = (plan_id, availability_zone)
+        cached = self._cloned_index_cache.get(cache_key)
+        if cached and cached[0] == cloned_key:
+            return cached[1], cloned_key
+
+        cloned_index = {}
+        for cloned_resource in cloned_resources:
+            for cloned_dep in cloned_resource.get('dependencies') or []:
+                dep_ids = cloned_index.setdefault(cloned_dep.get('id'),
+                                                  set())
+                dep_ids.update(d.get('id') for d in
+                               cloned_dep.get('dependencies', []))
+        self._cloned_index_cache[cache_key] = (cloned_key, cloned_index)
+        return cloned_index, cloned_key
+
+    def _resources_index_key(self, resources):
+        """Digest of resources, changes when any resource or dependency does.
+        """
+        return hashlib.md5(json.dumps(resources, sort_keys=True)).hexdigest()
+
     def build_resources(self, context, resources):
         return self._build_reources_topo(context, resources)
 
@@ -479,33 +669,34 @@ class ResourceManager(manager.Manager):
 
     def _fliter_resources_by_stack(self, stack_resources, resouces):
         """remove resource in resources, which in stack_reosurces"""
-        res_list = []
-        for res in resouces:
-            if res not in stack_resources:
-                res_list.append(res)
-        return res_list
+        stack_resources = set(stack_resources)
+        return [res for res in resouces if res not in stack_resources]
 
     def _list_clone_resources(self, context, clone_objs):
 
         if not clone_objs:
             return
 
-        clone_res_map = {}
-        for obj in clone_objs:
+        def _list_clone_obj(obj):
             obj_id = obj.get('obj_id')
             obj_type = obj.get('obj_type')
             if obj_type == 'project':
-                clone_res = self._list_project_resources(context, obj_id)
+                return self._list_project_resources(context, obj_id)
             elif obj_type == 'availability_zone':
-                clone_res = self._list_availability_zone_resources(context,
-                                                                   obj_id)
+                return self._list_availability_zone_resources(context,
+                                                              obj_id)
             elif obj_type == 'OS::Heat::Stack':
-                clone_res = self._list_stack_resources(context, obj_id)
+                return self._list_stack_resources(context, obj_id)
             else:
-                reses = []
                 res = self.get_resource_detail(context, obj_type, obj_id)
-                reses.append(res)
-                clone_res = {obj_type: reses}
+                return {obj_type: [res]}
+
+        # list every clone object concurrently, results keep the order
+        # of clone_objs so the merged map is the same as a serial listing
+        clone_res_list = utils.concurrent_map(_list_clone_obj, clone_objs,
+                                              CONF.resource_list_workers)
+        clone_res_map = {}
+        for clone_res in clone_res_list:
             # if clone_res_map has updated one type resources,
             # then add the same type resources to the type resources
             # list, cloud not clone_res_map.update to recover already
@@ -517,45 +708,51 @@ class ResourceManager(manager.Manager):
                     clone_res_map.update({c_key: c_res})
         return clone_res_map
 
+    def _list_resources_by_types(self, context, res_types, search_opts):
+        """List resources of every type concurrently, keyed by type."""
+
+        def _list_type(res_type):
+            # list from the services rather than the inventory index, so
+            # resources created since its last refresh are not missed
+            return self._list_resources(context, res_type,
+                                        dict(search_opts))
+
+        reses_list = utils.concurrent_map(_list_type, res_types,
+                                          CONF.resource_list_workers)
+        return dict(zip(res_types, reses_list))
+
     def _list_project_resources(self, context, project_id):
 
         search_opts = {}
         search_opts['project_id'] = project_id
         search_opts['tenant_id'] = project_id
-        project_resources_map = {}
-
-        for res_type in PROJECT_CLONE_RESOURCES_TYPE:
-            search_opts['type'] = res_type
-            reses = self.get_resources(context, search_opts=search_opts)
-            project_resources_map[res_type] = reses
-        return project_resources_map
+        return self._list_resources_by_types(context,
+                                             PROJECT_CLONE_RESOURCES_TYPE,
+                                             search_opts)
 
     def _list_availability_zone_resources(self, context, availability_zone):
 
         search_opts = {}
         search_opts['availability_zone'] = availability_zone
-        az_resources_map = {}
-
-        for res_type in AZ_CLONE_RESOURCES_TYPE:
-            search_opts['type'] = res_type
-            reses = self.get_resources(context, search_opts=search_opts)
-            az_resources_map[res_type] = reses
-        return az_resources_map
+        return self._list_resources_by_types(context,
+                                             AZ_CLONE_RESOURCES_TYPE,
+                                             search_opts)
 
     def _list_stack_resources(self, context, stack_id):
         # query resources in stack
         stack_reses = self.original_heat_api.resources_list(context, stack_id)
+
+        def _get_detail(stack_res):
+            return self.get_resource_detail(context,
+                                            stack_res.resource_type,
+                                            stack_res.physical_resource_id)
+
+        clone_reses = utils.concurrent_map(_get_detail, stack_reses,
+                                           CONF.resource_list_workers)
         clone_reses_map = {}
-        for stack_res in stack_reses:
+        for stack_res, clone_res in zip(stack_reses, clone_reses):
             res_type = stack_res.resource_type
-            res_id = stack_res.physical_resource_id
-            clone_res = self.get_resource_detail(context, res_type, res_id)
-            if res_type in clone_reses_map.keys():
-                clone_reses_map[res_type].append(clone_res)
-            else:
-                clone_reses = []
-                clone_reses.append(clone_res)
-                clone_reses_map[res_type] = clone_reses
+            clone_reses_map.setdefault(res_type, []).append(clone_res)
         # query stack information
         stack_info = self.get_resource_detail(context,
                                               'OS::Heat::Stack',
@@ -563,147 +760,112 @@ class ResourceManager(manager.Manager):
         clone_reses_map['OS::Heat::Stack'] = [stack_info]
         return clone_reses_map
 
-    def _get_resources_by_az(self, resources, dependencies, availability_zone):
-        az_resources = []
-        if not resources:
-            return az_resources
-
-        # add dependencies resource to az_resources
-        def _add_dependencies(depend):
-            deps = depend.get('dependencies', [])
-            if not deps:
-                return
-            for dep in deps:
-                s = dependencies.get(dep.get("name"))
-                flag, rs = \
-                    self._is_resource_exist(s.get('id', ''), az_resources)
-                if not flag:
-                    a_s = copy.deepcopy(s)
-                    az_resources.append(a_s)
-                    _add_dependencies(s)
+    def _partition_resources_by_az(self, resources, dependencies,
+                                   availability_zones):
+        """Split the topology into the resources needed by every az.
+
+        A resource belongs to its own az, a stack to the azs of all its
+        resources, and everything a resource depends on belongs to the same
+        azs. The topology is walked once per az, visiting every resource at
+        most once.
 
+        :return: {availability_zone: [dependency dict]}, in the same order
+                 as a depth-first walk from the resources of the az.
+        """
+        roots = dict((az, []) for az in availability_zones)
+        if not resources:
+            return roots
         for r_n, res in resources.items():
             properties = res.get('properties', {})
-            az = properties.get('availability_zone', 'non-az')
-            res_type = res.get('type', '')
-            az_list = []
-            if 'OS::Heat::Stack' == res_type:
-                stack_temp = res.get('properties', {}).get('template', {})
+            res_azs = set([properties.get('availability_zone', 'non-az')])
+            if 'OS::Heat::Stack' == res.get('type', ''):
+                stack_temp = properties.get('template', {})
                 p_dict = json.loads(stack_temp)
                 stack_res = p_dict.get('resources', {})
-                az_list = self._get_stack_resources_az_list(stack_res)
-            if az == availability_zone or availability_zone in az_list:
-                depend = dependencies.get(r_n, None)
-                if depend:
-                    flag, rs = \
-                        self._is_resource_exist(depend.get('id', ''),
-                                                az_resources)
-                    if not flag:
-                        a_dep = copy.deepcopy(depend)
-                        az_resources.append(a_dep)
-                        _add_dependencies(depend)
-        return az_resources
+                res_azs.update(self._get_stack_resources_az_list(stack_res))
+            if r_n not in dependencies:
+                continue
+            for az in res_azs:
+                if az in roots:
+                    roots[az].append(r_n)
+
+        partitions = {}
+        for az, names in roots.items():
+            az_resources = []
+            seen = set()
+            for name in self._walk_dependencies(dependencies, names):
+                depend = dependencies[name]
+                res_id = depend.get('id', '')
+                if res_id not in seen:
+                    seen.add(res_id)
+                    az_resources.append(copy.deepcopy(depend))
+            partitions[az] = az_resources
+        return partitions
+
+    def _walk_dependencies(self, dependencies, names):
+        """Return names and all they depend on, in depth-first order.
+
+        Every resource is visited once, however many of names depend on it.
+        """
+        walked = []
+        seen = set()
+
+        def _walk(n):
+            seen.add(n)
+            walked.append(n)
+            for dep in dependencies[n].get('dependencies', []):
+                dep_name = dep.get('name')
+                if dep_name in dependencies and dep_name not in seen:
+                    _walk(dep_name)
+
+        for name in names:
+            if name not in seen:
+                _walk(name)
+        return walked
 
     def _calculate_increment_resources(self, original_resources,
-                                       cloned_resources):
+                                       cloned_index):
         """Returns original_resources list after setting
            cloned resources as is_clone is true, and other is false
 
         :param original_resources: list<resource.ResourceDenpendency.dict()>
-        :param cloned_resources: list<resource.ResourceDenpendency.dict()>
+        :param cloned_index: {resource_id: set(dependency_ids)} of cloned
+                             resources, see _get_cloned_resources_index
 
         :return: resources of all original_resources when setting is_cloned.
         """
         ors_cloned = []
         ors_new = []
-        result = []
         for ors in original_resources:
-            ors_id = ors.get('id')
-            ors_deps = ors.get('dependencies', [])
-            flag, cls_res = \
-                self._is_resource_exist(ors_id, cloned_resources)
-            if flag:
-                ors['is_cloned'] = True
+            cls_dep_ids = cloned_index.get(ors.get('id'))
+            is_cloned = cls_dep_ids is not None
+            ors['is_cloned'] = is_cloned
+            for ors_dep in ors.get('dependencies', []):
+                ors_dep['is_cloned'] = \
+                    is_cloned and ors_dep.get('id') in cls_dep_ids
+            if is_cloned:
                 ors_cloned.append(ors)
-                cls_res_deps = cls_res.get('dependencies', [])
-                for ors_dep in ors_deps:
-                    dep_id = ors_dep.get('id')
-                    d_flag, d_res = \
-                        self._is_resource_exist(dep_id, cls_res_deps)
-                    if d_flag:
-                        ors_dep['is_cloned'] = True
-                    else:
-                        ors_dep['is_cloned'] = False
             else:
-                ors['is_cloned'] = False
-                for ors_dep in ors_deps:
-                    ors_dep['is_cloned'] = False
                 ors_new.append(ors)
-
-        result.extend(ors_new)
-        result.extend(ors_cloned)
-        return result
+        return ors_new + ors_cloned
 
     def _add_topo_items(self, topo_list, add_datas):
         """insert add_datas to topo_list, if not exist"""
-        add_temp = []
         if not add_datas:
             return
-        if not topo_list:
-            topo_list.extend(add_datas)
-            return
+        topo_index = dict((item.get('id', ''), item) for item in topo_list)
         for data in add_datas:
             data_id = data.get('id', '')
-            flag = True
-            for topo_item in topo_list:
-                item_id = topo_item.get('id', '')
-                # if add data already exist, is_cloned value
-                # is two data value or
-                if data_id == item_id:
-                    flag = False
-                    data_cloned = data.get('is_cloned', False)
-                    item_cloned = topo_item.get('is_cloned', False)
-                    topo_item['is_cloned'] = data_cloned or item_cloned
-                    break
-            if flag:
-                add_temp.append(data)
-        topo_list.extend(add_temp)
-
-    def _combine_resources(self, resources_list, add_resources):
-        """
-        if item of add_resources has existed in resources_list,
-           only combine dependencies of this item, else add item
-           to resources_list
-        """
-        temp_add = []
-        if not add_resources:
-            return
-        if not resources_list:
-            resources_list.extend(add_resources)
-        for add_res in add_resources:
-            flag = True
-            add_res_id = add_res.get('id', '')
-            for exist_res in resources_list:
-                exist_res_id = exist_res.get('id', '')
-                if add_res_id == exist_res_id:
-                    flag = False
-                    add_res_deps = add_res.get('dependencies', [])
-                    exist_res_deps = exist_res.get('dependencies', [])
-                    temp_deps = []
-                    for dep in add_res_deps:
-                        dep_id = dep.get('id', None)
-                        is_est, s_dep = \
-                            self._is_resource_exist(dep_id, exist_res_deps)
-                        if not is_est:
-                            temp_deps.append(dep)
-                    # combine dependencies of item
-                    if temp_deps:
-                        exist_res_deps.extend(temp_deps)
-                    break
-            # add item to resources_list after
-            if flag:
-                temp_add.append(add_res)
-        resources_list.extend(temp_add)
+            topo_item = topo_index.get(data_id)
+            # if add data already exist, is_cloned value
+            # is two data value or
+            if topo_item is not None:
+                data_cloned = data.get('is_cloned', False)
+                item_cloned = topo_item.get('is_cloned', False)
+                topo_item['is_cloned'] = data_cloned or item_cloned
+            else:
+                topo_list.append(data)
+                topo_index[data_id] = data
 
     def _build_destination_cloned_resources_dependencies(self, relations,
                                                          dependencies):
@@ -755,20 +917,18 @@ class ResourceManager(manager.Manager):
         """remove conveyor cloned resources in this cloning resources list"""
         if not cloned_resources:
             return
-        cloned_resources_ids = []
+        cloned_resources_ids = set()
         # save all cloned resources to cloned_resources_ids
         for cloned_resource in cloned_resources:
             relations = cloned_resource.get('relation', [])
             for relation in relations:
                 des_id = relation.get('des_resource_id', None)
                 if des_id:
-                    cloned_resources_ids.append(des_id)
+                    cloned_resources_ids.add(des_id)
         # remove all cloned to destination az resources in clone_resources
         for r_type, clone_reses in clone_resources.items():
-            for clone_res in clone_reses[:]:
-                res_id = clone_res.get('id', '')
-                if res_id in cloned_resources_ids:
-                    clone_reses.remove(clone_res)
+            clone_reses[:] = [r for r in clone_reses
+                              if r.get('id', '') not in cloned_resources_ids]
 
     def _add_stack_resources_to_original_resources(self, origial_resources):
         """if original resources include stack, add resources in stack to
@@ -794,14 +954,6 @@ class ResourceManager(manager.Manager):
                 az_list.append(az)
         return az_list
 
-    def _is_resource_exist(self, res_id, cloned_resources):
-        if not cloned_resources:
-            return False, None
-        for res in cloned_resources:
-            if res.get('id') == res_id:
-                return True, res
-        return False, None
-
     def _filter_gw_instance(self, instance_ids):
         '''remove gw instances frome clone resources list'''
         if not instance_ids:
@@ -814,18 +966,20 @@ class ResourceManager(manager.Manager):
         return res_id
 
     def _get_gw_instances(self):
-        vgw_dict = {}
-        try:
-            vgw_str = '{' + CONF.vgw_info + '}'
-            vgw_dict = eval(vgw_str)
-        except Exception as e:
-            LOG.warn('read the vgw info error: %s', e)
-        vgw_ids = []
-        for vgw_info in vgw_dict.values():
-            vgw_ids.extend(vgw_info.keys())
-        return vgw_ids
+        return vgw_registry.get_registry().get_vgw_ids()
+
+    def _invalidate_topo_cache(self, plan_id):
+        for cache in (self._topo_cache, self._cloned_index_cache,
+                      self._topo_results):
+            for key in [k for k in cache if k[0] == plan_id]:
+                cache.pop(key, None)
+
+    def invalidate_plan_topo(self, context, plan_id):
+        """Drop the cached topologies of a deleted plan."""
+        self._invalidate_topo_cache(plan_id)
 
     def delete_cloned_resource(self, context, plan_id):
+        self._invalidate_topo_cache(plan_id)
         try:
             plan = db_api.plan_get(context, plan_id)
             self.heat_api.clear_resource(context, plan['stack_id'], plan_id)
@@ -68,6 +68,21 @@ class ResourceAPI(object):
                           availability_zone_map=az_map,
                           search_opts=search_opt)
 
+    def start_resources_topo_job(self, context, plan_id,
+                                 az_map, search_opt=None):
+        cctxt = self.client.prepare(version='1.19')
+        return cctxt.call(context, 'start_resources_topo_job',
+                          plan_id=plan_id,
+                          availability_zone_map=az_map,
+                          search_opts=search_opt)
+
+    def get_resources_topo_job(self, context, job_id):
+        # a job is kept by the conveyor-resource that runs it, whose host
+        # ends the job id
+        host = job_id.rpartition('@')[2] if '@' in job_id else None
+        cctxt = self.client.prepare(version='1.19', server=host)
+        return cctxt.call(context, 'get_resources_topo_job', job_id=job_id)
+
     def get_resource_detail(self, context, resource_type, resource_id):
         cctxt = self.client.prepare(version='1.18')
         return cctxt.call(context, 'get_resource_detail',
@@ -101,3 +116,7 @@ class ResourceAPI(object):
     def delete_cloned_resource(self, context, plan_id):
         cctxt = self.client.prepare(version='1.18')
         return cctxt.cast(context, 'delete_cloned_resource', plan_id=plan_id)
+
+    def invalidate_plan_topo(self, context, plan_id):
+        cctxt = self.client.prepare(fanout=True, version='1.20')
+        cctxt.cast(context, 'invalidate_plan_topo', plan_id=plan_id)
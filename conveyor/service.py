@@ -28,12 +28,12 @@ from oslo_log import log as logging
 import oslo_messaging as messaging
 from oslo_service import service
 from oslo_utils import importutils
-from oslo_utils import timeutils
 import osprofiler.notifier
 from osprofiler import profiler
 import osprofiler.web
 
 from conveyor.common import loopingcall
+from conveyor.common import vgw_registry
 from conveyor import context
 from conveyor import exception
 from conveyor.i18n import _
@@ -41,7 +41,6 @@ from conveyor.i18n import _LE
 from conveyor.i18n import _LI
 from conveyor.i18n import _LW
 from conveyor import rpc
-from conveyor import utils
 from conveyor import version
 from conveyor import wsgi
 
@@ -412,15 +411,8 @@ class WSGIService(service.Service):
         # self.timers.append(periodic)
 
     def _update_vgw(self):
-        config_vaule = CONF.vgw_info
-        config_value_str = '{' + config_vaule + '}'
-        config_value_dict = eval(config_value_str)
-        LOG.debug('begin update vgw_info')
-        for key, value in utils.vgw_update_time.items():
-            update_time = timeutils.parse_isotime(str(value))
-            if timeutils.is_older_than(update_time, 20):
-                LOG.debug('the server %s too long not updated' % key)
-                utils.remove_vgw_info(key, 'vgw_info', config_value_dict)
+        LOG.debug('begin update vgw registry')
+        vgw_registry.get_registry().refresh()
 
     def stop(self):
         """Stop serving this API.
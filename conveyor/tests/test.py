@@ -20,6 +20,9 @@ Allows overriding of flags for use of fakes, and some black magic for
 inline callbacks.
 
 """
+
+from __future__ import absolute_import
+
 import contextlib
 
 import datetime
@@ -15,6 +15,8 @@
 #    under the License.
 
 import mock
+import yaml
+import zlib
 
 from six.moves import http_client
 
@@ -51,6 +53,32 @@ class PlanActionControllerTestCase(test.TestCase):
         rsp = self.controller._download_template(req, plan_id, body)
         self.assertEqual('fake-content', rsp)
 
+    @mock.patch.object(clone_api.API, 'download_template')
+    @mock.patch.object(db_api, 'plan_template_get')
+    @mock.patch.object(db_api, 'plan_get')
+    def test_download_template_stream(self, mock_get_plan_by_id,
+                                      mock_template_get,
+                                      mock_download_template):
+        plan_id = fake.PLAN_ID
+        template = {'heat_template_version': '2013-05-23',
+                    'resources': {'server_0': {'type': 'OS::Nova::Server'},
+                                  'volume_0': {'type': 'OS::Cinder::Volume'}}}
+        mock_get_plan_by_id.return_value = res_fakes.create_fake_plan(plan_id)
+        mock_template_get.return_value = {'template': template}
+        req = fakes.HTTPRequest.blank('/v1/plans/%s/action' + plan_id)
+        body = {'download_template': {'stream': True, 'format': 'yaml'}}
+        rsp = self.controller._download_template(req, plan_id, body)
+        self.assertEqual('application/x-yaml', rsp.content_type)
+        self.assertEqual(template, yaml.safe_load(rsp.body))
+
+        req.headers['Accept-Encoding'] = 'gzip, deflate'
+        body = {'download_template': {'stream': True}}
+        rsp = self.controller._download_template(req, plan_id, body)
+        self.assertEqual('gzip', rsp.content_encoding)
+        self.assertEqual(template, yaml.safe_load(
+            zlib.decompress(rsp.body, 16 + zlib.MAX_WBITS)))
+        self.assertFalse(mock_download_template.called)
+
     @mock.patch.object(plan_api.PlanAPI,
                        'update_plan', return_value=None)
     def test_reset_state(self, mock_update_plan):
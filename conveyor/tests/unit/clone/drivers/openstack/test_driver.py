@@ -12,6 +12,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
+
 import mock
 
 from conveyor.clone.drivers import driver as base_driver
@@ -73,6 +75,47 @@ class OpenstackDriverTestCase(test.TestCase):
                 self.context, res_map['server_0'], res_map,
                 False, True, undo_mgr))
 
+    @mock.patch.object(birdiegatewayclient, 'get_birdiegateway_client')
+    def test_add_extra_properties_for_server_query_disks_once(self,
+                                                              mock_client):
+        template = copy.deepcopy(fake_constants.FAKE_INSTANCE_TEMPLATE[
+            'template'])
+        server = template['resources']['server_0']
+        server['extra_properties']['vm_state'] = 'active'
+        server['extra_properties'].pop('gw_url')
+        server['properties']['block_device_mapping_v2'].append(
+            {'boot_index': 1, 'volume_id': {'get_resource': 'volume_2'},
+             'device_name': '/dev/vdb'})
+        volume_2 = copy.deepcopy(template['resources']['volume_1'])
+        volume_2['id'] = volume_2['extra_properties']['id'] = 'volume2'
+        template['resources']['volume_2'] = volume_2
+        res_map = {}
+        for key, value in template['resources'].items():
+            res_map[key] = resource.Resource.from_dict(value)
+        self.flags(migrate_net_map={'az03.dc1--fusionsphere': 'net0'})
+        self.manager.compute_api.interface_attach = mock.Mock()
+        self.manager.compute_api.interface_attach.return_value._info = {
+            'fixed_ips': [{'ip_address': '10.0.0.5'}], 'port_id': 'port0'}
+        self.manager._await_port_status = mock.Mock()
+        vservices = mock_client.return_value.vservices
+        vservices.get_disks_info.return_value = {
+            '/dev/vda': {'disk_format': 'ext4', 'mount_point': '/',
+                         'dev_name': '/dev/sda'},
+            '/dev/vdb': {'disk_format': 'xfs', 'mount_point': '/data',
+                         'dev_name': None}}
+        self.manager.add_extra_properties_for_server(
+            self.context, res_map['server_0'], res_map, True, True,
+            utils.UndoManager())
+        vservices.get_disks_info.assert_called_once_with(
+            [('/dev/vda', res_map['volume_1'].id), ('/dev/vdb', 'volume2')])
+        self.assertFalse(vservices.get_disk_format.called)
+        self.assertEqual('/dev/sda',
+                         res_map['volume_1'].extra_properties['sys_dev_name'])
+        self.assertEqual('/data',
+                         res_map['volume_2'].extra_properties['mount_point'])
+        self.assertEqual('/dev/vdb',
+                         res_map['volume_2'].extra_properties['sys_dev_name'])
+
     def test_add_extra_properties_for_stack(self):
         undo_mgr = utils.UndoManager()
         template = fake_constants.FAKE_PLAN['updated_resources']
@@ -89,7 +132,8 @@ class OpenstackDriverTestCase(test.TestCase):
                 self.context, stack, False, True, undo_mgr
             ))
 
-    @mock.patch.object(base_driver.BaseDriver, '_wait_for_volume_status')
+    @mock.patch.object(base_driver.BaseDriver, '_await_volumes_status',
+                       return_value=[])
     @mock.patch.object(birdiegatewayclient, 'get_birdiegateway_client')
     def test_handle_server_after_clone(self, mock_client, mock_wait):
         template = \
@@ -126,3 +170,66 @@ class OpenstackDriverTestCase(test.TestCase):
             self.manager.handle_stack_after_clone(
                 self.context, template, {}
             ))
+
+    @mock.patch.object(common.ResourceCommon, '_await_instance_status')
+    @mock.patch.object(base_driver.BaseDriver, '_await_volumes_status',
+                       return_value=[])
+    @mock.patch.object(birdiegatewayclient, 'get_birdiegateway_client')
+    def test_handle_servers_after_clone_share_vgw(self, mock_client,
+                                                  mock_wait, mock_await):
+        resources = {}
+        for i in range(3):
+            resources['server_%d' % i] = {
+                'type': 'OS::Nova::Server',
+                'properties': {'block_device_mapping_v2': [{
+                    'boot_index': 1,
+                    'volume_id': {'get_resource': 'volume_%d' % i},
+                    'device_name': '/dev/vdb'}]},
+                'extra_properties': {'vm_state': 'stopped',
+                                     'gw_id': 'vgw0',
+                                     'id': 'server%d' % i}}
+            resources['volume_%d' % i] = {
+                'type': 'OS::Cinder::Volume',
+                'properties': {},
+                'extra_properties': {'is_deacidized': True,
+                                     'copy_data': True,
+                                     'gw_url': '10.0.0.1:9998',
+                                     'id': 'volume%d' % i}}
+        servers = [resources['server_%d' % i] for i in range(3)]
+        self.manager.compute_api = mock.Mock()
+        self.flags(is_active_detach_volume=False)
+        self.manager.handle_servers_after_clone(self.context, servers,
+                                                resources)
+        self.manager.compute_api.stop_server.assert_called_once_with(
+            self.context, 'vgw0')
+        self.manager.compute_api.start_server.assert_called_once_with(
+            self.context, 'vgw0')
+        self.assertEqual(3,
+                         self.manager.compute_api.detach_volume.call_count)
+        self.manager.compute_api.attach_volume.assert_any_call(
+            self.context, 'server1', 'volume1', '/dev/vdb')
+        # one shared wait for the detaches and one for the attaches
+        self.assertEqual(2, mock_wait.call_count)
+        self.assertEqual(
+            sorted([('volume%d' % i, 'server%d' % i, 'in-use')
+                    for i in range(3)]),
+            sorted(mock_wait.call_args_list[1][0][1]))
+
+    def test_reset_resources_state(self):
+        stack = fake_constants.FAKE_PLAN['updated_resources']['stack_0']
+        resources = {
+            'server_0': {'type': 'OS::Nova::Server',
+                         'extra_properties': {'id': 'server0',
+                                              'vm_state': 'stopped'}},
+            'volume_0': {'type': 'OS::Cinder::Volume',
+                         'extra_properties': {'id': 'volume0',
+                                              'status': 'available'}},
+            'stack_0': stack}
+        self.manager.compute_api = mock.Mock()
+        self.manager.volume_api = mock.Mock()
+        self.manager.volume_api.reset_state.side_effect = Exception()
+        self.manager._reset_resources_state(self.context, resources)
+        self.manager.compute_api.reset_state.assert_any_call(
+            self.context, 'server0', 'stopped')
+        self.manager.volume_api.reset_state.assert_any_call(
+            self.context, 'volume0', 'available')
@@ -23,6 +23,7 @@ from conveyor.tests import test
 from conveyor.tests.unit import fake_constants
 
 from conveyor import context
+from conveyor import exception
 from conveyor import utils
 
 CONF = config.CONF
@@ -116,3 +117,55 @@ class BaseDriverTestCase(test.TestCase):
                 self.context,
                 template['resources']['volume_1'], 'volume_1',
                 template['resources']))
+
+    def test_wait_for_volumes_status(self):
+        polls = {'volume0': iter(['detaching', 'available']),
+                 'volume1': iter(['available'])}
+
+        def _get(context, volume_id):
+            return {'status': next(polls[volume_id]),
+                    'shareable': 'false', 'attachments': []}
+
+        self.flags(check_interval=0)
+        self.manager.volume_api.get = mock.Mock(side_effect=_get)
+        self.manager._wait_for_volumes_status(
+            self.context, [('volume0', 'vgw0', 'available'),
+                           ('volume1', 'vgw0', 'available')])
+        self.assertEqual(3, self.manager.volume_api.get.call_count)
+
+    def test_await_volumes_status_error(self):
+        self.flags(check_interval=0)
+        self.manager.volume_api.get = mock.Mock(
+            return_value={'status': 'error', 'shareable': 'false',
+                          'attachments': []})
+        failures = self.manager._await_volumes_status(
+            self.context, [('volume0', 'vgw0', 'available')])
+        self.assertEqual(1, len(failures))
+        self.assertIsInstance(failures[0][1],
+                              exception.VolumeErrorException)
+
+    def test_add_extra_properties_registers_undo_after_join(self):
+        self.flags(clone_driver_workers=4)
+        res_map = {}
+        for i in range(3):
+            res_map['server_%s' % i] = resource.Resource(
+                'server_%s' % i, 'OS::Nova::Server', 'server-%s' % i)
+        undo_mgr = utils.UndoManager()
+
+        def _add_for_server(context, server, resource_map, sys_clone,
+                            copy_data, server_undo_mgr):
+            # nothing is registered on the shared manager while servers
+            # are prepared
+            self.assertEqual([], undo_mgr.undo_stack)
+            server_undo_mgr.undo_with(server.id)
+            if server.id == 'server-1':
+                raise exception.V2vException()
+
+        with mock.patch.object(self.manager,
+                               'add_extra_properties_for_server',
+                               side_effect=_add_for_server):
+            self.assertRaises(exception.V2vException,
+                              self.manager._add_extra_properties,
+                              self.context, res_map, False, True, undo_mgr)
+        self.assertEqual(['server-0', 'server-1', 'server-2'],
+                         sorted(undo_mgr.undo_stack))
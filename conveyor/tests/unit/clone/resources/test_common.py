@@ -64,11 +64,11 @@ class ResourceCommonTestCase(test.TestCase):
     @mock.patch.object(conveyorclient, 'get_birdiegateway_client')
     def test_await_data_trans_status_with_host(self, mock_con_client):
         mock_con_client.return_value = conveyorclient.Client()
-        mock_con_client.return_value.vservices.get_data_trans_status = \
+        mock_con_client.return_value.vservices.get_data_trans_statuses = \
             mock.MagicMock()
         mock_con_client.return_value. \
-            vservices.get_data_trans_status.return_value = \
-            {'body': {'task_state': 'DATA_TRANS_FINISHED'}}
+            vservices.get_data_trans_statuses.return_value = \
+            {123: {'task_state': 'DATA_TRANS_FINISHED'}}
         CONF.set_default('data_transformer_state_retries', 1)
         CONF.set_default('data_transformer_state_retries_interval', 0.1)
         self.manager.plan_api.update_plan = mock.MagicMock()
@@ -82,11 +82,11 @@ class ResourceCommonTestCase(test.TestCase):
     @mock.patch.object(conveyorclient, 'get_birdiegateway_client')
     def test_await_data_trans_status_with_raise(self, mock_con_client):
         mock_con_client.return_value = conveyorclient.Client()
-        mock_con_client.return_value.vservices.get_data_trans_status = \
+        mock_con_client.return_value.vservices.get_data_trans_statuses = \
             mock.MagicMock()
         mock_con_client.return_value. \
-            vservices.get_data_trans_status.return_value = \
-            {'body': {'task_state': 'DATA_TRANSFORMING'}}
+            vservices.get_data_trans_statuses.return_value = \
+            {123: {'task_state': 'DATA_TRANSFORMING'}}
         CONF.set_default('data_transformer_state_retries', 1)
         CONF.set_default('data_transformer_state_retries_interval', 0.1)
         self.manager.plan_api.update_plan = mock.MagicMock()
@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import eventlet
 import mock
 
 from conveyor.clone.resources import common
@@ -22,6 +23,7 @@ from conveyor.tests import test
 from conveyor.tests.unit import fake_constants
 
 from conveyor import context
+from conveyor import exception
 from conveyor import utils
 
 CONF = config.CONF
@@ -71,3 +73,197 @@ class VolumeCloneDriverTestCase(test.TestCase):
             self.context, 'volume_0',
             fake_constants.UPDATED_TEMPLATE['template'],
             set_plan_state=set_plan_state))
+
+    def test_running_source_servers(self):
+        volume_res = {'extra_properties': {'id': 'volume0', 'gw_id': 'vgw0'}}
+        self.manager.cinder_api.get = mock.MagicMock(return_value={
+            'attachments': [{'server_id': 'vgw0'},
+                            {'server_id': 'server0'},
+                            {'server_id': 'server1'}]})
+        server0 = {'id': 'server0', 'OS-EXT-STS:vm_state': 'active'}
+        self.manager.compute_api.get_server = mock.MagicMock(
+            side_effect=[server0,
+                         {'id': 'server1', 'OS-EXT-STS:vm_state': 'stopped'}])
+        self.flags(clone_migrate_type='live', live_clone_precopy_passes=0)
+        self.assertEqual([], self.manager._running_source_servers(
+            self.context, volume_res))
+        self.flags(live_clone_precopy_passes=3)
+        self.assertEqual([server0], self.manager._running_source_servers(
+            self.context, volume_res))
+
+    @mock.patch.object(birdiegatewayclient, 'get_birdiegateway_client')
+    @mock.patch.object(utils, 'get_next_vgw',
+                       return_value=('vgw0', '10.0.0.2'))
+    def test_start_volume_clone_without_incremental_gateway(self, mock_vgw,
+                                                            mock_client):
+        template = fake_constants.UPDATED_TEMPLATE['template']
+        self.flags(is_provide_device_name=False)
+        self.manager.cinder_api = mock.MagicMock()
+        self.manager.compute_api = mock.MagicMock()
+        self.manager._attach_volume_for_device_name = mock.MagicMock(
+            return_value='/dev/vdb')
+        server = {'id': 'server0',
+                  'os-extended-volumes:volumes_attached': [
+                      {'id': '8e330083-d795-4cef-86de-f69a7dd9076a'}]}
+        self.manager._running_source_servers = mock.MagicMock(
+            return_value=[server])
+        mock_client.return_value.vservices.supports_incremental_clone.\
+            return_value = False
+        self.manager._copy_volume_data = mock.MagicMock(return_value={
+            'des_ip': '10.0.0.2', 'des_port': '9998',
+            'copy_tasks': ['task0']})
+        self.manager._live_copy_volume_data = mock.MagicMock()
+        trans_data_wait_fun = mock.MagicMock()
+
+        self.manager.start_volume_clone(
+            self.context, 'volume_0', template,
+            trans_data_wait_fun=trans_data_wait_fun)
+        # the volume is copied in a single pass while its server runs
+        self.assertFalse(self.manager._live_copy_volume_data.called)
+        self.manager._copy_volume_data.assert_called_once_with(
+            self.context, 'volume_0', '10.0.0.2', 'vgw0', template,
+            '/dev/vdb')
+        trans_data_wait_fun.assert_called_once_with(
+            self.context, '10.0.0.2', '9998', ['task0'], mock.ANY, None)
+        self.assertEqual({}, self.manager._quiesce_windows)
+
+
+class LiveCopyVolumeDataTestCase(test.TestCase):
+    def setUp(self):
+        super(LiveCopyVolumeDataTestCase, self).setUp()
+        self.context = context.RequestContext('fake', 'fake', is_admin=False)
+        self.manager = volume.VolumeCloneDriver()
+        self.flags(live_clone_precopy_passes=3,
+                   live_clone_final_sync_seconds=5,
+                   live_clone_converge_ratio=0.8,
+                   live_clone_quiesce_wait_seconds=600,
+                   data_transformer_state_retries_interval=0)
+        # a clock moved by the copies and the stops of the servers
+        self.now = 0
+        self.durations = {}
+        self.events = []
+        time_patcher = mock.patch.object(volume, 'time')
+        mock_time = time_patcher.start()
+        self.addCleanup(time_patcher.stop)
+        mock_time.time.side_effect = lambda: self.now
+        self.stub_out('conveyor.clone.resources.volume.driver.volume.'
+                      'greenthread.sleep', self._fake_sleep)
+        self.stub_out('conveyor.clone.resources.common.ResourceCommon.'
+                      '_await_instance_status',
+                      lambda *args: None)
+        self.manager._copy_volume_data = mock.MagicMock(
+            side_effect=self._fake_copy)
+        self.manager._wait_for_copy_pass = mock.MagicMock()
+        self.manager.compute_api = mock.MagicMock()
+        self.manager.compute_api.stop_server.side_effect = \
+            lambda context, server_id: self._server_event('stop', server_id)
+        self.manager.compute_api.start_server.side_effect = \
+            lambda context, server_id: self._server_event('start', server_id)
+        self.mock_record = mock.MagicMock()
+        self.manager._record_clone_phases = self.mock_record
+        self.template = {'plan_id': 'plan0', 'resources': dict(
+            ('volume_%d' % i,
+             {'type': 'OS::Cinder::Volume',
+              'extra_properties': {'id': 'volume%d' % i}})
+            for i in range(2))}
+
+    def _fake_copy(self, context, resource_name, *args, **kwargs):
+        self.now += self.durations[resource_name].pop(0)
+        self.events.append(('copy', resource_name,
+                            kwargs.get('incremental')))
+        return {'des_ip': '10.0.0.2', 'des_port': '9998',
+                'copy_tasks': ['task0']}
+
+    def _fake_sleep(self, seconds):
+        self.now += 60
+        eventlet.sleep(0)
+
+    def _server_event(self, event, server_id):
+        self.now += 1
+        self.events.append((event, server_id))
+
+    def _server(self, server_id, volume_ids):
+        return {'id': server_id,
+                'os-extended-volumes:volumes_attached':
+                    [{'id': volume_id} for volume_id in volume_ids]}
+
+    def _live_copy(self, resource_name, servers, trans_data_wait_fun=None):
+        keys = self.manager._join_quiesce_windows(
+            'plan0', resource_name, self.template, servers)
+        self.manager._live_copy_volume_data(
+            self.context, resource_name, '10.0.0.2', 'vgw0', self.template,
+            '/dev/vdb', keys, trans_data_wait_fun, 'plan0')
+
+    def test_live_copy_volume_data(self):
+        self.durations['volume_0'] = [100, 50, 10, 2]
+        trans_data_wait_fun = mock.MagicMock()
+        self._live_copy('volume_0', [self._server('server0', ['volume0'])],
+                        trans_data_wait_fun)
+
+        self.assertEqual([('copy', 'volume_0', False),
+                          ('copy', 'volume_0', True),
+                          ('copy', 'volume_0', True),
+                          ('stop', 'server0'),
+                          ('copy', 'volume_0', True),
+                          ('start', 'server0')], self.events)
+        self.assertEqual(3, self.manager._wait_for_copy_pass.call_count)
+        trans_data_wait_fun.assert_called_once_with(
+            self.context, '10.0.0.2', '9998', ['task0'], mock.ANY, 'plan0')
+        phases = [{'phase': 'precopy', 'pass': 1, 'seconds': 100},
+                  {'phase': 'precopy', 'pass': 2, 'seconds': 50,
+                   'duration_ratio': 0.5},
+                  {'phase': 'precopy', 'pass': 3, 'seconds': 10,
+                   'duration_ratio': 0.2},
+                  {'phase': 'final', 'seconds': 2, 'downtime': 3}]
+        self.mock_record.assert_called_once_with(self.context, 'plan0',
+                                                 'volume_0', phases)
+        self.assertEqual({}, self.manager._quiesce_windows)
+
+    def test_server_stopped_once_for_all_its_volumes(self):
+        server = self._server('server0', ['volume0', 'volume1'])
+        self.durations['volume_0'] = [1, 1]
+        self.durations['volume_1'] = [100, 2, 3]
+        threads = [eventlet.spawn(self._live_copy, name, [server])
+                   for name in ('volume_0', 'volume_1')]
+        for thread in threads:
+            thread.wait()
+
+        self.assertEqual([('copy', 'volume_0', False),
+                          ('copy', 'volume_1', False),
+                          ('copy', 'volume_1', True),
+                          ('stop', 'server0'),
+                          ('copy', 'volume_1', True),
+                          ('copy', 'volume_0', True),
+                          ('start', 'server0')], self.events)
+        self.assertEqual({}, self.manager._quiesce_windows)
+
+    def test_server_stopped_without_late_volume(self):
+        server = self._server('server0', ['volume0', 'volume1'])
+        self.durations['volume_0'] = [1, 1]
+        # volume_1 is not ready in time, its server is stopped again
+        self._live_copy('volume_0', [server])
+        self.durations['volume_1'] = [1, 1]
+        self._live_copy('volume_1', [server])
+
+        self.assertEqual([('copy', 'volume_0', False),
+                          ('stop', 'server0'),
+                          ('copy', 'volume_0', True),
+                          ('start', 'server0'),
+                          ('copy', 'volume_1', False),
+                          ('stop', 'server0'),
+                          ('copy', 'volume_1', True),
+                          ('start', 'server0')], self.events)
+        self.assertEqual({}, self.manager._quiesce_windows)
+
+    def test_stop_failure(self):
+        server = self._server('server0', ['volume0'])
+        self.durations['volume_0'] = [1]
+        self.manager.compute_api.stop_server.side_effect = \
+            exception.V2vException(message='stop failed')
+        self.assertRaises(exception.V2vException, self._live_copy,
+                          'volume_0', [server])
+        # the server is started again in case it was stopped
+        self.manager.compute_api.start_server.assert_called_once_with(
+            self.context, 'server0')
+        self.assertFalse(self.mock_record.called)
+        self.assertEqual({}, self.manager._quiesce_windows)
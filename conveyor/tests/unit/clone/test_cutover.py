@@ -0,0 +1,58 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from conveyor.clone import cutover
+from conveyor.tests import test
+
+
+class CutoverTimelineTestCase(test.TestCase):
+    @mock.patch('time.time')
+    def test_downtime(self, mock_time):
+        mock_time.side_effect = [1.0, 2.0, 1.5, 4.0, 3.0, 3.5]
+        timeline = cutover.CutoverTimeline('plan0')
+        with timeline.step('server_0', 'detach_port'):
+            pass
+        with timeline.step('server_1', 'detach_port'):
+            pass
+        self.assertRaises(ValueError, self._failed_step, timeline)
+        self.assertEqual(3, len(timeline.steps))
+        self.assertEqual({'server_0': 2.5, 'server_1': 2.5},
+                         timeline.downtime())
+
+    @mock.patch('time.time')
+    def test_to_dict(self, mock_time):
+        mock_time.side_effect = [1.0, 2.0, 3.0, 3.5, 1.5, 4.0]
+        timeline = cutover.CutoverTimeline('plan0')
+        with timeline.step('server_0', 'detach_port'):
+            pass
+        with timeline.step('server_0', 'attach_port'):
+            pass
+        with timeline.step('server_1', 'detach_port'):
+            pass
+        self.assertEqual(
+            {'server_0': {'downtime': 2.5,
+                          'steps': [{'step': 'detach_port', 'offset': 0.0,
+                                     'seconds': 1.0},
+                                    {'step': 'attach_port', 'offset': 2.0,
+                                     'seconds': 0.5}]},
+             'server_1': {'downtime': 2.5,
+                          'steps': [{'step': 'detach_port', 'offset': 0.0,
+                                     'seconds': 2.5}]}},
+            timeline.to_dict())
+
+    def _failed_step(self, timeline):
+        with timeline.step('server_0', 'attach_port'):
+            raise ValueError()
@@ -0,0 +1,119 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import eventlet
+import mock
+
+from conveyor.clone import image_cache
+from conveyor import context
+from conveyor.db import api as db_api
+from conveyor.tests import test
+
+
+class PlanImageCacheTestCase(test.TestCase):
+    def setUp(self):
+        super(PlanImageCacheTestCase, self).setUp()
+        self.context = context.RequestContext('fake', 'fake', is_admin=False)
+        self.glance_api = mock.Mock()
+        self.his_api = mock.Mock()
+        self.cache = image_cache.PlanImageCache(self.glance_api,
+                                                self.his_api)
+
+    @mock.patch.object(db_api, 'conveyor_config_get')
+    def test_get_az_image_type(self, mock_config_get):
+        mock_config_get.return_value = [{'config_value': 'native'}]
+        self.assertEqual('native',
+                         self.cache.get_az_image_type(self.context, 'az01'))
+        self.assertEqual('native',
+                         self.cache.get_az_image_type(self.context, 'az01'))
+        mock_config_get.return_value = []
+        self.assertIsNone(self.cache.get_az_image_type(self.context, 'az02'))
+        self.assertEqual(2, mock_config_get.call_count)
+
+    def test_get_image_and_hyper_image(self):
+        self.glance_api.get.return_value = {'id': 'image0'}
+        self.his_api.get_hyper_image.return_value = None
+        for i in range(3):
+            self.cache.get_image(self.context, 'image0')
+            self.cache.get_hyper_image(self.context, 'image0')
+        self.glance_api.get.assert_called_once_with(self.context, 'image0')
+        self.his_api.get_hyper_image.assert_called_once_with(self.context,
+                                                             'image0')
+
+    def test_convert_hyper_image_once(self):
+        self.his_api.convert_hyper_image.return_value = 'hyper-image0'
+        self.glance_api.get.return_value = {'status': 'active'}
+        threads = [eventlet.spawn(self.cache.convert_hyper_image,
+                                  self.context, 'image0')
+                   for i in range(3)]
+        self.assertEqual(['hyper-image0'] * 3, [t.wait() for t in threads])
+        self.his_api.convert_hyper_image.assert_called_once_with(
+            self.context, original_image_id='image0')
+        self.assertEqual('hyper-image0',
+                         self.cache.get_hyper_image(self.context, 'image0'))
+        self.assertFalse(self.his_api.get_hyper_image.called)
+
+    @mock.patch.object(db_api, 'plan_image_conversion_update')
+    @mock.patch.object(db_api, 'plan_image_conversion_create')
+    def test_start_conversion_before_convert(self, mock_create,
+                                             mock_update):
+        cache = image_cache.PlanImageCache(self.glance_api, self.his_api,
+                                           plan_id='plan0')
+        self.his_api.convert_hyper_image.return_value = 'hyper-image0'
+        self.glance_api.get.return_value = {'status': 'active'}
+        self.assertEqual('hyper-image0',
+                         cache.start_conversion(self.context, 'image0'))
+        self.assertTrue(cache.is_converting('image0'))
+        mock_create.assert_called_once_with(
+            self.context, {'plan_id': 'plan0',
+                           'original_image_id': 'image0',
+                           'hyper_image_id': 'hyper-image0',
+                           'status': image_cache.CONVERTING})
+        self.assertEqual('hyper-image0',
+                         cache.convert_hyper_image(self.context, 'image0'))
+        self.assertEqual(1, self.his_api.convert_hyper_image.call_count)
+        self.assertFalse(cache.is_converting('image0'))
+        mock_update.assert_called_once_with(
+            self.context, 'plan0', 'image0',
+            {'status': image_cache.ACTIVE})
+
+    @mock.patch.object(db_api, 'plan_image_conversion_get')
+    def test_load(self, mock_get):
+        mock_get.return_value = [
+            {'original_image_id': 'image0', 'hyper_image_id': 'hyper0',
+             'status': image_cache.ACTIVE},
+            {'original_image_id': 'image1', 'hyper_image_id': 'hyper1',
+             'status': image_cache.CONVERTING}]
+        cache = image_cache.PlanImageCache(self.glance_api, self.his_api,
+                                           plan_id='plan0')
+        cache.load(self.context)
+        self.assertEqual('hyper0',
+                         cache.get_hyper_image(self.context, 'image0'))
+        self.assertTrue(cache.is_converting('image1'))
+        self.assertEqual('hyper1',
+                         cache.start_conversion(self.context, 'image1'))
+        self.assertFalse(self.his_api.convert_hyper_image.called)
+
+    def test_wait_for_hyper_images(self):
+        self.his_api.convert_hyper_image.return_value = 'hyper-image0'
+        self.glance_api.get.side_effect = [{'status': 'queued'},
+                                           {'status': 'active'}]
+        self.cache.start_conversion(self.context, 'image0')
+        self.assertFalse(self.glance_api.get.called)
+        self.cache.wait_for_hyper_images(self.context,
+                                         ['', 'image1', 'hyper-image0'])
+        self.assertEqual(2, self.glance_api.get.call_count)
+        self.assertFalse(self.cache.is_converting('image0'))
+        self.assertEqual('hyper-image0',
+                         self.cache.get_hyper_image(self.context, 'image0'))
@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import mock
 import testtools
 
@@ -51,9 +52,10 @@ class CloneManagerTestCase(test.TestCase):
         self.clone_manager.heat_api.events_list = mock.MagicMock()
         self.clone_manager.heat_api.events_list.return_value = \
             [api.Event(api.format_event(fake_constants.FAKE_EVENT_LIST))]
-        self.clone_manager.heat_api.get_resource = mock.MagicMock()
-        self.clone_manager.heat_api.get_resource.return_value = \
-            api.Resource(api.format_resource(fake_constants.FAKE_RESOURCE))
+        self.clone_manager.heat_api.get_physical_ids = mock.MagicMock()
+        self.clone_manager.heat_api.get_physical_ids.return_value = \
+            collections.defaultdict(
+                lambda: fake_constants.FAKE_RESOURCE['physical_resource_id'])
         self.clone_manager.clone_managers.get('volume'). \
             start_template_clone = mock.MagicMock()
         self.clone_manager.clone_managers.get('volume'). \
@@ -82,9 +84,10 @@ class CloneManagerTestCase(test.TestCase):
         self.clone_manager.heat_api.events_list = mock.MagicMock()
         self.clone_manager.heat_api.events_list.return_value = \
             [api.Event(api.format_event(fake_constants.FAKE_EVENT_LIST))]
-        self.clone_manager.heat_api.get_resource = mock.MagicMock()
-        self.clone_manager.heat_api.get_resource.return_value = \
-            api.Resource(api.format_resource(fake_constants.FAKE_RESOURCE))
+        self.clone_manager.heat_api.get_physical_ids = mock.MagicMock()
+        self.clone_manager.heat_api.get_physical_ids.return_value = \
+            collections.defaultdict(
+                lambda: fake_constants.FAKE_RESOURCE['physical_resource_id'])
         self.clone_manager.clone_managers.get('volume'). \
             start_template_clone = mock.MagicMock()
         self.clone_manager.clone_managers.get('volume'). \
@@ -250,3 +253,142 @@ class CloneManagerTestCase(test.TestCase):
         self.assertRaises(
             exception.DownloadTemplateFailed,
             self.clone_manager.download_template, self.context, '123')
+
+    def _fake_port_resource_map(self):
+        resource_map = {
+            'network_0': resource.Resource('network_0', 'OS::Neutron::Net',
+                                           'net-id'),
+            'subnet_0': resource.Resource('subnet_0', 'OS::Neutron::Subnet',
+                                          'subnet-id'),
+            'security_group_0': resource.Resource(
+                'security_group_0', 'OS::Neutron::SecurityGroup', 'sg-id')
+        }
+        for i in range(2):
+            port_key = 'port_%s' % i
+            resource_map[port_key] = resource.Resource(
+                port_key, 'OS::Neutron::Port', 'src-%s' % port_key,
+                properties={
+                    'network_id': {'get_resource': 'network_0'},
+                    'security_groups': [
+                        {'get_resource': 'security_group_0'}],
+                    'mac_address': 'fa:16:3e:00:00:0%s' % i,
+                    'fixed_ips': [{'subnet_id': {'get_resource': 'subnet_0'},
+                                   'ip_address': '10.0.0.1%s' % i}]})
+        server_port_map = {
+            'server_0': ('src-server_0', [('port_0', 'src-port_0')]),
+            'server_1': ('src-server_1', [('port_1', 'src-port_1')])
+        }
+        return resource_map, server_port_map
+
+    def test_realloc_port_floating_ip(self):
+        resource_map, server_port_map = self._fake_port_resource_map()
+        port_fp_map = {'port_0': [('floatingip_0', 'fip-id', '10.0.0.10')],
+                       'port_1': []}
+        self.clone_manager.heat_api.get_physical_ids = mock.MagicMock(
+            return_value={'server_0': 'dst-server_0', 'port_0': 'dst-port_0',
+                          'server_1': 'dst-server_1', 'port_1': 'dst-port_1'})
+        with test.nested(
+                mock.patch.object(self.clone_manager.compute_api,
+                                  'interface_detach'),
+                mock.patch.object(self.clone_manager.compute_api,
+                                  'interface_attach'),
+                mock.patch.object(self.clone_manager.neutron_api,
+                                  'create_port',
+                                  side_effect=lambda c, b: 'new-%s' %
+                                  b['port']['mac_address']),
+                mock.patch.object(self.clone_manager.neutron_api,
+                                  'disassociate_floating_ip'),
+                mock.patch.object(self.clone_manager.neutron_api,
+                                  'associate_floating_ip'),
+                mock.patch.object(db_api, 'plan_update')) as (
+                mock_detach, mock_attach, mock_create, mock_disassociate,
+                mock_associate, mock_plan_update):
+            self.clone_manager._realloc_port_floating_ip(
+                self.context, 'plan0', server_port_map, port_fp_map, [],
+                resource_map, 'stack0')
+        # the steps of every server are stored with the plan
+        mock_plan_update.assert_called_once_with(
+            self.context, 'plan0', {'cutover_timeline': mock.ANY})
+        timeline = mock_plan_update.call_args[0][2]['cutover_timeline']
+        self.assertEqual(['server_0', 'server_1'], sorted(timeline))
+        self.assertIn('detach_port', [step['step'] for step in
+                                      timeline['server_0']['steps']])
+        self.clone_manager.heat_api.get_physical_ids.assert_called_once_with(
+            self.context, 'stack0')
+        mock_attach.assert_has_calls(
+            [mock.call(self.context, 'dst-server_0', None,
+                       'new-fa:16:3e:00:00:00'),
+             mock.call(self.context, 'dst-server_1', None,
+                       'new-fa:16:3e:00:00:01')], any_order=True)
+        mock_disassociate.assert_called_once_with(self.context, 'fip-id')
+        mock_associate.assert_called_once_with(
+            self.context, 'fip-id', 'new-fa:16:3e:00:00:00',
+            fixed_address='10.0.0.10')
+
+    def test_realloc_port_floating_ip_error(self):
+        resource_map, server_port_map = self._fake_port_resource_map()
+        port_fp_map = {'port_0': [], 'port_1': []}
+        self.clone_manager.heat_api.get_physical_ids = mock.MagicMock(
+            return_value={'server_0': 'dst-server_0', 'port_0': 'dst-port_0',
+                          'server_1': 'dst-server_1', 'port_1': 'dst-port_1'})
+        self.clone_manager.heat_api.delete_stack = mock.MagicMock()
+
+        def _detach(context, server_id, port_id):
+            if server_id == 'src-server_1':
+                raise exception.V2vException()
+
+        with test.nested(
+                mock.patch.object(self.clone_manager.compute_api,
+                                  'interface_detach', side_effect=_detach),
+                mock.patch.object(self.clone_manager.compute_api,
+                                  'interface_attach'),
+                mock.patch.object(self.clone_manager.neutron_api,
+                                  'create_port', return_value='new-port'),
+                mock.patch.object(self.clone_manager.plan_api,
+                                  'update_plan')) as (
+                mock_detach, mock_attach, mock_create, mock_update):
+            self.assertRaises(exception.PlanMigrateFailed,
+                              self.clone_manager._realloc_port_floating_ip,
+                              self.context, 'plan0', server_port_map,
+                              port_fp_map, [], resource_map, 'stack0')
+            mock_attach.assert_called_once_with(self.context, 'dst-server_0',
+                                                None, 'new-port')
+            mock_update.assert_called_once_with(
+                self.context, 'plan0', {'plan_status': 'error'})
+        self.clone_manager.heat_api.delete_stack.assert_called_once_with(
+            self.context, 'plan0')
+
+    def test_realloc_port_floating_ip_stops_after_error(self):
+        self.flags(cutover_workers=1)
+        resource_map, server_port_map = self._fake_port_resource_map()
+        port_fp_map = {'port_0': [('floatingip_0', 'fip-id', '10.0.0.10')],
+                       'port_1': [('floatingip_1', 'fip-id1', '10.0.0.11')]}
+        self.clone_manager.heat_api.get_physical_ids = mock.MagicMock(
+            return_value={'server_0': 'dst-server_0', 'port_0': 'dst-port_0',
+                          'server_1': 'dst-server_1', 'port_1': 'dst-port_1'})
+        self.clone_manager.heat_api.delete_stack = mock.MagicMock()
+        with test.nested(
+                mock.patch.object(self.clone_manager.compute_api,
+                                  'interface_detach',
+                                  side_effect=exception.V2vException()),
+                mock.patch.object(self.clone_manager.compute_api,
+                                  'interface_attach'),
+                mock.patch.object(self.clone_manager.neutron_api,
+                                  'disassociate_floating_ip'),
+                mock.patch.object(self.clone_manager.neutron_api,
+                                  'associate_floating_ip'),
+                mock.patch.object(self.clone_manager.plan_api,
+                                  'update_plan')) as (
+                mock_detach, mock_attach, mock_disassociate,
+                mock_associate, mock_update):
+            self.assertRaises(exception.PlanMigrateFailed,
+                              self.clone_manager._realloc_port_floating_ip,
+                              self.context, 'plan0', server_port_map,
+                              port_fp_map, [], resource_map, 'stack0')
+            # the second server is not switched, the first is rolled back
+            self.assertEqual(1, mock_detach.call_count)
+            self.assertEqual(1, mock_disassociate.call_count)
+            self.assertEqual(mock_disassociate.call_args[0][1],
+                             mock_associate.call_args[0][1])
+        self.clone_manager.heat_api.delete_stack.assert_called_once_with(
+            self.context, 'plan0')
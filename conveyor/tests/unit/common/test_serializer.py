@@ -0,0 +1,73 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+import mock
+
+from conveyor.common import serializer
+from conveyor.tests import test
+
+
+class SerializerTestCase(test.TestCase):
+    def setUp(self):
+        super(SerializerTestCase, self).setUp()
+        serializer.reset_backend()
+        self.addCleanup(serializer.reset_backend)
+
+    def test_stdlib_backend(self):
+        self.flags(json_backend='stdlib')
+        self.assertEqual('stdlib', serializer.get_backend().name)
+        value = {'plan_id': 'plan0', 'resources': [{'id': 'server0'}],
+                 'created_at': datetime.datetime(2017, 1, 1)}
+        self.assertEqual(dict(value, created_at='2017-01-01T00:00:00.000000'),
+                         serializer.loads(serializer.dumps(value)))
+
+    @mock.patch.object(serializer.importutils, 'try_import',
+                       return_value=None)
+    def test_backend_not_installed(self, mock_import):
+        self.flags(json_backend='ujson')
+        self.assertEqual('stdlib', serializer.get_backend().name)
+        mock_import.assert_called_once_with('ujson')
+
+    def test_auto_backend(self):
+        fake_ujson = mock.Mock()
+        fake_ujson.loads.return_value = {'id': 'plan0'}
+
+        def fake_import(name):
+            return fake_ujson if name == 'ujson' else None
+
+        self.stub_out('oslo_utils.importutils.try_import', fake_import)
+        self.assertEqual('ujson', serializer.get_backend().name)
+        self.assertEqual({'id': 'plan0'}, serializer.loads('{"id": "plan0"}'))
+        fake_ujson.loads.assert_called_with('{"id": "plan0"}',
+                                            precise_float=True)
+        # encoding stays with jsonutils
+        self.assertEqual('{"id": "plan0"}', serializer.dumps({'id': 'plan0'}))
+        self.assertFalse(fake_ujson.dumps.called)
+
+    def test_ujson_without_precise_float(self):
+        calls = []
+
+        class FakeUJson(object):
+            # ujson 2.0 and later decode floats exactly and do not take
+            # precise_float
+            @staticmethod
+            def loads(s):
+                calls.append(s)
+                return 0.1
+
+        backend = serializer._UJsonBackend(FakeUJson)
+        self.assertEqual(0.1, backend.loads('0.1'))
+        self.assertEqual(['0.1'], calls)
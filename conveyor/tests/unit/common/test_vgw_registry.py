@@ -0,0 +1,99 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+import mock
+from oslo_utils import timeutils
+
+from conveyor.common import vgw_registry
+from conveyor.tests import test
+
+
+def fake_vgw(vgw_id, az='az01', copy_load=0, free_disk_slots=None,
+             heartbeat_at=None):
+    return {'vgw_id': vgw_id, 'vgw_ip': '10.0.0.%s' % vgw_id[-1],
+            'availability_zone': az, 'copy_load': copy_load,
+            'free_disk_slots': free_disk_slots,
+            'heartbeat_at': heartbeat_at or timeutils.utcnow()}
+
+
+class VgwRegistryTestCase(test.TestCase):
+    def setUp(self):
+        super(VgwRegistryTestCase, self).setUp()
+        self.flags(vgw_info='')
+        self.vgws = []
+        self.stub_out('conveyor.db.api.vgw_get_all',
+                      lambda context: self.vgws)
+        self.mock_update = mock.Mock()
+        self.stub_out('conveyor.db.api.vgw_update', self.mock_update)
+        self.registry = vgw_registry.VgwRegistry()
+
+    def test_parse_vgw_info(self):
+        self.assertEqual({'az01': {'vgw0': '10.0.0.1'}},
+                         vgw_registry.parse_vgw_info("'az01': "
+                                                     "{'vgw0': '10.0.0.1'}"))
+        self.assertEqual({}, vgw_registry.parse_vgw_info(''))
+        self.assertEqual({}, vgw_registry.parse_vgw_info("__import__('os')"))
+
+    def test_select_least_loaded(self):
+        self.vgws = [fake_vgw('vgw0', copy_load=2),
+                     fake_vgw('vgw1', copy_load=1),
+                     fake_vgw('vgw2', az='az02')]
+        selected = [self.registry.select('az01')[0] for i in range(4)]
+        self.assertEqual(['vgw1', 'vgw0', 'vgw1', 'vgw0'], selected)
+        self.assertEqual((None, None), self.registry.select('az03'))
+        # the load counted here is not stored, the heartbeats report it
+        self.assertFalse(self.mock_update.called)
+        self.flags(vgw_registry_sync_interval=0)
+        self.assertEqual('vgw1', self.registry.select('az01')[0])
+
+    def test_select_skips_unhealthy(self):
+        stale = timeutils.utcnow() - datetime.timedelta(seconds=60)
+        self.vgws = [fake_vgw('vgw0', heartbeat_at=stale),
+                     fake_vgw('vgw1', free_disk_slots=1, copy_load=1),
+                     fake_vgw('vgw2', free_disk_slots=0)]
+        self.assertEqual(('vgw1', '10.0.0.1'), self.registry.select('az01'))
+        # the only free disk slot of vgw1 is taken
+        self.assertEqual((None, None), self.registry.select('az01'))
+
+    def test_static_vgw_info(self):
+        self.flags(vgw_info="'az01': {'vgw5': '10.0.0.5'}")
+        self.vgws = [fake_vgw('vgw0', copy_load=1)]
+        self.assertEqual(('vgw5', '10.0.0.5'), self.registry.select('az01'))
+        self.assertEqual(set(['vgw0', 'vgw5']), self.registry.get_vgw_ids())
+
+    @mock.patch('conveyor.db.api.vgw_create_or_update')
+    def test_heartbeat(self, mock_create):
+        self.vgws = [fake_vgw('vgw0', copy_load=3)]
+        self.registry.refresh()
+        mock_create.return_value = fake_vgw('vgw1')
+        self.registry.heartbeat('az01', 'vgw1', '10.0.0.1')
+        self.assertEqual('vgw1', self.registry.select('az01')[0])
+
+        mock_create.return_value = fake_vgw('vgw0')
+        self.registry.heartbeat('az01', 'vgw0', {'ip': '10.0.0.0',
+                                                 'copy_load': '0'})
+        self.assertEqual('vgw0', self.registry.select('az01')[0])
+        values = mock_create.call_args[0][2]
+        self.assertEqual(0, values['copy_load'])
+        self.assertEqual('10.0.0.0', values['vgw_ip'])
+
+    @mock.patch('conveyor.db.api.vgw_delete')
+    def test_remove(self, mock_delete):
+        self.vgws = [fake_vgw('vgw0')]
+        self.registry.refresh()
+        self.registry.remove('vgw0')
+        mock_delete.assert_called_once_with(mock.ANY, 'vgw0')
+        self.assertEqual((None, None), self.registry.select('az01'))
@@ -0,0 +1,130 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import requests
+
+from conveyor.conveyoragentclient.common import exceptions
+from conveyor.conveyoragentclient.v1 import client
+from conveyor.tests import test
+
+
+class BirdieGatewayClientTestCase(test.TestCase):
+    def setUp(self):
+        super(BirdieGatewayClientTestCase, self).setUp()
+        self.stub_out('conveyor.conveyoragentclient.v1.client._clients', {})
+        self.stub_out('conveyor.conveyoragentclient.v1.birdiegatewayservice.'
+                      '_batch_support', {})
+
+    def test_get_client_reuses_session(self):
+        client1 = client.get_birdiegateway_client('10.0.0.1', '9998')
+        client2 = client.get_birdiegateway_client('10.0.0.1', '9998')
+        client3 = client.get_birdiegateway_client('10.0.0.2', '9998')
+        self.assertIs(client1, client2)
+        self.assertIsNot(client1, client3)
+        self.assertIsNotNone(client1.client.session)
+        self.assertEqual((30, 300), client1.client.timeout)
+
+    def test_get_client_without_keep_alive(self):
+        self.flags(conveyoragent_keep_alive=False)
+        client1 = client.get_birdiegateway_client('10.0.0.1', '9998')
+        client2 = client.get_birdiegateway_client('10.0.0.1', '9998')
+        self.assertIsNot(client1, client2)
+        self.assertIsNone(client1.client.session)
+
+    def test_request_counters(self):
+        gw_client = client.get_birdiegateway_client('10.0.0.1', '9998')
+        session = mock.Mock()
+        session.adapters = {}
+        session.request.side_effect = [
+            mock.Mock(status_code=200, text='{"dev_name": ["/dev/vda"]}'),
+            mock.Mock(status_code=404, text='', headers={})]
+        gw_client.client.session = session
+        self.assertEqual({'dev_name': ['/dev/vda']},
+                         gw_client.vservices.get_disk_name())
+        self.assertRaises(exceptions.NotFound,
+                          gw_client.vservices.get_data_trans_status, 'task0')
+        self.assertEqual({('10.0.0.1', '9998'): {'requests': 2,
+                                                 'failures': 1,
+                                                 'connections': 0}},
+                         client.get_clients_stats())
+
+    def test_get_data_trans_statuses(self):
+        gw_client = client.get_birdiegateway_client('10.0.0.1', '9998')
+        session = mock.Mock()
+        session.request.return_value = mock.Mock(
+            status_code=200,
+            text='{"body": [{"task_id": "t0", "task_state": "A"}, '
+                 '{"task_id": "t1", "task_state": "B"}]}')
+        gw_client.client.session = session
+        self.assertEqual({'t0': {'task_id': 't0', 'task_state': 'A'},
+                          't1': {'task_id': 't1', 'task_state': 'B'}},
+                         gw_client.vservices.get_data_trans_statuses(
+                             ['t0', 't1']))
+        self.assertEqual(1, session.request.call_count)
+        self.assertIn('task_ids=t0,t1', session.request.call_args[0][1])
+
+    def test_get_data_trans_statuses_unsupported(self):
+        gw_client = client.get_birdiegateway_client('10.0.0.1', '9998')
+        session = mock.Mock()
+        session.request.side_effect = [
+            mock.Mock(status_code=404, text='', headers={}),
+            mock.Mock(status_code=200, text='{"body": {"task_state": "A"}}'),
+            mock.Mock(status_code=200, text='{"body": {"task_state": "B"}}'),
+            mock.Mock(status_code=200, text='{"body": {"task_state": "C"}}')]
+        gw_client.client.session = session
+        self.assertEqual({'t0': {'task_state': 'A'},
+                          't1': {'task_state': 'B'}},
+                         gw_client.vservices.get_data_trans_statuses(
+                             ['t0', 't1']))
+        # the gateway is not asked for the multi-task query again
+        self.assertEqual({'t0': {'task_state': 'C'}},
+                         gw_client.vservices.get_data_trans_statuses(['t0']))
+        self.assertEqual(4, session.request.call_count)
+
+    def test_supports_incremental_clone(self):
+        gw_client = client.get_birdiegateway_client('10.0.0.1', '9998')
+        session = mock.Mock()
+        session.request.return_value = mock.Mock(
+            status_code=200, text='{"capabilities": ["incremental_clone"]}')
+        gw_client.client.session = session
+        self.assertTrue(gw_client.vservices.supports_incremental_clone())
+
+        old_client = client.get_birdiegateway_client('10.0.0.2', '9998')
+        session = mock.Mock()
+        session.request.return_value = mock.Mock(status_code=404, text='',
+                                                 headers={})
+        old_client.client.session = session
+        self.assertFalse(old_client.vservices.supports_incremental_clone())
+        self.assertFalse(old_client.vservices.supports_incremental_clone())
+        # older gateways are not asked again
+        self.assertEqual(1, session.request.call_count)
+
+    def test_batch_call_connection_error(self):
+        gw_client = client.get_birdiegateway_client('10.0.0.1', '9998')
+        session = mock.Mock()
+        session.request.side_effect = [
+            requests.exceptions.ConnectionError(),
+            mock.Mock(status_code=200, text='{"body": {"task_state": "A"}}'),
+            mock.Mock(status_code=200,
+                      text='{"body": [{"task_id": "t0", "task_state": "B"}]}')]
+        gw_client.client.session = session
+        # the call falls back to the task by task query once
+        self.assertEqual({'t0': {'task_state': 'A'}},
+                         gw_client.vservices.get_data_trans_statuses(['t0']))
+        # and the multi-task query is tried again on the next call
+        self.assertEqual({'t0': {'task_id': 't0', 'task_state': 'B'}},
+                         gw_client.vservices.get_data_trans_statuses(['t0']))
+        self.assertEqual(3, session.request.call_count)
+        self.assertIn('task_ids=t0', session.request.call_args[0][1])
@@ -0,0 +1,165 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from conveyor.common import loopingcall
+from conveyor.conveyorheat.api import api
+from conveyor.conveyorheat.common import exception
+from conveyor.tests import test
+
+DONE_STATES = ['DELETE_COMPLETE', 'DELETE_FAILED']
+
+
+class FakeLoopingCall(object):
+    """Call the function at once until it is done, without sleeping."""
+
+    def __init__(self, f):
+        self.f = f
+
+    def start(self, interval):
+        for i in range(100):
+            try:
+                self.f()
+            except loopingcall.LoopingCallDone:
+                return mock.Mock()
+        raise AssertionError('the stacks are never all deleted')
+
+
+class PlanStacksTestCase(test.TestCase):
+    def setUp(self):
+        super(PlanStacksTestCase, self).setUp()
+        self.context = mock.Mock()
+        with mock.patch.object(api.engine, 'EngineService'):
+            self.api = api.API()
+        # {stack_id: ({resource name: physical id}, template)}
+        self.stacks = {}
+        # {stack_id: states the stack goes through once it is deleted}
+        self.states = {}
+        self.events = []
+        self.stub_out('conveyor.db.api.resource_get_physical_ids_by_stack',
+                      lambda context, stack_id: self.stacks[stack_id][0])
+        self.stub_out('conveyor.db.api.stack_get', self._fake_stack_get)
+        self.stub_out('conveyor.common.loopingcall.FixedIntervalLoopingCall',
+                      FakeLoopingCall)
+        self.api.get_stack = mock.Mock(side_effect=self._fake_get_stack)
+
+    def _fake_stack_get(self, context, stack_id, **kwargs):
+        template = self.stacks[stack_id][1]
+        if template is None:
+            return mock.Mock(raw_template=None)
+        return mock.Mock(raw_template=mock.Mock(template=template))
+
+    def _fake_get_stack(self, context, stack_id):
+        states = self.states[stack_id]
+        state = states.pop(0) if len(states) > 1 else states[0]
+        if state is None:
+            raise exception.EntityNotFound(entity='Stack', name=stack_id)
+        return api.Stack({'stack_status': state})
+
+    def _add_stack(self, stack_id, physical_ids, refers_to=(),
+                   final_state='DELETE_COMPLETE'):
+        template = {'resources': dict(
+            ('res_%d' % i, {'type': 'OS::Nova::Server',
+                            'properties': {'networks': [{'port': ref}]}})
+            for i, ref in enumerate(refers_to))}
+        self.stacks[stack_id] = (physical_ids, template)
+        self.states[stack_id] = ['DELETE_IN_PROGRESS', final_state]
+
+    def _delete(self, stack_id):
+        self.events.append(('start', stack_id))
+
+    def _deleted(self, stack_id):
+        self.events.append(('done', stack_id))
+
+    def _delete_plan_stacks(self, stack_ids, delete_func=None):
+        self.api._delete_plan_stacks(self.context, stack_ids,
+                                     delete_func or self._delete,
+                                     DONE_STATES, self._deleted)
+
+    def assertDeletedBefore(self, dependent, stack_id):
+        self.assertLess(self.events.index(('done', dependent)),
+                        self.events.index(('start', stack_id)))
+
+    def test_get_stack_dependents(self):
+        self._add_stack('stack0', {'net': 'net-0', 'subnet': 'subnet-0'})
+        self._add_stack('stack1', {'server': 'server-1', 'port': None},
+                        refers_to=['subnet-0'])
+        self._add_stack('stack2', {'volume': 'volume-2'},
+                        refers_to=['server-0'])
+        # without template, a stack may refer to any earlier stack
+        self.stacks['stack3'] = ({}, None)
+        self.assertEqual(
+            {'stack0': set(['stack1', 'stack3']),
+             'stack1': set(['stack3']),
+             'stack2': set(['stack3']),
+             'stack3': set()},
+            self.api._get_stack_dependents(
+                self.context, ['stack0', 'stack1', 'stack2', 'stack3']))
+
+    def test_delete_plan_stacks_in_dependency_order(self):
+        self._add_stack('stack0', {'net': 'net-0'})
+        self._add_stack('stack1', {'server': 'server-1'},
+                        refers_to=['net-0'])
+        self._add_stack('stack2', {'volume': 'volume-2'},
+                        refers_to=['server-1'])
+        self._add_stack('stack3', {'volume': 'volume-3'})
+        self._delete_plan_stacks(['stack0', 'stack1', 'stack2', 'stack3'])
+        # independent stacks are deleted together
+        self.assertEqual([('start', 'stack2'), ('start', 'stack3')],
+                         self.events[:2])
+        self.assertDeletedBefore('stack2', 'stack1')
+        self.assertDeletedBefore('stack1', 'stack0')
+        self.assertEqual(set(['stack0', 'stack1', 'stack2', 'stack3']),
+                         set(s for e, s in self.events if e == 'done'))
+
+    def test_delete_plan_stacks_nothing_to_wait_for(self):
+        self._add_stack('stack0', {'net': 'net-0'})
+        self._add_stack('stack1', {'server': 'server-1'},
+                        refers_to=['net-0'])
+        # stack1 was already deleted, so it is never checked
+        self.states['stack1'] = []
+
+        def _delete(stack_id):
+            self._delete(stack_id)
+            if stack_id == 'stack1':
+                return False
+
+        self._delete_plan_stacks(['stack0', 'stack1'], _delete)
+        self.assertEqual([('start', 'stack1'), ('done', 'stack1'),
+                          ('start', 'stack0'), ('done', 'stack0')],
+                         self.events)
+
+    def test_delete_plan_stacks_failed_or_gone(self):
+        self._add_stack('stack0', {'net': 'net-0'})
+        self._add_stack('stack1', {'server': 'server-1'},
+                        refers_to=['net-0'], final_state='DELETE_FAILED')
+        self._add_stack('stack2', {'volume': 'volume-2'},
+                        refers_to=['net-0'], final_state=None)
+        self._delete_plan_stacks(['stack0', 'stack1', 'stack2'])
+        # the deletion of a stack is over once it failed or is not found
+        self.assertDeletedBefore('stack1', 'stack0')
+        self.assertDeletedBefore('stack2', 'stack0')
+        self.assertEqual(('done', 'stack0'), self.events[-1])
+
+    def test_delete_plan_stacks_without_template(self):
+        self._add_stack('stack0', {'net': 'net-0'})
+        self._add_stack('stack1', {'volume': 'volume-1'})
+        self.stacks['stack2'] = ({}, None)
+        self.states['stack2'] = ['DELETE_IN_PROGRESS', 'DELETE_IN_PROGRESS',
+                                 'DELETE_COMPLETE']
+        self._delete_plan_stacks(['stack0', 'stack1', 'stack2'])
+        self.assertEqual(('start', 'stack2'), self.events[0])
+        self.assertDeletedBefore('stack2', 'stack0')
+        self.assertDeletedBefore('stack2', 'stack1')
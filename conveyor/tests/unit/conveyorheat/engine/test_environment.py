@@ -0,0 +1,84 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from conveyor.conveyorheat.common import exception
+from conveyor.conveyorheat.engine import environment
+from conveyor.conveyorheat.engine import support
+from conveyor.tests import test
+
+
+class FakeServer(object):
+    support_status = support.SupportStatus()
+
+
+class OtherServer(object):
+    support_status = support.SupportStatus()
+
+
+class ResourceRegistryTestCase(test.TestCase):
+    def setUp(self):
+        super(ResourceRegistryTestCase, self).setUp()
+        self.global_registry = environment.ResourceRegistry(None, None)
+        self.global_registry.register_class('OS::Nova::Server', FakeServer)
+        self.global_registry.load(
+            {'OS::Compute::Server': 'OS::Nova::Server'})
+
+    def _spy(self, registry):
+        return mock.patch.object(registry, 'iterable_by',
+                                 wraps=registry.iterable_by)
+
+    def test_get_class_cached(self):
+        registry = self.global_registry
+        with self._spy(registry) as m_iter:
+            for i in range(3):
+                self.assertIs(FakeServer,
+                              registry.get_class('OS::Compute::Server'))
+                self.assertIs(FakeServer, registry.get_resource_info(
+                    'OS::Nova::Server').value)
+        # resolved once per type, the mapping then its target
+        self.assertEqual(['OS::Compute::Server', 'OS::Nova::Server'],
+                         [c[0][0] for c in m_iter.call_args_list])
+
+    def test_cache_invalidated_by_register(self):
+        registry = self.global_registry
+        self.assertIs(FakeServer, registry.get_class('OS::Compute::Server'))
+        registry.register_class('OS::Nova::Server', OtherServer)
+        self.assertIs(OtherServer, registry.get_class('OS::Compute::Server'))
+        # a type removed by the environment is not found any more
+        registry.load({'OS::Compute::Server': None})
+        self.assertRaises(exception.EntityNotFound, registry.get_class,
+                          'OS::Compute::Server')
+
+    def test_cache_invalidated_by_remove_item(self):
+        registry = environment.ResourceRegistry(self.global_registry, None)
+        registry.load({'My::Server': 'my_server.yaml'})
+        info = registry.get_resource_info('My::Server')
+        self.assertIsInstance(info, environment.TemplateResourceInfo)
+        with self._spy(registry) as m_iter:
+            self.assertIs(info, registry.get_resource_info('My::Server'))
+            self.assertFalse(m_iter.called)
+        registry.remove_item(info)
+        self.assertRaises(exception.EntityNotFound,
+                          registry.get_resource_info, 'My::Server')
+
+    def test_user_registry_follows_global_registry(self):
+        registry = environment.ResourceRegistry(self.global_registry, None)
+        self.assertIs(FakeServer, registry.get_class('OS::Nova::Server'))
+        with self._spy(registry) as m_iter:
+            self.assertIs(FakeServer, registry.get_class('OS::Nova::Server'))
+            self.assertFalse(m_iter.called)
+        self.global_registry.register_class('OS::Nova::Server', OtherServer)
+        self.assertIs(OtherServer, registry.get_class('OS::Nova::Server'))
@@ -0,0 +1,191 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import sys
+
+import fixtures
+import pkg_resources
+
+from conveyor.conveyorheat.engine import clients
+from conveyor.conveyorheat.engine import plugin_manager
+from conveyor.conveyorheat.engine import resources
+from conveyor.tests import test
+
+PACKAGE = 'conveyor_fake_plugins'
+
+MODULES = {
+    '__init__': '',
+    'servers': '''
+class Server(object):
+    pass
+
+
+def resource_mapping():
+    return {'Fake::Server': Server, 'Fake::Instance': Server}
+''',
+    'available': '''
+class Volume(object):
+    pass
+
+
+def available_resource_mapping():
+    if Volume:
+        return {'Fake::Volume': Volume}
+    return {}
+''',
+    'computed': '''
+class Port(object):
+    pass
+
+MAPPING = {'Fake::Port': Port}
+
+
+def resource_mapping():
+    return MAPPING
+''',
+    'constraints': '''
+class Network(object):
+    pass
+
+
+def resource_mapping():
+    return {'Fake::Network': Network}
+
+
+def constraint_mapping():
+    return {}
+''',
+    'helpers': '''
+def helper():
+    pass
+''',
+    'broken': 'def resource_mapping(:\n',
+}
+
+ENTRY_POINTS = {
+    'conveyorheat.constraints': [
+        'nova.flavor = conveyor.conveyorheat.engine.clients.os.nova:'
+        'FlavorConstraint',
+        'cinder.volume = conveyor.conveyorheat.engine.clients.os.cinder:'
+        'VolumeConstraint'],
+    'conveyorheat.clients': [
+        'nova = conveyor.conveyorheat.engine.clients.os.nova:'
+        'NovaClientPlugin'],
+}
+
+
+def fake_iter_entry_points(group, name=None):
+    eps = [pkg_resources.EntryPoint.parse(line)
+           for line in ENTRY_POINTS.get(group, [])]
+    return [ep for ep in eps if name is None or ep.name == name]
+
+
+class PluginIndexTestCase(test.TestCase):
+    def setUp(self):
+        super(PluginIndexTestCase, self).setUp()
+        path = self.useFixture(fixtures.TempDir()).path
+        os.mkdir(os.path.join(path, PACKAGE))
+        for name, source in MODULES.items():
+            with open(os.path.join(path, PACKAGE, name + '.py'), 'w') as f:
+                f.write(source)
+        self.useFixture(fixtures.MonkeyPatch('sys.path', [path] + sys.path))
+        self.addCleanup(self._unload)
+        __import__(PACKAGE)
+        self.index = plugin_manager.PluginIndex(
+            PACKAGE, ['available_resource', 'resource'],
+            eager_names=['constraint'])
+
+    def _unload(self):
+        for module_name in list(sys.modules):
+            if module_name.split('.')[0] == PACKAGE:
+                del sys.modules[module_name]
+
+    def test_index_keys(self):
+        self.assertEqual(
+            {'Fake::Server': [PACKAGE + '.servers'],
+             'Fake::Instance': [PACKAGE + '.servers'],
+             'Fake::Volume': [PACKAGE + '.available']},
+            self.index.index)
+        # the mapping of these modules is only known once imported
+        self.assertEqual(sorted([PACKAGE + '.broken',
+                                 PACKAGE + '.computed',
+                                 PACKAGE + '.constraints']),
+                         sorted(self.index.unindexed))
+        self.assertNotIn(PACKAGE + '.servers', sys.modules)
+
+    def test_unindexed_modules_loaded_at_once(self):
+        self.index.unindexed.remove(PACKAGE + '.broken')
+        manager = plugin_manager.PluginManager(PACKAGE, index=self.index)
+        self.assertEqual(
+            sorted([PACKAGE + '.computed', PACKAGE + '.constraints']),
+            sorted(m.__name__ for m in manager.modules))
+        mapping = plugin_manager.PluginMapping(['available_resource',
+                                                'resource'])
+        self.assertEqual(['Fake::Network', 'Fake::Port'],
+                         sorted(k for k, v in mapping.load_all(manager)))
+
+        modules = manager.load_indexed('Fake::Instance')
+        self.assertEqual([PACKAGE + '.servers'],
+                         [m.__name__ for m in modules])
+        # a module is loaded once for all its keys
+        self.assertEqual([], manager.load_indexed('Fake::Server'))
+        self.assertEqual([PACKAGE + '.available'],
+                         [m.__name__ for m in manager.load_indexed()])
+
+
+class LazyLoadTestCase(test.TestCase):
+    def setUp(self):
+        super(LazyLoadTestCase, self).setUp()
+        self.stub_out('pkg_resources.iter_entry_points',
+                      fake_iter_entry_points)
+        self.stub_out('stevedore.extension.ExtensionManager.'
+                      'ENTRY_POINT_CACHE', {})
+        self.stub_out('conveyor.conveyorheat.engine.resources._environment',
+                      None)
+        self.stub_out('conveyor.conveyorheat.engine.clients._mgr', None)
+        self.stub_out('conveyor.conveyorheat.engine.clients._lazy', False)
+        self.stub_out('conveyor.conveyorheat.engine.clients._plugins', {})
+
+    def _global_env(self, lazy):
+        self.flags(lazy_load_plugins=lazy)
+        resources._environment = None
+        clients._mgr = None
+        clients._lazy = False
+        clients._plugins.clear()
+        return resources.global_env()
+
+    def test_lazy_load_same_as_eager(self):
+        names = ('OS::Nova::Server', 'OS::Cinder::Volume',
+                 'OS::Heat::ResourceGroup')
+        constraints = ('nova.flavor', 'cinder.volume', 'unknown')
+        lazy_env = self._global_env(True)
+        lazy_registry = lazy_env.registry._registry
+        self.assertNotIn('OS::Nova::Server', lazy_registry)
+        lazy_classes = [lazy_env.get_class(name) for name in names]
+        lazy_constraints = [lazy_env.get_constraint(name)
+                            for name in constraints]
+        lazy_client = clients._get_plugin('nova')
+        self.assertIsNone(clients._mgr)
+
+        eager_env = self._global_env(False)
+        self.assertEqual([eager_env.get_class(name) for name in names],
+                         lazy_classes)
+        self.assertEqual([eager_env.get_constraint(name)
+                          for name in constraints],
+                         lazy_constraints)
+        self.assertIsNotNone(lazy_constraints[0])
+        self.assertIsNotNone(clients._mgr)
+        self.assertIs(clients._get_plugin('nova'), lazy_client)
+        self.assertIsNotNone(lazy_client)
@@ -0,0 +1,117 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from eventlet import event
+
+from conveyor.conveyorheat.engine import dependencies
+from conveyor.conveyorheat.engine import scheduler
+from conveyor.tests import test
+
+
+class WakeHintTestCase(test.TestCase):
+    def setUp(self):
+        super(WakeHintTestCase, self).setUp()
+        self.now = 100.0
+        self.sleeps = []
+        # {task name: number of steps run}
+        self.steps = {}
+        self.stub_out('conveyor.conveyorheat.common.timeutils.wallclock',
+                      lambda: self.now)
+        self.stub_out('conveyor.conveyorheat.engine.scheduler.TaskRunner.'
+                      '_sleep', lambda runner, wait_time:
+                      self.sleeps.append(wait_time))
+
+    def _task(self, name, hints):
+        def task():
+            for hint in hints:
+                self.steps[name] = self.steps.get(name, 0) + 1
+                yield hint
+            self.steps[name] = self.steps.get(name, 0) + 1
+        return task
+
+    def test_not_stepped_before_hint_due(self):
+        runner = scheduler.TaskRunner(self._task('a', [5]))
+        runner.start()
+        self.assertEqual(5, runner.wake_delay())
+        self.assertFalse(runner.due())
+        self.now += 4
+        self.assertFalse(runner.due())
+        self.now += 1
+        self.assertTrue(runner.due())
+        self.assertTrue(runner.step())
+
+    def test_wait_for_hint(self):
+        runner = scheduler.TaskRunner(self._task('a', [0.5, 5]))
+        runner.start()
+        # slept for the hint, or at most for the fixed interval
+        runner._wait(1)
+        self.now += 0.5
+        runner.step()
+        runner._wait(1)
+        self.assertEqual([0.5, 1], self.sleeps)
+
+    def test_wait_for_event(self):
+        done = event.Event()
+        runner = scheduler.TaskRunner(self._task('a', [done]))
+        runner.start()
+        self.assertIsNone(runner.wake_delay())
+        self.assertFalse(runner.due())
+        done.send()
+        self.assertEqual(0, runner.wake_delay())
+        self.assertTrue(runner.due())
+        runner._wait(1)
+        self.assertEqual([0], self.sleeps)
+
+    def test_no_hint_fixed_interval(self):
+        runner = scheduler.TaskRunner(self._task('a', [None, None]))
+        runner(wait_time=1)
+        self.assertEqual(3, self.steps['a'])
+        self.assertEqual([0, 1], self.sleeps)
+
+    def test_group_wakes_at_earliest_hint(self):
+        tasks = {'a': self._task('a', [5, 5]), 'b': self._task('b', [1, 1])}
+        deps = dependencies.Dependencies([('a', None), ('b', None)])
+        group = scheduler.DependencyTaskGroup(deps, lambda k: tasks[k]())
+        runner = group()
+        self.assertEqual(1, next(runner))
+        self.assertEqual({'a': 1, 'b': 1}, self.steps)
+        self.now += 1
+        # b is stepped once its hint is due, a is not
+        self.assertEqual(1, next(runner))
+        self.assertEqual({'a': 1, 'b': 2}, self.steps)
+        self.now += 1
+        self.assertEqual(3, next(runner))
+        self.assertEqual({'a': 1, 'b': 3}, self.steps)
+        self.now += 3
+        self.assertEqual(5, next(runner))
+        self.assertEqual({'a': 2, 'b': 3}, self.steps)
+        self.now += 5
+        self.assertRaises(StopIteration, next, runner)
+        self.assertEqual({'a': 3, 'b': 3}, self.steps)
+
+    def test_group_without_hints(self):
+        tasks = {'a': self._task('a', [5]),
+                 'b': self._task('b', [None, None])}
+        deps = dependencies.Dependencies([('a', None), ('b', None)])
+        group = scheduler.DependencyTaskGroup(deps, lambda k: tasks[k]())
+        runner = group()
+        # a subtask without hint is stepped at every step of the group
+        self.assertIsNone(next(runner))
+        self.assertIsNone(next(runner))
+        self.assertEqual({'a': 1, 'b': 2}, self.steps)
+        self.assertEqual(5, next(runner))
+        self.assertEqual({'a': 1, 'b': 3}, self.steps)
+        self.now += 5
+        self.assertRaises(StopIteration, next, runner)
+        self.assertEqual({'a': 2, 'b': 3}, self.steps)
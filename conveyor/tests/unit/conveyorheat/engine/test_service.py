@@ -0,0 +1,84 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from conveyor.conveyorheat.engine import service
+from conveyor.conveyorheat.engine import stack as parser
+from conveyor.conveyorheat.engine import template as templatem
+from conveyor.tests import test
+
+
+def fake_db_stack(stack_id='stack0', status='COMPLETE', updated_at=None):
+    return mock.Mock(id=stack_id, raw_template_id=1,
+                     raw_template={'heat_template_version': '2013-05-23'},
+                     updated_at=updated_at, current_traversal='traversal0',
+                     action='CREATE', status=status)
+
+
+@mock.patch.object(parser.Stack, 'load')
+@mock.patch.object(templatem.Template, 'load')
+class LoadedStackCacheTestCase(test.TestCase):
+    def setUp(self):
+        super(LoadedStackCacheTestCase, self).setUp()
+        self.cache = service.LoadedStackCache(2)
+        self.cnxt0 = mock.Mock()
+        self.cnxt1 = mock.Mock()
+
+    def test_load_hit(self, mock_tmpl_load, mock_stack_load):
+        db_stack = fake_db_stack()
+        self.cache.load(self.cnxt0, db_stack)
+        self.cache.load(self.cnxt1, db_stack, resolve_data=False)
+        mock_tmpl_load.assert_called_once_with(
+            self.cnxt0, 1, db_stack.raw_template)
+        # every request gets its own stack, bound to its context
+        self.assertEqual(
+            [mock.call(self.cnxt0, stack=db_stack, resolve_data=True,
+                       template=mock_tmpl_load.return_value),
+             mock.call(self.cnxt1, stack=db_stack, resolve_data=False,
+                       template=mock_tmpl_load.return_value)],
+            mock_stack_load.call_args_list)
+        self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+
+    def test_load_miss(self, mock_tmpl_load, mock_stack_load):
+        self.cache.load(self.cnxt0, fake_db_stack())
+        # the stored stack changed
+        self.cache.load(self.cnxt0, fake_db_stack(updated_at='now'))
+        # stacks in progress are not cached
+        db_stack = fake_db_stack(status=parser.Stack.IN_PROGRESS)
+        self.cache.load(self.cnxt0, db_stack)
+        self.cache.load(self.cnxt0, db_stack)
+        # the least recently used stack is dropped
+        self.cache.load(self.cnxt0, fake_db_stack('stack1'))
+        self.cache.load(self.cnxt0, fake_db_stack('stack2'))
+        self.cache.load(self.cnxt0, fake_db_stack(updated_at='now'))
+        self.assertEqual(5, mock_tmpl_load.call_count)
+        self.assertEqual(7, mock_stack_load.call_count)
+        mock_stack_load.assert_any_call(self.cnxt0, stack=db_stack,
+                                        resolve_data=True)
+        self.assertEqual((0, 5), (self.cache.hits, self.cache.misses))
+
+    def test_invalidate(self, mock_tmpl_load, mock_stack_load):
+        self.cache.load(self.cnxt0, fake_db_stack())
+        self.cache.invalidate('stack0')
+        self.cache.invalidate('stack1')
+        self.cache.load(self.cnxt0, fake_db_stack())
+        self.assertEqual(2, mock_tmpl_load.call_count)
+
+    def test_disabled(self, mock_tmpl_load, mock_stack_load):
+        cache = service.LoadedStackCache(0)
+        for i in range(2):
+            cache.load(self.cnxt0, fake_db_stack())
+        self.assertFalse(mock_tmpl_load.called)
+        self.assertEqual(2, mock_stack_load.call_count)
@@ -0,0 +1,106 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import six
+
+from conveyor import context
+from conveyor.conveyorheat.common import template_format
+from conveyor.conveyorheat.engine.cfn import template as cfn_template
+from conveyor.conveyorheat.engine.hot import template as hot_template
+from conveyor.conveyorheat.engine import stack as parser
+from conveyor.conveyorheat.engine import template
+from conveyor.tests import test
+
+HOT_TEMPLATE = '''
+heat_template_version: 2015-10-15
+resources:
+  rand:
+    type: OS::Heat::RandomString
+  other:
+    type: OS::Heat::RandomString
+  unused:
+    type: OS::Heat::RandomString
+  none:
+    type: OS::Heat::None
+    properties:
+      value: {get_attr: [rand, value]}
+      path: {get_attr: [rand, show, length]}
+      all: {get_attr: [other]}
+outputs:
+  value:
+    value: {get_attr: [other, value]}
+'''
+
+CFN_TEMPLATE = '''
+AWSTemplateFormatVersion: 2010-09-09
+Resources:
+  rand:
+    Type: OS::Heat::RandomString
+  none:
+    Type: OS::Heat::None
+    Properties:
+      value: {"Fn::GetAtt": [rand, value]}
+Outputs:
+  value:
+    Value: {"Fn::GetAtt": [rand, show]}
+'''
+
+
+class StackDepAttrsTestCase(test.TestCase):
+    def setUp(self):
+        super(StackDepAttrsTestCase, self).setUp()
+        self.stub_out(
+            'conveyor.conveyorheat.engine.template._template_classes',
+            {('heat_template_version', '2015-10-15'):
+                hot_template.HOTemplate20151015,
+             ('AWSTemplateFormatVersion', '2010-09-09'):
+                cfn_template.CfnTemplate})
+        self.context = context.RequestContext('fake', 'fake',
+                                              tenant_id='fake')
+
+    def _stack(self, template_str):
+        tmpl = template.Template(template_format.parse(template_str))
+        return parser.Stack(self.context, 'test_stack', tmpl)
+
+    def assertDepAttrs(self, stack, expected):
+        for name in stack.resources:
+            dep_attrs = stack.get_dep_attrs(six.itervalues(stack.resources),
+                                            stack.outputs, name)
+            self.assertEqual(dep_attrs, stack.dep_attrs(name))
+            self.assertEqual(expected.get(name, set()), dep_attrs)
+
+    def test_dep_attrs_hot(self):
+        stack = self._stack(HOT_TEMPLATE)
+        all_attrs = set(stack['other'].attributes_schema)
+        self.assertIn('value', all_attrs)
+        self.assertDepAttrs(stack, {'rand': set(['value',
+                                                 ('show', 'length')]),
+                                    'other': all_attrs})
+
+    def test_dep_attrs_cfn(self):
+        stack = self._stack(CFN_TEMPLATE)
+        self.assertDepAttrs(stack, {'rand': set(['value', 'show'])})
+
+    def test_reset_referenced_resource_attributes(self):
+        stack = self._stack(HOT_TEMPLATE)
+        resets = dict(
+            (name, mock.patch.object(res.attributes,
+                                     'reset_resolved_values').start())
+            for name, res in six.iteritems(stack.resources))
+        self.addCleanup(mock.patch.stopall)
+        stack.reset_resource_attributes('none')
+        self.assertEqual(['none', 'other', 'rand'],
+                         sorted(name for name, reset in six.iteritems(resets)
+                                if reset.called))
@@ -0,0 +1,48 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from conveyor.db.sqlalchemy import types
+from conveyor.tests import test
+
+
+class CompressedJsonTestCase(test.TestCase):
+    def setUp(self):
+        super(CompressedJsonTestCase, self).setUp()
+        self.type = types.CompressedJson()
+        self.dialect = mock.Mock()
+
+    def test_compress_large_value(self):
+        value = {'resources': dict(('server_%d' % i,
+                                    {'type': 'OS::Nova::Server'})
+                                   for i in range(100))}
+        data = self.type.process_bind_param(value, self.dialect)
+        self.assertEqual(types.COMPRESSED_HEADER, data[:1])
+        self.assertLess(len(data), len(types.dumps(value)))
+        self.assertEqual(value,
+                         self.type.process_result_value(data, self.dialect))
+
+    def test_small_value_stored_as_is(self):
+        data = self.type.process_bind_param({'id': 'plan0'}, self.dialect)
+        self.assertEqual({'id': 'plan0'}, types.loads(data))
+        self.assertEqual({'id': 'plan0'},
+                         self.type.process_result_value(data, self.dialect))
+
+    def test_read_uncompressed_rows(self):
+        for data in (b'{"id": "plan0"}', u'{"id": "plan0"}'):
+            self.assertEqual(
+                {'id': 'plan0'},
+                self.type.process_result_value(data, self.dialect))
+        self.assertIsNone(self.type.process_result_value(None, self.dialect))
@@ -141,6 +141,7 @@ class ResourceManagerTestCase(test.TestCase):
                 self.context, fake_plan_id, detail=False)
             self.assertTrue('original_resources' not in result2)
 
+    @mock.patch.object(resource_api.ResourceAPI, 'invalidate_plan_topo')
     @mock.patch.object(db_api, 'plan_update_resource_delete')
     @mock.patch.object(db_api, 'plan_original_resource_delete')
     @mock.patch.object(db_api, 'plan_delete')
@@ -152,12 +153,14 @@ class ResourceManagerTestCase(test.TestCase):
                          mock_clear_table, mock_plan_tmpl_del,
                          mock_plan_delete,
                          mock_original_resource_delete,
-                         mock_update_resource_delete):
+                         mock_update_resource_delete,
+                         mock_invalidate_topo):
         fake_plan = fake_object.mock_fake_plan()
         mock_plan_get.return_value = fake_plan
         self.plan_manager.delete_plan(self.context, 'plan_id')
         mock_clear_table.assert_called_with(self.context, '', 'plan_id')
         mock_plan_delete.assert_called_with(self.context, fake_plan['plan_id'])
+        mock_invalidate_topo.assert_called_once_with(self.context, 'plan_id')
 
     @mock.patch.object(db_api, 'plan_update_resource_delete')
     @mock.patch.object(db_api, 'plan_original_resource_delete')
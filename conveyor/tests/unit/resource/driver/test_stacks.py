@@ -173,3 +173,51 @@ class StackResourceTesetCase(test.TestCase):
         result = self.stack_resource.extract_stacks([fake_stack['id']])
         self.assertEqual(1, len(result))
         self.assertEqual(fake_stack['id'], result[0].id)
+
+    @mock.patch.object(heat.API, 'get_template')
+    @mock.patch.object(heat.API, 'resources_list')
+    def test_extract_son_resources_bulk(self, mock_stack_res,
+                                        mock_stack_tmpl):
+        def _fake_res(name, res_type, physical_id, stack_id):
+            link = {'rel': 'stack',
+                    'href': 'http://heat/v1/t/stacks/s/%s' % stack_id}
+            return mock.Mock(resource_name=name, resource_type=res_type,
+                             physical_resource_id=physical_id,
+                             links=[link])
+
+        mock_stack_res.return_value = [
+            _fake_res('server0', 'OS::Nova::Server', 'server-id0', 'stack0'),
+            _fake_res('nested', 'file:///nested.yaml', 'stack1', 'stack0'),
+            _fake_res('server1', 'OS::Nova::Server', 'server-id1', 'stack1')]
+
+        def fake_extract_instances(driver, instance_ids, parent_name=None,
+                                   parent_resources=None):
+            for instance_id in instance_ids:
+                driver._collected_resources[instance_id] = \
+                    resource.Resource('server_%s' % instance_id,
+                                      'OS::Nova::Server', instance_id)
+
+        with mock.patch.object(stacks.InstanceResource, 'extract_instances',
+                               autospec=True,
+                               side_effect=fake_extract_instances) as mock_ext:
+            sub_reses, dep_reses = \
+                self.stack_resource._extract_son_resources_bulk(
+                    self.context, 'stack0', 'stack_0')
+            # servers of the stack and the nested stack in one batch
+            mock_ext.assert_called_once_with(
+                mock.ANY, ['server-id0', 'server-id1'], 'stack_0',
+                ['server-id0', 'server-id1'])
+        self.assertEqual(1, mock_stack_res.call_count)
+        self.assertFalse(mock_stack_tmpl.called)
+        self.assertEqual(['server-id0', 'server-id1'],
+                         [r.id for r in sub_reses])
+        self.assertEqual(2, len(dep_reses))
+
+    @mock.patch.object(heat.API, 'resources_list')
+    def test_extract_son_resources_bulk_without_links(self, mock_stack_res):
+        mock_stack_res.return_value = [
+            mock.Mock(resource_name='server0',
+                      resource_type='OS::Nova::Server',
+                      physical_resource_id='server-id0', links=[])]
+        self.assertIsNone(self.stack_resource._extract_son_resources_bulk(
+            self.context, 'stack0', 'stack_0'))
@@ -0,0 +1,92 @@
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from conveyor import context
+from conveyor.resource import inventory
+from conveyor.tests import test
+
+SERVER = 'OS::Nova::Server'
+VOLUME = 'OS::Cinder::Volume'
+
+
+def fake_server(server_id, az='az01', status='ACTIVE'):
+    return {'id': server_id, 'availability_zone': az, 'status': status}
+
+
+class InventoryIndexTestCase(test.TestCase):
+    def setUp(self):
+        super(InventoryIndexTestCase, self).setUp()
+        self.context = context.RequestContext('fake', 'fake', is_admin=False)
+        self.list_func = mock.Mock()
+        self.index = inventory.InventoryIndex(self.list_func)
+        self.stub_out('conveyor.resource.inventory.InventoryIndex._start',
+                      lambda *args: None)
+
+    def test_supports(self):
+        self.assertTrue(self.index.supports(SERVER, {'status': 'ACTIVE'}))
+        self.assertFalse(self.index.supports(SERVER, {'name': 'vm'}))
+        self.assertFalse(self.index.supports('OS::Neutron::Net', {}))
+        self.flags(resource_inventory_types=[])
+        self.assertFalse(self.index.supports(SERVER, {}))
+
+    def test_list_from_index(self):
+        servers = [fake_server('server0'),
+                   fake_server('server1', status='SHUTOFF'),
+                   fake_server('server2', az='az02'),
+                   fake_server('server3')]
+        self.list_func.return_value = servers
+        self.assertEqual(servers, self.index.list(self.context, SERVER))
+        self.assertEqual(
+            [servers[0], servers[3]],
+            self.index.list(self.context, SERVER,
+                            search_opts={'availability_zone': 'az01',
+                                         'status': 'active'}))
+        self.assertEqual(
+            [servers[2]],
+            self.index.list(self.context, SERVER, marker='server1', limit=1))
+        self.assertIsNone(self.index.list(self.context, SERVER,
+                                          marker='server9'))
+        self.list_func.assert_called_once_with(self.context, SERVER, {})
+
+    def test_refresh_with_changes_since(self):
+        self.list_func.return_value = [fake_server('server0'),
+                                       fake_server('server1')]
+        self.index.list(self.context, SERVER)
+        self.list_func.return_value = [
+            fake_server('server0', status='DELETED'),
+            fake_server('server1', az='az02'),
+            fake_server('server2')]
+        self.index.refresh()
+        changes_since = self.list_func.call_args[0][2]['changes-since']
+        self.assertTrue(changes_since)
+        self.assertEqual([fake_server('server2')],
+                         self.index.list(self.context, SERVER,
+                                         {'availability_zone': 'az01'}))
+        self.assertEqual(['server1', 'server2'],
+                         [s['id'] for s in self.index.list(self.context,
+                                                           SERVER)])
+
+    def test_refresh_drops_failed_and_idle_indexes(self):
+        self.list_func.return_value = [{'id': 'volume0'}]
+        self.index.list(self.context, VOLUME)
+        self.index.list(context.RequestContext('fake', 'other'), VOLUME)
+        self.list_func.side_effect = [Exception, [{'id': 'volume1'}]]
+        self.index.refresh()
+        self.assertEqual(1, len(self.index._entries))
+
+        self.flags(resource_inventory_idle_timeout=-1)
+        self.index.refresh()
+        self.assertEqual({}, self.index._entries)
@@ -12,10 +12,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
 import mock
 
 from conveyor.compute import nova
 from conveyor import context
+from conveyor.db import api as db_api
 from conveyor import exception
 from conveyor.resource.driver import instances
 from conveyor.resource.driver import networks
@@ -196,3 +198,217 @@ class ResourceManagerTestCase(test.TestCase):
         self.assertRaises(exception.ResourceTypeNotSupported,
                           self.resource_manager.build_reources_topo,
                           self.context, fake_resources)
+
+    def test_list_clone_resources_keep_clone_objs_order(self):
+        fake_clone_objs = [{'obj_type': 'project', 'obj_id': 'project0'},
+                           {'obj_type': 'availability_zone',
+                            'obj_id': 'az01'}]
+
+        def fake_list_resources(context, res_type, search_opts, **kwargs):
+            owner = search_opts.get('project_id') or \
+                search_opts.get('availability_zone')
+            return [{'id': '%s-%s' % (owner, res_type)}]
+
+        with mock.patch.object(self.resource_manager, '_list_resources',
+                               side_effect=fake_list_resources):
+            result = self.resource_manager._list_clone_resources(
+                self.context, fake_clone_objs)
+        self.assertEqual(set(manager.PROJECT_CLONE_RESOURCES_TYPE),
+                         set(result.keys()))
+        self.assertEqual([{'id': 'project0-OS::Nova::Server'},
+                          {'id': 'az01-OS::Nova::Server'}],
+                         result['OS::Nova::Server'])
+
+    @mock.patch.object(db_api, 'plan_cloned_resource_get')
+    def test_get_az_topo_result_with_cloned_resources(self, mock_cloned_get):
+        mock_cloned_get.return_value = [
+            {'id': 1, 'updated_at': None,
+             'dependencies': [{'id': 'server0',
+                               'dependencies': [{'id': 'volume0'}]}]},
+            {'id': 2, 'updated_at': None,
+             'dependencies': [{'id': 'server0',
+                               'dependencies': [{'id': 'volume1'}]}]}]
+        fake_original = [{'id': 'server0',
+                          'dependencies': [{'id': 'volume0'},
+                                           {'id': 'volume1'},
+                                           {'id': 'volume2'}]},
+                         {'id': 'volume2', 'dependencies': []}]
+        result = self.resource_manager._get_az_topo_result(
+            self.context, 'plan0', 'az01', 'az02',
+            copy.deepcopy(fake_original))
+        self.assertEqual(['volume2', 'server0'], [r['id'] for r in result])
+        self.assertFalse(result[0]['is_cloned'])
+        self.assertTrue(result[1]['is_cloned'])
+        self.assertEqual([True, True, False],
+                         [d['is_cloned'] for d in
+                          result[1]['dependencies']])
+
+        # unchanged cloned resources reuse the cached topo
+        with mock.patch.object(self.resource_manager,
+                               '_calculate_increment_resources') as mock_calc:
+            self.resource_manager._get_az_topo_result(
+                self.context, 'plan0', 'az01', 'az02',
+                copy.deepcopy(fake_original))
+            self.assertFalse(mock_calc.called)
+            mock_cloned_get.return_value = []
+            self.resource_manager._get_az_topo_result(
+                self.context, 'plan0', 'az01', 'az02',
+                copy.deepcopy(fake_original))
+            self.assertTrue(mock_calc.called)
+
+    @mock.patch.object(db_api, 'plan_cloned_resource_get', return_value=[])
+    def test_topo_cache_bounded_and_invalidated(self, mock_cloned_get):
+        self.flags(resources_topo_cache_size=2)
+        for plan_id in ('plan0', 'plan1', 'plan2'):
+            self.resource_manager._get_az_topo_result(
+                self.context, plan_id, 'az01', 'az02', [])
+        self.assertEqual([('plan1', 'az01', 'az02'),
+                          ('plan2', 'az01', 'az02')],
+                         list(self.resource_manager._topo_cache))
+        self.assertEqual(2, len(self.resource_manager._cloned_index_cache))
+
+        self.resource_manager.invalidate_plan_topo(self.context, 'plan1')
+        self.assertEqual([('plan2', 'az01', 'az02')],
+                         list(self.resource_manager._topo_cache))
+        self.assertEqual([('plan2', 'az02')],
+                         list(self.resource_manager._cloned_index_cache))
+
+    def test_partition_resources_by_az(self):
+        def _dep(name, *deps):
+            return {'id': name + '-id', 'name': name,
+                    'dependencies': [{'name': d} for d in deps]}
+
+        dependencies = {'server0': _dep('server0', 'volume0', 'port0'),
+                        'server1': _dep('server1', 'port1'),
+                        'volume0': _dep('volume0'),
+                        'port0': _dep('port0', 'net0'),
+                        'port1': _dep('port1', 'net0'),
+                        'net0': _dep('net0'),
+                        'sg0': _dep('sg0', 'sg1'),
+                        'sg1': _dep('sg1', 'sg0')}
+        resources = {
+            'server0': {'properties': {'availability_zone': 'az01'}},
+            'server1': {'properties': {'availability_zone': 'az02'}},
+            'volume0': {'properties': {'availability_zone': 'az01'}},
+            'port0': {'properties': {}},
+            'port1': {'properties': {}},
+            'net0': {'properties': {}},
+            'sg0': {'properties': {}},
+            'sg1': {'properties': {}}}
+        partitions = self.resource_manager._partition_resources_by_az(
+            resources, dependencies, ['az01', 'az02', 'non-az'])
+        self.assertEqual(
+            set(['server0', 'volume0', 'port0', 'net0']),
+            set(r['name'] for r in partitions['az01']))
+        self.assertEqual(['server1', 'port1', 'net0'],
+                         [r['name'] for r in partitions['az02']])
+        self.assertEqual(
+            set(['port0', 'port1', 'net0', 'sg0', 'sg1']),
+            set(r['name'] for r in partitions['non-az']))
+        self.assertEqual(5, len(partitions['non-az']))
+        # partitions hold copies of the dependencies
+        self.assertIsNot(dependencies['net0'], partitions['az02'][2])
+
+    @mock.patch.object(db_api, 'plan_cloned_resource_get', return_value=[])
+    @mock.patch.object(db_api, 'plan_get')
+    def test_build_resources_topo_reuses_unchanged_plan(self, mock_plan_get,
+                                                        mock_cloned_get):
+        mock_plan_get.return_value = {'updated_at': 1,
+                                      'clone_resources': []}
+        with mock.patch.object(self.resource_manager,
+                               '_compute_resources_topo',
+                               return_value=[{'id': 'server0'}]) as m_topo:
+            for i in range(2):
+                self.assertEqual([{'id': 'server0'}],
+                                 self.resource_manager.build_resources_topo(
+                                     self.context, 'plan0', {'az01': 'az02'}))
+            self.assertEqual(1, m_topo.call_count)
+            mock_plan_get.return_value = {'updated_at': 2,
+                                          'clone_resources': []}
+            self.resource_manager.build_resources_topo(
+                self.context, 'plan0', {'az01': 'az02'})
+            self.assertEqual(2, m_topo.call_count)
+
+    @mock.patch.object(manager.time, 'time', return_value=1000)
+    @mock.patch.object(db_api, 'plan_cloned_resource_get', return_value=[])
+    @mock.patch.object(db_api, 'plan_get',
+                       return_value={'updated_at': 1,
+                                     'clone_resources': [{'obj_id': 'az01'}]})
+    def test_build_resources_topo_cache_lists_nothing(
+            self, mock_plan_get, mock_cloned_get, mock_time):
+        self.flags(resources_topo_cache_time=600)
+        with mock.patch.object(self.resource_manager,
+                               '_list_clone_resources',
+                               return_value={}) as m_list, \
+                mock.patch.object(self.resource_manager,
+                                  '_build_reources_topo',
+                                  return_value=({}, {})) as m_build:
+            for i in range(2):
+                self.assertEqual(
+                    [], self.resource_manager.build_resources_topo(
+                        self.context, 'plan0', {}))
+            # a cached topo is returned without asking the services
+            self.assertEqual(1, m_list.call_count)
+            self.assertEqual(1, m_build.call_count)
+            # listed resources are listed again once the topo expired
+            mock_time.return_value = 1600
+            self.resource_manager.build_resources_topo(self.context,
+                                                       'plan0', {})
+            self.assertEqual(2, m_list.call_count)
+
+    @mock.patch.object(manager.eventlet, 'spawn_n',
+                       side_effect=lambda func, *args: func(*args))
+    @mock.patch.object(db_api, 'plan_cloned_resource_get', return_value=[])
+    @mock.patch.object(db_api, 'plan_get',
+                       return_value={'updated_at': 1, 'clone_resources': []})
+    def test_resources_topo_job(self, mock_plan_get, mock_cloned_get,
+                                mock_spawn):
+        with mock.patch.object(self.resource_manager,
+                               '_compute_resources_topo',
+                               return_value=[{'id': 'server0'}]) as m_topo:
+            job = self.resource_manager.start_resources_topo_job(
+                self.context, 'plan0', {})
+            self.assertTrue(job['id'].endswith('@' +
+                                               self.resource_manager.host))
+            self.assertEqual(
+                {'id': job['id'], 'plan_id': 'plan0',
+                 'status': manager.TOPO_JOB_FINISHED,
+                 'topo': [{'id': 'server0'}]},
+                self.resource_manager.get_resources_topo_job(self.context,
+                                                             job['id']))
+            # the topo of the unchanged plan is returned at once
+            job = self.resource_manager.start_resources_topo_job(
+                self.context, 'plan0', {})
+            self.assertEqual(manager.TOPO_JOB_FINISHED, job['status'])
+            self.assertEqual([{'id': 'server0'}], job['topo'])
+            m_topo.assert_called_once_with(self.context, 'plan0', {})
+        self.assertEqual(1, mock_spawn.call_count)
+        self.assertRaises(exception.ResourcesTopoJobNotFound,
+                          self.resource_manager.get_resources_topo_job,
+                          self.context, 'fake-job')
+
+    @mock.patch.object(manager.eventlet, 'spawn_n')
+    @mock.patch.object(db_api, 'plan_cloned_resource_get', return_value=[])
+    @mock.patch.object(db_api, 'plan_get',
+                       return_value={'updated_at': 1, 'clone_resources': []})
+    def test_resources_topo_job_lists_in_job(self, mock_plan_get,
+                                             mock_cloned_get, mock_spawn):
+        with mock.patch.object(self.resource_manager,
+                               '_list_clone_resources',
+                               return_value={}) as m_list, \
+                mock.patch.object(self.resource_manager,
+                                  '_build_reources_topo',
+                                  return_value=({}, {})):
+            job = self.resource_manager.start_resources_topo_job(
+                self.context, 'plan0', {})
+            # the job is returned before the resources are listed
+            self.assertEqual(manager.TOPO_JOB_BUILDING, job['status'])
+            self.assertFalse(m_list.called)
+            func, args = mock_spawn.call_args[0][0], \
+                mock_spawn.call_args[0][1:]
+            func(*args)
+            self.assertEqual(1, m_list.call_count)
+        self.assertEqual(
+            manager.TOPO_JOB_FINISHED,
+            self.resource_manager.get_resources_topo_job(
+                self.context, job['id'])['status'])
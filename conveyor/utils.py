@@ -17,15 +17,16 @@
 
 """Utilities and helper functions."""
 
+import collections
 import ConfigParser
 import contextlib
 import datetime
+import eventlet
 import hashlib
 import inspect
 import netaddr
 import os
 import pyclbr
-import random
 import re
 import shutil
 import six
@@ -57,13 +58,6 @@ ISO_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
 PERFECT_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
 
 synchronized = lockutils.synchronized_with_prefix('conveyor-')
-vgw_update_time = {}
-
-vgw_dict = {}
-# vgw_index is {'az01':1}
-vgw_index = {}
-
-vgw_id_dict = {}
 
 vgw_port_dict = {}
 
@@ -78,31 +72,10 @@ def get_next_port_for_vgw(vgw_id):
 
 
 def get_next_vgw(region):
-    global vgw_dict, vgw_index, vgw_id_dict
-    """ return next available (vgw_id, vgw_ip) given region. """
-    if region not in vgw_index:
-        if not vgw_dict:
-            # vgw_ip_dict value is vgw_id0:vgw_ip0,vwg_id1:vgw_ip1
-            # _vgw_dict is {'az01':{'111111':'162.3.110.2',
-            # '222222':162.3.110.3}}
-            try:
-                vgw_str = '{' + CONF.vgw_info + '}'
-                vgw_dict = eval(vgw_str)
-            except Exception as e:
-                LOG.error('read the vgw info error: %s', e)
-                raise
-            vgw_id_dict = dict([(_r, list(v))
-                                for _r, v in vgw_dict.items()
-                                ])
-        vgw_index[region] = random.randint(
-            0, len(vgw_id_dict[region]) - 1
-        )
-    else:
-        vgw_index[region] = (vgw_index[region] + 1) % \
-                            len(vgw_id_dict[region])
-    idx = vgw_index[region]
-    vgw_id = vgw_id_dict[region][idx]
-    return vgw_id, vgw_dict[region][vgw_id]
+    """Return the least loaded healthy (vgw_id, vgw_ip) of region."""
+    # imported here as the registry itself depends on this module
+    from conveyor.common import vgw_registry
+    return vgw_registry.get_registry().select(region)
 
 
 @synchronized('conveyor-config', external=True)
@@ -119,7 +92,6 @@ def remove_vgw_info(vgw_id, config_key, config_vaule):
         for v_id, v_ip in v.items():
             if v_id == vgw_id:
                 del v[vgw_id]
-                del vgw_update_time[v_id]
                 flag = True
                 break
 
@@ -152,8 +124,7 @@ def remove_vgw_info(vgw_id, config_key, config_vaule):
         if fh:
             fh.close()
 
-    LOG.debug('Remove vgw info end: update time list %(l)s, config %(c)s',
-              {'l': vgw_update_time, 'c': config_value_str})
+    LOG.debug('Remove vgw info end: config %s', config_value_str)
 
 
 def find_config(config_path):
@@ -880,6 +851,64 @@ def retry(exceptions, interval=1, retries=3, backoff_rate=2):
     return _decorator
 
 
+def concurrent_map(func, items, pool_size):
+    """Apply func to every item on a bounded green pool.
+
+    Results are returned in the order of items, so merging them gives the
+    same output as a serial loop would. The first exception raised by func
+    is re-raised to the caller.
+    """
+    items = list(items)
+    if len(items) <= 1 or pool_size <= 1:
+        return [func(item) for item in items]
+    pool = eventlet.GreenPool(min(pool_size, len(items)))
+    return list(pool.imap(func, items))
+
+
+class LRUCache(object):
+    """A dict keeping at most maxsize items, least recently used first out.
+
+    maxsize is a callable when the size comes from a config option, so
+    it follows changes of the option.
+    """
+
+    def __init__(self, maxsize):
+        self._maxsize = maxsize
+        self._items = collections.OrderedDict()
+
+    def _max(self):
+        return self._maxsize() if callable(self._maxsize) else self._maxsize
+
+    def get(self, key, default=None):
+        try:
+            value = self._items.pop(key)
+        except KeyError:
+            return default
+        self._items[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self._items.pop(key, None)
+        self._items[key] = value
+        while len(self._items) > max(self._max(), 0):
+            self._items.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def pop(self, key, default=None):
+        return self._items.pop(key, default)
+
+    def clear(self):
+        self._items.clear()
+
+
 def convert_version_to_int(version):
     try:
         if isinstance(version, six.string_types):
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Time the JSON backends on a plan document of many resources.
+
+The document looks like the original_resources column of a plan: every
+server has a port, a volume and their properties. It is encoded and
+decoded with each installed backend of conveyor.common.serializer.
+
+usage, from the top of the tree:
+    PYTHONPATH=. tools/benchmark_json.py [--servers N] [--repeat N]
+"""
+
+from __future__ import print_function
+
+import argparse
+import datetime
+import time
+
+from oslo_config import cfg
+
+from conveyor.common import serializer
+
+CONF = cfg.CONF
+
+
+def fake_plan(servers):
+    resources = {}
+    for i in range(servers):
+        resources['server_%d' % i] = {
+            'id': 'server-%d' % i,
+            'type': 'OS::Nova::Server',
+            'name': 'server_%d' % i,
+            'properties': {
+                'flavor': {'get_resource': 'flavor_0'},
+                'networks': [{'port': {'get_resource': 'port_%d' % i}}],
+                'block_device_mapping_v2': [
+                    {'volume_id': {'get_resource': 'volume_%d' % i},
+                     'device_name': '/dev/vda', 'boot_index': 0}],
+                'metadata': {'group': 'web', 'weight': 0.1 * i},
+            },
+            'extra_properties': {'vm_state': 'active',
+                                 'power_state': 1,
+                                 'created_at': datetime.datetime(2017, 1, 1)},
+        }
+        resources['port_%d' % i] = {
+            'id': 'port-%d' % i,
+            'type': 'OS::Neutron::Port',
+            'properties': {'fixed_ips': [{'ip_address': '10.0.%d.%d'
+                                          % (i // 250, i % 250)}],
+                           'mac_address': 'fa:16:3e:00:%02x:%02x'
+                                          % (i // 256 % 256, i % 256)},
+        }
+        resources['volume_%d' % i] = {
+            'id': 'volume-%d' % i,
+            'type': 'OS::Cinder::Volume',
+            'properties': {'size': 20, 'volume_type': 'ssd',
+                           'metadata': {'readonly': 'False'}},
+        }
+    return {'plan_id': 'plan0', 'original_resources': resources}
+
+
+def run(name, document, repeat):
+    CONF.set_override('json_backend', name)
+    serializer.reset_backend()
+    backend = serializer.get_backend()
+    if backend.name != name:
+        return None
+    start = time.time()
+    for i in range(repeat):
+        encoded = serializer.dumps(document)
+    dumps_time = (time.time() - start) / repeat
+    start = time.time()
+    for i in range(repeat):
+        serializer.loads(encoded)
+    loads_time = (time.time() - start) / repeat
+    return len(encoded), dumps_time, loads_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--servers', type=int, default=1000,
+                        help='number of servers of the plan')
+    parser.add_argument('--repeat', type=int, default=10,
+                        help='number of times each document is coded')
+    args = parser.parse_args()
+    CONF([], project='conveyor')
+
+    document = fake_plan(args.servers)
+    for name in ('stdlib', 'simplejson', 'ujson'):
+        result = run(name, document, args.repeat)
+        if result is None:
+            print('%-10s not installed' % name)
+            continue
+        size, dumps_time, loads_time = result
+        print('%-10s %d bytes: dumps %.1fms, loads %.1fms'
+              % (name, size, dumps_time * 1000, loads_time * 1000))
+
+
+if __name__ == '__main__':
+    main()
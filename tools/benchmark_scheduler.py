@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# Copyright (c) 2017 Huawei, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Time the creation of a chain of quick resources by the heat scheduler.
+
+Every resource of the chain depends on the previous one and its action
+completes some milliseconds after it started. The actions are checked the
+way Resource.action_handler_task checks them, first after
+resource_check_interval seconds then backing off, and compared with the
+one second step used when tasks yield no wake-up hint.
+
+usage, from the top of the tree:
+    PYTHONPATH=. tools/benchmark_scheduler.py [--depth N] [--duration SECONDS]
+"""
+
+from __future__ import print_function
+
+import argparse
+import time
+
+import eventlet
+eventlet.monkey_patch()
+
+from conveyor.conveyorheat.engine import dependencies  # noqa
+from conveyor.conveyorheat.engine import scheduler  # noqa
+
+
+def fake_action(duration, interval):
+    def action(key):
+        done_at = time.time() + duration
+        check_interval = interval
+        yield check_interval
+        while time.time() < done_at:
+            if check_interval is not None:
+                check_interval = min(check_interval * 2, 1)
+            yield check_interval
+    return action
+
+
+def create_chain(depth, duration, interval):
+    deps = dependencies.Dependencies([(i + 1, i) for i in range(depth - 1)])
+    group = scheduler.DependencyTaskGroup(deps,
+                                          fake_action(duration, interval))
+    start = time.time()
+    scheduler.TaskRunner(group)()
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--depth', type=int, default=10,
+                        help='number of resources of the chain')
+    parser.add_argument('--duration', type=float, default=0.05,
+                        help='seconds every resource action takes')
+    args = parser.parse_args()
+
+    for name, interval in (('one second step', None),
+                           ('wake-up hints from 0.1s', 0.1)):
+        elapsed = create_chain(args.depth, args.duration, interval)
+        print('%-24s depth %d: %.2fs, %.3fs per resource'
+              % (name, args.depth, elapsed, elapsed / args.depth))
+
+
+if __name__ == '__main__':
+    main()